@@ -0,0 +1,297 @@
+"""
+Offline benchmark of /process-pdfs and /compare-banks against a simulated model.
+
+Drives the ASGI app in-process with a FakeModelClient (configurable latency,
+failure/429 rates and response sizes) across batch sizes, bank counts and
+client concurrency, and reports throughput, latency percentiles and peak memory.
+
+    python benchmark.py                              # run and print the report
+    python benchmark.py --save-baseline bench.json   # record a baseline
+    python benchmark.py --baseline bench.json        # exit 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import httpx
+
+from config.fields import get_field_keys
+from models import BankInfo, FieldWithEvidence
+from services.cache import LRUCache, SQLiteCache
+from services.comparison_cache import ComparisonCache
+from services.fake_model import FakeModelClient, FakeModelConfig
+from services.policy_store import PolicyStore
+from services.rate_limiter import reset_rate_limiters
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Scenario:
+    name: str
+    kind: str  # "extract" or "compare"
+    size: int  # files per batch, or banks per comparison
+    concurrency: int  # simultaneous client requests
+    requests: int  # total requests issued
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_memory_mb: float
+    model_calls: int
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def synthetic_pdf(index: int, pages: int = 3) -> bytes:
+    """A small valid PDF with a text layer, unique per index so it is never an extraction cache hit"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        stream = f"BT /F1 10 Tf 20 800 Td (Document {index} page {page + 1}: processing fee 0.{index % 9 + 1}% tenure up to 30 years) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def synthetic_bank(bank_id: str, variant: int) -> Dict:
+    """A comparison entry whose fields all differ between banks, so every cell needs the model"""
+    values = {
+        field_key: FieldWithEvidence(missing=False, content=f"{field_key} {variant}.{index}")
+        for index, field_key in enumerate(get_field_keys())
+        if field_key in BankInfo.model_fields
+    }
+    bank_info = BankInfo(bank_name=f"BANK{variant}", is_valid_home_loan_mitc=True, **values)
+    return {"bank_id": bank_id, "bank_info": bank_info.model_dump()}
+
+
+@contextmanager
+def simulated_backend(fake: FakeModelClient, model_rpm: Optional[float]):
+    """Install the fake client with cold caches and fresh limiters, restoring everything afterwards"""
+    from routes import pdf_routes
+    from services.model_client import model_client
+
+    saved = {name: getattr(pdf_routes, name) for name in ("extraction_cache", "comparison_cache", "policy_store")}
+    saved_env = {}
+    pdf_routes.extraction_cache = SQLiteCache(":memory:")
+    pdf_routes.comparison_cache = ComparisonCache(LRUCache(), model=pdf_routes.COMPARISON_MODEL, prompt_version="benchmark")
+    pdf_routes.policy_store = PolicyStore(":memory:")
+    if model_rpm is not None:
+        for model in (pdf_routes.EXTRACTION_MODEL, pdf_routes.COMPARISON_MODEL):
+            prefix = model.upper().replace("-", "_").replace(".", "_")
+            for key, value in ((f"{prefix}_RPM", model_rpm), (f"{prefix}_MAX_CONCURRENCY", max(pdf_routes.MODEL_CALL_WORKERS, 1))):
+                saved_env[key] = os.environ.get(key)
+                os.environ[key] = str(value)
+    reset_rate_limiters()
+    try:
+        with model_client.override(fake):
+            yield
+    finally:
+        for name, value in saved.items():
+            setattr(pdf_routes, name, value)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        reset_rate_limiters()
+
+
+async def run_scenario(scenario: Scenario, config: FakeModelConfig, model_rpm: Optional[float]) -> ScenarioResult:
+    from main import app, warm_up_model_client
+
+    fake = FakeModelClient(config)
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(10 ** 9))
+
+    async def one_request(http: httpx.AsyncClient) -> None:
+        nonlocal errors
+        n = next(counter)
+        if scenario.kind == "extract":
+            files = [
+                ("files", (f"bank_{n}_{i}.pdf", synthetic_pdf(n * 1000 + i), "application/pdf"))
+                for i in range(scenario.size)
+            ]
+            start = time.perf_counter()
+            response = await http.post("/process-pdfs", files=files)
+            ok = response.status_code == 200 and response.json()["failed"] == 0
+        else:
+            body = {"banks": [synthetic_bank(f"b{i}", n * 100 + i) for i in range(scenario.size)]}
+            start = time.perf_counter()
+            response = await http.post("/compare-banks", json=body)
+            ok = response.status_code == 200
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors += 1
+
+    async def client_loop(http: httpx.AsyncClient, count: int) -> None:
+        for _ in range(count):
+            await one_request(http)
+
+    per_client = [scenario.requests // scenario.concurrency + (1 if i < scenario.requests % scenario.concurrency else 0) for i in range(scenario.concurrency)]
+    with simulated_backend(fake, model_rpm):
+        # ASGITransport skips the lifespan, so warm up the way the server does at startup
+        await warm_up_model_client()
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            await asyncio.gather(*(client_loop(http, count) for count in per_client if count))
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return ScenarioResult(
+        name=scenario.name,
+        requests=len(latencies),
+        errors=errors,
+        throughput_rps=round(len(latencies) / elapsed, 3),
+        p50_ms=round(percentile(latencies, 50) * 1000, 1),
+        p95_ms=round(percentile(latencies, 95) * 1000, 1),
+        p99_ms=round(percentile(latencies, 99) * 1000, 1),
+        peak_memory_mb=round(peak / (1024 * 1024), 2),
+        model_calls=fake.calls,
+    )
+
+
+def build_scenarios(batch_sizes: List[int], bank_counts: List[int], concurrency: List[int], requests: int) -> List[Scenario]:
+    scenarios = []
+    for level in concurrency:
+        for size in batch_sizes:
+            scenarios.append(Scenario(f"extract/files={size}/concurrency={level}", "extract", size, level, requests))
+        for count in bank_counts:
+            scenarios.append(Scenario(f"compare/banks={count}/concurrency={level}", "compare", count, level, requests))
+    return scenarios
+
+
+def find_regressions(results: List[ScenarioResult], baseline: Dict[str, Dict], tolerance: float, memory_tolerance: float) -> List[str]:
+    """Compare results with a saved baseline; scenarios absent from the baseline are skipped"""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.throughput_rps < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{result.name}: throughput {result.throughput_rps} < baseline {base['throughput_rps']} req/s")
+        if result.p95_ms > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{result.name}: p95 {result.p95_ms} > baseline {base['p95_ms']} ms")
+        if result.peak_memory_mb > base["peak_memory_mb"] * (1 + memory_tolerance):
+            regressions.append(f"{result.name}: peak memory {result.peak_memory_mb} > baseline {base['peak_memory_mb']} MB")
+        if result.errors > base.get("errors", 0):
+            regressions.append(f"{result.name}: {result.errors} failed requests (baseline {base.get('errors', 0)})")
+    return regressions
+
+
+def format_report(results: List[ScenarioResult]) -> str:
+    header = f"{'scenario':<36} {'req':>4} {'err':>4} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak MB':>8} {'calls':>6}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.name:<36} {r.requests:>4} {r.errors:>4} {r.throughput_rps:>8} {r.p50_ms:>9} {r.p95_ms:>9} {r.p99_ms:>9} {r.peak_memory_mb:>8} {r.model_calls:>6}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    def int_list(value: str) -> List[int]:
+        return [int(item) for item in value.split(",") if item]
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 5, 20], help="files per /process-pdfs request")
+    parser.add_argument("--bank-counts", type=int_list, default=[2, 4, 8], help="banks per /compare-banks request")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 4], help="simultaneous client requests")
+    parser.add_argument("--requests", type=int, default=4, help="requests per scenario")
+    parser.add_argument("--pro-latency", type=float, default=0.2, help="median extraction model latency (s)")
+    parser.add_argument("--flash-latency", type=float, default=0.05, help="median comparison model latency (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread of model latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of model calls failing with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of model calls throttled with 429")
+    parser.add_argument("--evidence-per-field", type=int, default=2, help="evidence items per extracted field")
+    parser.add_argument("--content-chars", type=int, default=200, help="characters of content per extracted field")
+    parser.add_argument("--model-rpm", type=float, default=100000, help="rate-limit quota per model (0 keeps the configured quotas)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="baseline JSON to compare against; exits 1 on regression")
+    parser.add_argument("--save-baseline", help="write results to this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative throughput/p95 regression")
+    parser.add_argument("--memory-tolerance", type=float, default=0.5, help="allowed relative peak memory regression")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    # Per-request INFO lines would dominate the run time and the output
+    for name in ("routes.pdf_routes", "services.pdf_text", "pypdf"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    config = FakeModelConfig(
+        median_latency={"gemini-2.5-pro": args.pro_latency, "gemini-2.5-flash": args.flash_latency},
+        latency_sigma=args.latency_sigma,
+        failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate,
+        evidence_per_field=args.evidence_per_field,
+        content_chars=args.content_chars,
+        seed=args.seed,
+    )
+    scenarios = build_scenarios(args.batch_sizes, args.bank_counts, args.concurrency, args.requests)
+    model_rpm = args.model_rpm or None
+
+    results = []
+    for scenario in scenarios:
+        results.append(asyncio.run(run_scenario(scenario, config, model_rpm)))
+        print(f"  done {scenario.name}", file=sys.stderr)
+    print(format_report(results))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({result.name: asdict(result) for result in results}, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance, args.memory_tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  ✗ {regression}")
+            return 1
+        print(f"\n✓ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
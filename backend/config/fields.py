@@ -1,5 +1,10 @@
+import hashlib
+import json
 import os
-from typing import Dict, List
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 
 # Default field configuration
 DEFAULT_FIELDS = {
@@ -40,31 +45,122 @@ DEFAULT_FIELDS = {
     }
 }
 
+# How often (seconds) to stat FIELD_CONFIG_FILE for changes
+FIELD_CONFIG_RELOAD_INTERVAL = float(os.getenv("FIELD_CONFIG_RELOAD_INTERVAL", "2"))
+
+
+@dataclass(frozen=True)
+class FieldConfigSnapshot:
+    """Parsed field configuration plus the views derived from it"""
+    config: Dict
+    keys: List[str]
+    display_names: Dict[str, str]
+    descriptions: Dict[str, str]
+    strong_model_fields: List[str]
+    fingerprint: str
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "FieldConfigSnapshot":
+        canonical = json.dumps(config, sort_keys=True, separators=(",", ":"))
+        return cls(
+            config=config,
+            keys=list(config.keys()),
+            display_names={key: field["display_name"] for key, field in config.items()},
+            descriptions={key: field["description"] for key, field in config.items()},
+            strong_model_fields=[key for key, field in config.items() if not field.get("cascade", True)],
+            fingerprint=hashlib.sha256(canonical.encode("utf-8")).hexdigest(),
+        )
+
+
+class FieldConfigRegistry:
+    """
+    Loads the field configuration once and serves it from memory.
+
+    FIELD_CONFIG_FILE is re-read only when the configured path changes or the
+    file's mtime/size changes; the file is stat'ed at most once every
+    FIELD_CONFIG_RELOAD_INTERVAL seconds.
+    """
+
+    def __init__(self, reload_interval: float = FIELD_CONFIG_RELOAD_INTERVAL):
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[FieldConfigSnapshot] = None
+        self._config_file: Optional[str] = None
+        self._file_signature: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+
+    @staticmethod
+    def _signature(config_file: Optional[str]) -> Optional[Tuple[int, int]]:
+        if not config_file:
+            return None
+        try:
+            stat = os.stat(config_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _load(config_file: Optional[str], signature: Optional[Tuple[int, int]]) -> Dict:
+        if config_file and signature is not None:
+            try:
+                with open(config_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not load field config from {config_file}: {e}")
+                print("Using default field configuration")
+
+        return DEFAULT_FIELDS
+
+    def snapshot(self) -> FieldConfigSnapshot:
+        """Get the current configuration, reloading it if the file has changed"""
+        config_file = os.getenv("FIELD_CONFIG_FILE")
+        now = time.monotonic()
+        if (
+            self._snapshot is not None
+            and config_file == self._config_file
+            and now - self._checked_at < self.reload_interval
+        ):
+            return self._snapshot
+
+        with self._lock:
+            signature = self._signature(config_file)
+            if self._snapshot is None or config_file != self._config_file or signature != self._file_signature:
+                self._snapshot = FieldConfigSnapshot.from_config(self._load(config_file, signature))
+                self._config_file = config_file
+                self._file_signature = signature
+            self._checked_at = now
+            return self._snapshot
+
+    def reload(self) -> FieldConfigSnapshot:
+        """Force the configuration to be re-read on the next access"""
+        with self._lock:
+            self._snapshot = None
+        return self.snapshot()
+
+
+field_config_registry = FieldConfigRegistry()
+
+
 def get_field_config() -> Dict:
     """Get field configuration from environment or use defaults"""
-    config_file = os.getenv("FIELD_CONFIG_FILE")
-    
-    if config_file and os.path.exists(config_file):
-        try:
-            import json
-            with open(config_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Warning: Could not load field config from {config_file}: {e}")
-            print("Using default field configuration")
-    
-    return DEFAULT_FIELDS
+    return field_config_registry.snapshot().config
 
 def get_field_keys() -> List[str]:
     """Get list of field keys"""
-    return list(get_field_config().keys())
+    return field_config_registry.snapshot().keys
 
 def get_field_display_names() -> Dict[str, str]:
     """Get mapping of field keys to display names"""
-    config = get_field_config()
-    return {key: field["display_name"] for key, field in config.items()}
+    return field_config_registry.snapshot().display_names
 
 def get_field_descriptions() -> Dict[str, str]:
     """Get mapping of field keys to descriptions"""
-    config = get_field_config()
-    return {key: field["description"] for key, field in config.items()}
+    return field_config_registry.snapshot().descriptions
+
+def get_strong_model_fields() -> List[str]:
+    """Get keys of fields configured with "cascade": false, which the extraction cascade always sends to the strong model"""
+    return field_config_registry.snapshot().strong_model_fields
+
+def get_field_config_fingerprint() -> str:
+    """Get a stable hash of the active field configuration (changes whenever fields change)"""
+    return field_config_registry.snapshot().fingerprint
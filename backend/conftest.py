@@ -0,0 +1,71 @@
+from unittest.mock import Mock
+
+import pytest
+
+from services.cache import LRUCache, SQLiteCache
+
+
+@pytest.fixture(autouse=True)
+def isolated_model_client():
+    """Start every test without a model client, so clients injected by a test never leak into the next"""
+    from services.model_client import model_client
+
+    with model_client.override(None):
+        yield
+
+
+@pytest.fixture
+def mock_client():
+    """Serve model calls from a Mock with the genai.Client call shape for the duration of the test"""
+    from services.model_client import model_client
+
+    with model_client.override(Mock()) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def isolated_extraction_cache(monkeypatch):
+    """Give every test an empty in-memory extraction cache instead of the on-disk one"""
+    cache = SQLiteCache(":memory:")
+    monkeypatch.setattr("routes.pdf_routes.extraction_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_comparison_cache(monkeypatch):
+    """Give every test an empty memory-only comparison cache"""
+    from services.comparison_cache import ComparisonCache
+
+    cache = ComparisonCache(LRUCache(), model="test-model", prompt_version="test")
+    monkeypatch.setattr("routes.pdf_routes.comparison_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_policy_store(monkeypatch):
+    """Give every test an empty in-memory policy store"""
+    from services.policy_store import PolicyStore
+
+    store = PolicyStore(":memory:")
+    monkeypatch.setattr("routes.pdf_routes.policy_store", store)
+    return store
+
+
+@pytest.fixture(autouse=True)
+def isolated_job_queue(monkeypatch, tmp_path):
+    """Keep job queue state for each test in a temporary directory"""
+    from services.jobs import JobQueue
+
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), str(tmp_path / "job_spool"))
+    monkeypatch.setattr("routes.job_routes.job_queue", queue)
+    return queue
+
+
+@pytest.fixture(autouse=True)
+def isolated_rate_limiters():
+    """Start every test with fresh model limiters, so tokens spent or throttles recorded by one test never slow the next"""
+    from services.rate_limiter import reset_rate_limiters
+
+    reset_rate_limiters()
+    yield
+    reset_rate_limiters()
@@ -1,26 +1,151 @@
+import argparse
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, List, Optional
+
+from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from routes.pdf_routes import router as pdf_router
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
 
-# Add CORS middleware to allow requests from frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://frontend:3000", "*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+class GZipExceptStreamsMiddleware(GZipMiddleware):
+    """GZip for regular responses; NDJSON streams pass through so each line is sent as soon as it is ready"""
 
-# Include routers
-app.include_router(pdf_router)
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
 
-@app.get("/")
-def root():
-    return {"message": "Backend running"}
 
-if __name__ == "__main__":
+async def warm_up_model_client() -> None:
+    """Import the SDK and pypdf and create the model client in the background so the first request does not pay for it"""
+    from services.model_client import genai_types_async, model_client
+    from services.pdf_text import load_pdf_reader
+
+    try:
+        # Request types and the PDF reader are needed even when the client is injected
+        await genai_types_async()
+        await asyncio.to_thread(load_pdf_reader)
+        await model_client.get_async()
+    except Exception as e:
+        logger.warning(f"Model client not available: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from routes.job_routes import start_job_workers, stop_job_workers
+
+    # Runs in every serving process, including workers started by `--workers N`
+    logging.basicConfig(level=logging.INFO)
+    warm_up = asyncio.create_task(warm_up_model_client())
+    # Background workers for the /jobs queue
+    await start_job_workers()
+    yield
+    await stop_job_workers()
+    warm_up.cancel()
+
+
+def create_app(model_client: Optional[Any] = None) -> FastAPI:
+    """
+    Build the API app.
+
+    Routes (and the services behind them) are imported here; the Gemini SDK
+    client is only created on first use or by the startup warm-up. Pass
+    model_client to serve from another backend with the genai.Client call
+    shape, e.g. services.fake_model.FakeModelClient.
+    """
+    # Route modules read their settings from the environment when imported
+    load_dotenv()
+
+    from routes.pdf_routes import router as pdf_router
+    from routes.job_routes import router as job_router
+    from routes.policy_routes import router as policy_router
+    from services.metrics import registry
+    from services.model_client import model_client as model_client_provider
+
+    if model_client is not None:
+        model_client_provider.set(model_client)
+
+    app = FastAPI(lifespan=lifespan)
+
+    # Add CORS middleware to allow requests from frontend
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://frontend:3000", "*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Opt-in compression of large bodies (e.g. batch results with evidence)
+    gzip_min_bytes = int(os.getenv("GZIP_MIN_BYTES", "0"))
+    if gzip_min_bytes > 0:
+        app.add_middleware(GZipExceptStreamsMiddleware, minimum_size=gzip_min_bytes)
+
+    # Include routers
+    app.include_router(pdf_router)
+    app.include_router(job_router)
+    app.include_router(policy_router)
+
+    @app.get("/")
+    def root():
+        """Liveness: the process is up and serving requests"""
+        return {"message": "Backend running"}
+
+    @app.get("/ready")
+    def ready():
+        """Readiness: the model client has been created and requests can be served"""
+        if not model_client_provider.ready:
+            return JSONResponse({"status": "starting", "model_client": False}, status_code=503)
+        return {"status": "ready", "model_client": True}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        """Prometheus text-format metrics for extraction, comparison and model calls"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+
+app = create_app()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the policy comparator API")
+    parser.add_argument("--host", default=os.getenv("BACKEND_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("BACKEND_PORT", "8000")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("API_WORKERS", "1")),
+        help="Serving processes; more than one shares caches and the model rate-limit budget through local SQLite files",
+    )
+    return parser.parse_args(argv)
+
+
+def serve(argv: Optional[List[str]] = None) -> None:
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    if args.workers <= 1:
+        uvicorn.run(app, host=args.host, port=args.port)
+        return
+
+    # Caches, the policy store and the job queue are SQLite files already;
+    # the per-model request budgets must be shared too so the workers
+    # together stay within quota. Worker processes inherit this environment.
+    os.environ.setdefault("RATE_LIMIT_STATE_PATH", "cache/rate_limits.sqlite3")
+    if not os.getenv("COMPARISON_CACHE_PATH", "cache/comparison_cache.sqlite3"):
+        logger.warning("COMPARISON_CACHE_PATH is empty: each worker keeps its own comparison cache")
+    logger.info(f"Starting {args.workers} workers sharing {os.environ['RATE_LIMIT_STATE_PATH']}")
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,10 +1,16 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Literal
+from pydantic import BaseModel, Field, model_validator
+from pydantic.json_schema import SkipJsonSchema
+from typing import Any, List, Optional, Dict, Literal
+
+from config.fields import get_field_keys
 
 
 class Evidence(BaseModel):
     page_number: Optional[int] = Field(description="Page number where information was found")
     line_snippet: str = Field(description="Exact text snippet from the document")
+    # Set locally after extraction and hidden from the model's response schema
+    verification: SkipJsonSchema[Optional[Literal["verified", "corrected", "unverified"]]] = Field(default=None, description="Result of checking the snippet against the PDF text layer (unset if the PDF has none)")
+    reported_page_number: SkipJsonSchema[Optional[int]] = Field(default=None, description="Page number given by the model when verification corrected it")
 
 
 class FieldWithEvidence(BaseModel):
@@ -29,11 +35,21 @@ class BankInfo(BaseModel):
     documents_required: FieldWithEvidence = Field(description="Required documents list with evidence")
 
 
+class ProcessingTiming(BaseModel):
+    total_ms: float = Field(description="End-to-end wall time in milliseconds")
+    stages_ms: Dict[str, float] = Field(description="Wall time per stage in milliseconds (stages can overlap)")
+    attempts: Optional[int] = Field(default=None, description="Model attempts made (extraction only)")
+
+
 class PDFProcessResult(BaseModel):
     filename: str
     status: Literal["success", "failed"] = Field(description="Processing status")
     bank_info: Optional[BankInfo] = None
     error_message: Optional[str] = None
+    cached: bool = Field(default=False, description="True if the result was served from the extraction cache")
+    policy_id: Optional[str] = Field(default=None, description="Id of the stored policy, usable in /compare-banks instead of bank_info")
+    field_models: Optional[Dict[str, str]] = Field(default=None, description="Model that extracted each field (set when the extraction cascade ran, not on cache hits)")
+    timing: Optional[ProcessingTiming] = Field(default=None, description="Stage timings (only when requested with ?timings=true)")
 
 
 class ProcessPDFsResponse(BaseModel):
@@ -43,10 +59,144 @@ class ProcessPDFsResponse(BaseModel):
     failed: int
 
 
+# Streaming frames for /process-pdfs/stream (one JSON object per line)
+class PDFProcessResultFrame(BaseModel):
+    type: Literal["result"] = "result"
+    index: int = Field(description="Position of the file in the original upload order")
+    result: PDFProcessResult
+
+
+class ProcessPDFsSummaryFrame(BaseModel):
+    type: Literal["summary"] = "summary"
+    total_processed: int
+    successful: int
+    failed: int
+
+
+# Job Models
+class JobCreatedResponse(BaseModel):
+    job_id: str = Field(description="Identifier to poll with GET /jobs/{job_id}")
+    total_files: int
+
+
+class JobFileStatus(BaseModel):
+    index: int = Field(description="Position of the file in the original upload order")
+    filename: str
+    status: Literal["queued", "running", "done"] = Field(description="Processing state of this file")
+    result: Optional[PDFProcessResult] = Field(default=None, description="Extraction result once the file is done")
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "completed"] = Field(description="Overall job state")
+    total_files: int
+    completed_files: int
+    successful: int
+    failed: int
+    files: List[JobFileStatus] = Field(description="Per-file progress and partial results in upload order")
+
+
+# Policy store models
+class PolicySummary(BaseModel):
+    policy_id: str
+    bank_name: str
+    effective_date: Optional[str] = None
+    updated_date: Optional[str] = None
+    is_valid_home_loan_mitc: bool
+    document_sha256: str = Field(description="SHA-256 of the source PDF")
+    filename: Optional[str] = None
+    updated_at: float = Field(description="Unix time the policy was last extracted")
+
+
+class StoredPolicy(BaseModel):
+    policy_id: str
+    document_sha256: str
+    filename: Optional[str] = None
+    created_at: float
+    updated_at: float
+    bank_info: BankInfo
+
+
+class FieldChange(BaseModel):
+    field_name: str
+    status: Literal["carried_forward", "unchanged", "changed"] = Field(description="carried_forward: supporting pages untouched, copied without re-extraction; unchanged/changed: re-extracted from the revision")
+    previous_content: Optional[str] = None
+    content: Optional[str] = None
+
+
+class RevisionResult(BaseModel):
+    filename: str
+    status: Literal["success", "failed"] = Field(description="Processing status")
+    previous_policy_id: str
+    policy_id: Optional[str] = Field(default=None, description="Id of the stored revised policy")
+    bank_info: Optional[BankInfo] = None
+    changelog: List[FieldChange] = Field(default_factory=list)
+    changed_pages: List[int] = Field(default_factory=list, description="Pages of the revision not found unchanged in the previous version")
+    total_pages: Optional[int] = None
+    full_extraction: bool = Field(default=False, description="True if the revision could not be diffed and was extracted in full")
+    error_message: Optional[str] = None
+    timing: Optional[ProcessingTiming] = Field(default=None, description="Stage timings (only when requested with ?timings=true)")
+
+
 # Comparison Models
+class ComparisonField(BaseModel):
+    missing: bool = True
+    content: Optional[str] = None
+
+
+class ComparisonInput(BaseModel):
+    """
+    The parts of an extraction a comparison reads: the bank name plus missing
+    and content of each configured field.
+
+    Also accepts a full BankInfo (object or payload): only the configured
+    fields' missing/content are picked out, so evidence is never validated.
+    Configured fields absent from the input count as missing.
+    """
+    bank_name: str
+    fields: Dict[str, ComparisonField]
+
+    @model_validator(mode="before")
+    @classmethod
+    def from_bank_info(cls, data: Any) -> Any:
+        if isinstance(data, dict) and "fields" in data:
+            return data
+        if isinstance(data, BaseModel):
+            data = {name: getattr(data, name) for name in type(data).model_fields}
+        if not isinstance(data, dict):
+            return data
+        fields = {}
+        for field_key in get_field_keys():
+            value = data.get(field_key)
+            if isinstance(value, BaseModel):
+                value = {"missing": getattr(value, "missing", True), "content": getattr(value, "content", None)}
+            if isinstance(value, dict):
+                fields[field_key] = {"missing": value.get("missing", True), "content": value.get("content")}
+        return {"bank_name": data.get("bank_name"), "fields": fields}
+
+    def comparison_data(self) -> Dict:
+        """{"bank_name", field_key: {"missing", "content"}} for every configured field"""
+        data = {"bank_name": self.bank_name}
+        for field_key in get_field_keys():
+            field = self.fields.get(field_key) or ComparisonField()
+            data[field_key] = {"missing": field.missing, "content": field.content}
+        return data
+
+
 class BankComparisonData(BaseModel):
-    bank_id: str = Field(description="Unique identifier for the bank")
-    bank_info: BankInfo = Field(description="Complete bank information with all fields")
+    bank_id: Optional[str] = Field(default=None, description="Unique identifier for the bank (defaults to policy_id)")
+    bank_info: Optional[ComparisonInput] = Field(default=None, description="Bank name and configured fields; a full BankInfo payload is accepted and its evidence ignored")
+    policy_id: Optional[str] = Field(default=None, description="Id of a stored policy, sent instead of bank_info")
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if (self.bank_info is None) == (self.policy_id is None):
+            raise ValueError("Provide exactly one of bank_info or policy_id")
+        if self.bank_id is None:
+            if self.policy_id is None:
+                raise ValueError("bank_id is required with bank_info")
+            self.bank_id = self.policy_id
+        return self
 
 
 class ComparisonCell(BaseModel):
@@ -61,6 +211,7 @@ class BankComparisonCell(BaseModel):
     status: Literal["SAME", "DIFF", "MISSING", "SUSPECT"] = Field(description="Comparison status")
     explanation: str = Field(description="Brief explanation of why this status was assigned")
     details: Optional[str] = Field(default=None, description="Additional details if needed")
+    equivalent_to: Optional[List[str]] = Field(default=None, description="bank_ids whose information for this field is semantically equivalent to this bank's")
 
 
 class ComparisonRow(BaseModel):
@@ -80,3 +231,5 @@ class BankComparisonRequest(BaseModel):
 class BankComparisonResponse(BaseModel):
     comparison_table: List[ComparisonRow] = Field(description="Comparison results organized by field")
     summary: List[SummaryCount] = Field(description="Summary counts of SAME/DIFF/MISSING/SUSPECT across all comparisons")
+    # Also the model's response schema, so the timing is hidden from it
+    timing: SkipJsonSchema[Optional[ProcessingTiming]] = Field(default=None, description="Stage timings (only when requested with ?timings=true)")
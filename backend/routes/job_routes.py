@@ -0,0 +1,145 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import List, Optional
+import asyncio
+import os
+import logging
+
+from models import PDFProcessResult, JobCreatedResponse, JobFileStatus, JobStatusResponse
+from routes import pdf_routes
+from services.jobs import JobQueue, run_job_worker
+from services.uploads import BatchBudget, SpooledPDF, UploadRejectedError, spool_upload
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Number of background workers started inside this process (0 = API only,
+# leaving extraction to `python worker.py` processes sharing the same queue)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+
+job_queue = JobQueue(
+    path=os.getenv("JOB_QUEUE_PATH", "cache/jobs.sqlite3"),
+    spool_dir=os.getenv("JOB_SPOOL_DIR", "cache/job_spool"),
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "600")),
+)
+
+# Share of the lease a job file's extraction may use; the rest covers reading,
+# storing and completing the file, so a running file is never claimed twice
+JOB_DEADLINE_LEASE_FRACTION = 0.8
+
+# Wakes idle in-process workers when a job is submitted (created per event loop)
+_job_wakeup: Optional[asyncio.Event] = None
+_worker_tasks: List[asyncio.Task] = []
+
+
+def job_deadline_seconds() -> float:
+    """Time budget for one job file's extraction, safely below the queue lease"""
+    return min(pdf_routes.EXTRACTION_DEADLINE_SECONDS, job_queue.lease_seconds * JOB_DEADLINE_LEASE_FRACTION)
+
+
+async def process_spooled_file(filename: str, spool_path: str) -> str:
+    """Extract one spooled job file and return the serialized PDFProcessResult"""
+    try:
+        # The queue owns the spool file and removes it once the result is stored
+        pdf = SpooledPDF.from_path(spool_path)
+        result = await pdf_routes.process_pdf_with_retry(pdf, filename, deadline_seconds=job_deadline_seconds())
+    except Exception as e:
+        result = PDFProcessResult(
+            filename=filename,
+            status="failed",
+            error_message=f"Error reading file: {str(e)}"
+        )
+    return result.model_dump_json()
+
+
+async def start_job_workers(count: Optional[int] = None) -> None:
+    """Start background job workers in the running event loop"""
+    global _job_wakeup
+    count = JOB_WORKERS if count is None else count
+    _job_wakeup = asyncio.Event()
+    for _ in range(count):
+        _worker_tasks.append(asyncio.create_task(
+            run_job_worker(job_queue, process_spooled_file, _job_wakeup, poll_interval=JOB_POLL_INTERVAL)
+        ))
+    if count:
+        logger.info(f"Started {count} job workers")
+
+
+async def stop_job_workers() -> None:
+    """Cancel background job workers; unfinished files are re-queued when their lease expires"""
+    for task in _worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+    _worker_tasks.clear()
+
+
+@router.post("/jobs", response_model=JobCreatedResponse, status_code=202)
+async def create_job(files: List[UploadFile] = File(...)):
+    """
+    Queue PDF files for background extraction and return a job id to poll.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    pdf_routes.check_batch_size(files)
+
+    budget = BatchBudget(pdf_routes.MAX_BATCH_UPLOAD_BYTES)
+    job_files = []
+    for file in files:
+        try:
+            pdf = await spool_upload(file, pdf_routes.MAX_UPLOAD_BYTES, budget, pdf_routes.UPLOAD_SPOOL_DIR)
+        except UploadRejectedError as e:
+            rejected = PDFProcessResult(
+                filename=file.filename,
+                status="failed",
+                error_message=str(e)
+            )
+            job_files.append((file.filename, None, rejected.model_dump_json()))
+            continue
+        job_files.append((file.filename, pdf.path, None))
+
+    job_id = await asyncio.to_thread(job_queue.create_job, job_files)
+    if _job_wakeup is not None:
+        _job_wakeup.set()
+    logger.info(f"Queued job {job_id} with {len(job_files)} files")
+
+    return JobCreatedResponse(job_id=job_id, total_files=len(job_files))
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """
+    Report a job's progress along with the results of files finished so far.
+    """
+    rows = await asyncio.to_thread(job_queue.get_job, job_id)
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    files = [
+        JobFileStatus(
+            index=row["index"],
+            filename=row["filename"],
+            status=row["status"],
+            result=PDFProcessResult.model_validate_json(row["result"]) if row["result"] else None
+        )
+        for row in rows
+    ]
+    done = [f for f in files if f.status == "done"]
+    successful = sum(1 for f in done if f.result.status == "success")
+
+    if len(done) == len(files):
+        status = "completed"
+    elif all(f.status == "queued" for f in files):
+        status = "queued"
+    else:
+        status = "running"
+
+    return JobStatusResponse(
+        job_id=job_id,
+        status=status,
+        total_files=len(files),
+        completed_files=len(done),
+        successful=successful,
+        failed=len(done) - successful,
+        files=files
+    )
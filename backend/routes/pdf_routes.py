@@ -1,163 +1,506 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Annotated, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 import asyncio
-import time
+import hashlib
 import os
 import logging
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
+import time
 
-from models import BankInfo, PDFProcessResult, ProcessPDFsResponse, BankComparisonRequest, BankComparisonResponse, ComparisonRow, ComparisonCell
-from config.fields import get_field_config, get_field_keys, get_field_descriptions
+from models import BankInfo, PDFProcessResult, RevisionResult, ProcessPDFsResponse, PDFProcessResultFrame, ProcessPDFsSummaryFrame, BankComparisonRequest, BankComparisonResponse, BankComparisonCell, ComparisonRow, ComparisonCell, ComparisonInput
+from config.fields import get_field_config_fingerprint, get_field_keys
+from services.cache import LRUCache, SQLiteCache, make_cache_key
+from services.cascade import merge_escalation, plan_escalation
+from services.comparison_cache import ComparisonCache
+from services.comparison_rules import assemble_table, precompare, summarize
+from services.deadlines import DeadlineExceededError, can_fit, deadline_scope, remaining_seconds
+from services.evidence import EvidenceIndex, verify_bank_info
+from services.field_groups import merge_field_groups, split_field_groups
+from services.hedging import get_latency_tracker
+from services.model_client import genai_types_async, model_client
+from services.metrics import CACHE_LOOKUPS, EXTRACTION_ESCALATIONS, MODEL_ATTEMPTS, MODEL_HEDGES, MODEL_CALL_SECONDS, PDF_SIZE_BYTES, Timings, record_token_usage
+from services.page_pruning import has_text_layer, prune_pages
+from services.pdf_text import read_page_texts
+from services.policy_store import PolicyStore
+from services.prompts import COMPARISON_PROMPT_VERSION, EXTRACTION_PROMPT_VERSION, build_extraction_prompt, build_comparison_prompt, canonical_json, build_field_extraction_prompt, build_page_text_document
+from services.rate_limiter import get_rate_limiter, model_max_concurrency
+from services.revisions import apply_revision, field_changelog, page_fingerprints, plan_revision, revisable_fields, revision_schema
+from services.retry import MalformedResponseError, ModelTimeoutError, backoff_delay, is_retryable_error, is_throttle_error, retry_after_seconds
+from services.single_flight import SingleFlight
+from services.uploads import BatchBudget, SpooledPDF, UploadRejectedError, spool_upload
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
 router = APIRouter()
 
-# Gemini API configuration
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY environment variable is required")
+# Models used for each task
+EXTRACTION_MODEL = "gemini-2.5-pro"
+COMPARISON_MODEL = "gemini-2.5-flash"
 
-client = genai.Client(api_key=GEMINI_API_KEY)
+# Extraction cascade: every document is first extracted by the fast model and
+# only weak fields (missing, without evidence, failing local checks, or
+# configured with "cascade": false) are re-extracted by EXTRACTION_MODEL
+EXTRACTION_CASCADE_ENABLED = os.getenv("EXTRACTION_CASCADE_ENABLED", "false").lower() == "true"
+EXTRACTION_FAST_MODEL = "gemini-2.5-flash"
 
-# Retry mechanism with exponential backoff
-async def process_pdf_with_retry(pdf_content: bytes, filename: str, max_retries: int = 3) -> PDFProcessResult:
-    logger.info(f"Processing {filename} ({len(pdf_content)} bytes)")
+# Split each extraction into this many concurrent calls, each extracting one
+# group of fields from the same document part (1 = one call for all fields)
+EXTRACTION_FIELD_GROUPS = max(1, int(os.getenv("EXTRACTION_FIELD_GROUPS", "1")))
+
+# Maximum number of files extracted concurrently within one /process-pdfs batch
+MAX_CONCURRENT_EXTRACTIONS = int(os.getenv("MAX_CONCURRENT_EXTRACTIONS", "5"))
+
+# Undecided comparison fields sent to the model per concurrent call
+COMPARISON_FIELDS_PER_SHARD = max(1, int(os.getenv("COMPARISON_FIELDS_PER_SHARD", "1")))
+
+# Upload limits; PDFs above PDF_INLINE_MAX_BYTES are sent to the model as a
+# Files API reference instead of inline bytes
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+PDF_INLINE_MAX_BYTES = int(os.getenv("PDF_INLINE_MAX_BYTES", str(8 * 1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+# Send only the text of pages relevant to the configured fields when the PDF
+# has a usable text layer (see services/page_pruning.py for the thresholds)
+PAGE_PRUNING_ENABLED = os.getenv("PAGE_PRUNING_ENABLED", "true").lower() == "true"
+
+# Check each extracted evidence snippet against the PDF text layer
+EVIDENCE_VERIFICATION_ENABLED = os.getenv("EVIDENCE_VERIFICATION_ENABLED", "true").lower() == "true"
+
+# Encode large responses with pydantic-core in one pass instead of FastAPI's
+# validate-then-encode round trip (same JSON body)
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+# Concurrent requests for the same document (or the same comparison) wait on
+# one in-flight model call instead of starting their own
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+extraction_flights: SingleFlight[PDFProcessResult] = SingleFlight("extraction")
+comparison_flights: SingleFlight[BankComparisonResponse] = SingleFlight("comparison")
+
+# Time limits: per model call, and per request (each file's extraction, or one
+# comparison); 0 disables a limit. Retries stop once the remaining budget
+# cannot fit another attempt
+MODEL_CALL_TIMEOUT_SECONDS = float(os.getenv("MODEL_CALL_TIMEOUT_SECONDS", "300"))
+EXTRACTION_DEADLINE_SECONDS = float(os.getenv("EXTRACTION_DEADLINE_SECONDS", "900"))
+COMPARISON_DEADLINE_SECONDS = float(os.getenv("COMPARISON_DEADLINE_SECONDS", "180"))
+
+# Dedicated thread pool for the blocking Gemini SDK calls so the event loop
+# keeps serving other requests (health checks included) while models run. By
+# default there is a thread for every slot of every model's limiter window
+# (hedges and abandoned calls hold a slot too), so a call holding a slot never
+# waits for a thread
+MODEL_CALL_WORKERS = int(os.getenv("MODEL_CALL_WORKERS", "0")) or sum(
+    model_max_concurrency(model) for model in {EXTRACTION_MODEL, EXTRACTION_FAST_MODEL, COMPARISON_MODEL}
+)
+model_executor = ThreadPoolExecutor(max_workers=MODEL_CALL_WORKERS, thread_name_prefix="gemini")
+# Files API uploads and deletes have their own threads, so they never delay model calls
+FILE_API_WORKERS = int(os.getenv("FILE_API_WORKERS", "8"))
+file_executor = ThreadPoolExecutor(max_workers=FILE_API_WORKERS, thread_name_prefix="gemini-files")
+
+
+async def generate_content(**kwargs):
+    """
+    Run client.models.generate_content on the model executor without blocking the event loop.
     
-    for attempt in range(max_retries):
+    Calls go through the model's shared rate limiter, which adapts its
+    concurrency to throttling errors reported by the provider. Each call is
+    limited to MODEL_CALL_TIMEOUT_SECONDS and the current request deadline.
+    With hedging enabled, a duplicate call is sent once the first one has
+    taken longer than the model's recent latency percentile; whichever
+    answers first wins. The other is no longer awaited, but the blocking SDK
+    call cannot be interrupted: it keeps its executor thread and limiter slot
+    until it returns or hits its HTTP timeout.
+    """
+    model = kwargs["model"]
+    hedge_delay = get_latency_tracker(model).hedge_delay()
+    if hedge_delay is None:
+        return await _generate_content_once(**kwargs)
+    
+    primary = asyncio.ensure_future(_generate_content_once(**kwargs))
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+        if done or not can_fit(0):
+            return await primary
+        
+        logger.info(f"Hedging a {model} call outstanding for more than {hedge_delay:.1f}s")
+        hedge = asyncio.ensure_future(_generate_content_once(**kwargs))
+        pending.add(hedge)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    MODEL_HEDGES.inc(model=model, winner="primary" if task is primary else "hedge")
+                    return task.result()
+                error = error or task.exception()
+        MODEL_HEDGES.inc(model=model, winner="none")
+        raise error
+    finally:
+        # Stop waiting on the losing request (or both, if the caller gave up)
+        for task in pending:
+            task.cancel()
+
+
+async def _generate_content_once(**kwargs):
+    """One rate-limited model call with a time limit"""
+    client = await model_client.get_async()
+    model = kwargs["model"]
+    limiter = get_rate_limiter(model)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    await limiter.acquire()
+    started_at = time.monotonic()
+    call = None
+    try:
+        # The limit is set once the slot is held, so time spent queueing counts against the deadline
+        timeout = call_timeout_seconds()
+        if timeout is not None and timeout <= 0:
+            raise DeadlineExceededError(f"Request deadline passed before calling {model}")
+        if timeout is not None:
+            # The SDK gives up on the HTTP request at the same limit, which bounds how long
+            # an abandoned call keeps its executor thread
+            config = kwargs.get("config") or {}
+            if isinstance(config, dict):
+                kwargs["config"] = {**config, "http_options": {"timeout": int(timeout * 1000)}}
+        call = loop.run_in_executor(model_executor, partial(client.models.generate_content, **kwargs))
         try:
-            # Create the comprehensive prompt for structured output
-            prompt = f"""
-            Analyze this bank policy document (filename: {filename}) and extract the following information with evidence.
-
-            **DOCUMENT VALIDATION (CRITICAL - ANALYZE FIRST):**
-            Before extracting any information, determine if this is a valid home loan MITC (Most Important Terms and Conditions) document:
-            - Check if it contains home loan/housing loan related terms
-            - Look for typical MITC sections like fees, charges, prepayment, LTV, eligibility, tenure
-            - Verify it's an official bank policy document (not marketing material, application forms, or unrelated documents)
-            - If invalid, set is_valid_home_loan_mitc=false and provide validation_reason explaining why
-
-            **NORMALIZATION RULES (CRITICAL - APPLY TO ALL EXTRACTED CONTENT):**
-            When extracting and summarizing information, normalize units, currency, and terminology:
-
-            **Currency & Units:**
-            - Convert ₹/Rs/Rs./Rupees → "INR"
-            - Convert L/Lac/Lakh → "Lakh" (standardize to "Lakh")
-            - Convert Cr/Crore → "Crore" (standardize to "Crore")
-            - Keep percentages as % but ensure consistent format (e.g., "2.5%" not "2.5 percent")
-            - Standardize amounts: "INR 5 Lakh", "INR 2.5 Crore", "0.5%"
-
-            **Terminology Standardization:**
-            - Credit score/CIBIL score/Credit rating → "Credit Score"
-            - Pre-closure/Foreclosure/Early closure/Prepayment → "Prepayment"
-            - Tenure/Term/Loan period/Repayment period → "Tenure"
-            - Processing fee/Administrative fee/Handling charges → "Processing Fee"
-            - Part payment/Partial prepayment → "Partial Prepayment"
-            - ROI/Interest rate/Rate of interest → "Interest Rate"
-            - EMI/Installment/Monthly payment → "EMI"
-            - Loan amount/Principal/Loan quantum → "Loan Amount"
-            - Income proof/Salary certificate/Income documents → "Income Proof"
-
-            **Format Consistency:**
-            - Use consistent date formats when mentioning policy dates
-            - Standardize ranges: "INR 25 Lakh to INR 5 Crore" (not "25L-5Cr")
-            - Use standard percentage format: "up to 80% LTV" (not "upto 80 percent LTV")
-            - Standardize tenure format: "up to 30 years" (not "upto 30 yrs")
-
-            **CHAIN OF THOUGHT APPROACH:**
-            For each field below, follow this reasoning:
-            1. First, search thoroughly through the document for relevant information
-            2. If you find relevant information: set missing=false, provide normalized content and evidence
-            3. If you don't find information: set missing=true, leave content and evidence as null/empty
-            4. ALWAYS apply normalization rules to the content field before finalizing
-
-            **FIELDS TO EXTRACT:**
-
-            1. **Bank Name**: Extract the short form name (e.g., ICICI, HDFC, SBI, DBS, AXIS, etc.)
-            
-            2. **Document Validation**: 
-               - is_valid_home_loan_mitc: true/false based on whether this is a valid home loan MITC document
-               - validation_reason: explanation if invalid (e.g., "This appears to be a credit card terms document", "This is a marketing brochure, not MITC", "Document is not related to home loans")
-            
-            3. **Policy Dates (CRITICAL - LOOK FOR THESE FIRST)**: 
-               Search for policy dates in this priority order:
-               - effective_date: Look for "effective from", "effective date", "comes into effect", "applicable from", "valid from"
-               - updated_date: Look for "updated on", "revised on", "modified on", "last updated", "version date"
-               - Convert dates to ISO format: YYYY-MM-DD (assume Asia/Kolkata timezone)
-               - date_source: Indicate which date was found ("effective_date", "updated_date", or "not_found")
-               - Examples: "15th March 2024" → "2024-03-15", "1st April 2025" → "2025-04-01"
-               - If multiple dates found, prefer effective_date over updated_date
-            
-            """
-            
-            # Generate dynamic field instructions
-            field_config = get_field_config()
-            field_instructions = ""
-            field_number = 4
-            for field_key, field_info in field_config.items():
-                field_instructions += f"""
-            {field_number}. **{field_info['display_name']}**: {field_info['description']}"""
-                field_number += 1
-            
-            prompt += field_instructions + """
-
-            **RESPONSE FORMAT:**
-            For each field:
-            - **missing**: boolean (true if not found, false if found)
-            - **content**: string (only if missing=false) - Brief explanation/summary of what was found
-            - **evidence**: array (only if missing=false) - List of supporting evidence with page numbers and exact text snippets
-
-            **LOGIC:**
-            - If missing=true: content and evidence should be null/empty
-            - If missing=false: content and evidence must be provided with actual findings
-            """
-            
-            # Process PDF with Gemini using structured output
-            response = client.models.generate_content(
-                model="gemini-2.5-pro",
-                contents=[
-                    types.Part.from_bytes(
-                        data=pdf_content,
-                        mime_type='application/pdf',
-                    ),
-                    prompt
-                ],
-                config={
-                    "response_mime_type": "application/json",
-                    "response_schema": BankInfo,
-                }
-            )
-            
-            # Use the parsed response directly
-            bank_info: BankInfo = response.parsed
-            logger.info(f"✓ Extracted data for {bank_info.bank_name} from {filename}")
-            
-            return PDFProcessResult(
-                filename=filename,
-                status="success",
-                bank_info=bank_info
-            )
-                
+            response = await asyncio.wait_for(asyncio.shield(call), timeout)
+        except asyncio.TimeoutError:
+            MODEL_CALL_SECONDS.observe(time.perf_counter() - start, model=model, outcome="timeout")
+            raise ModelTimeoutError(f"{model} call did not answer within {timeout:.1f}s")
         except Exception as e:
-            if attempt == max_retries - 1:
-                # Last attempt failed
-                logger.error(f"✗ Failed to process {filename}: {str(e)}")
+            if is_throttle_error(e):
+                await limiter.record_throttle(retry_after_seconds(e), started_at)
+                MODEL_CALL_SECONDS.observe(time.perf_counter() - start, model=model, outcome="throttled")
+            else:
+                MODEL_CALL_SECONDS.observe(time.perf_counter() - start, model=model, outcome="error")
+            raise
+    finally:
+        if call is None or call.done():
+            limiter.release()
+        else:
+            # A timed-out or abandoned call is still running (and billed), so it holds its slot until it returns
+            call.add_done_callback(partial(_release_when_done, limiter))
+    limiter.record_success()
+    MODEL_CALL_SECONDS.observe(time.perf_counter() - start, model=model, outcome="success")
+    # Model latency only: time spent waiting for the limiter would inflate hedge delays and retry estimates
+    get_latency_tracker(model).observe(time.monotonic() - started_at)
+    record_token_usage(model, response)
+    return response
+
+
+def _release_when_done(limiter, call: asyncio.Future) -> None:
+    limiter.release()
+    # Nobody awaits an abandoned call, so its error is only retrieved here
+    if not call.cancelled():
+        call.exception()
+
+
+def call_timeout_seconds() -> Optional[float]:
+    """Time limit for a model call starting now: MODEL_CALL_TIMEOUT_SECONDS, cut to the remaining request deadline"""
+    remaining = remaining_seconds()
+    limits = [limit for limit in (MODEL_CALL_TIMEOUT_SECONDS or None, remaining) if limit is not None]
+    return min(limits) if limits else None
+
+
+def retry_fits(model: str, wait_time: float) -> bool:
+    """True if backing off wait_time and making another typical call of this model still fits the request deadline"""
+    typical = get_latency_tracker(model).percentile(50) or 0.0
+    return can_fit(wait_time + typical)
+
+
+# Content-addressed cache of successful extractions, keyed on the PDF bytes,
+# model, field configuration and prompt version
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+extraction_cache = SQLiteCache(
+    path=os.getenv("EXTRACTION_CACHE_PATH", "cache/extraction_cache.sqlite3"),
+    max_entries=int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "1000")),
+    ttl_seconds=float(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+)
+
+
+# Per-field verdicts from earlier comparisons, keyed on normalized content hashes;
+# kept in a bounded in-memory LRU and written through to disk unless the path is empty
+COMPARISON_CACHE_ENABLED = os.getenv("COMPARISON_CACHE_ENABLED", "true").lower() == "true"
+COMPARISON_CACHE_PATH = os.getenv("COMPARISON_CACHE_PATH", "cache/comparison_cache.sqlite3")
+COMPARISON_CACHE_MAX_ENTRIES = int(os.getenv("COMPARISON_CACHE_MAX_ENTRIES", "10000"))
+comparison_cache = ComparisonCache(
+    LRUCache(
+        max_entries=COMPARISON_CACHE_MAX_ENTRIES,
+        backing=SQLiteCache(COMPARISON_CACHE_PATH, max_entries=COMPARISON_CACHE_MAX_ENTRIES * 10) if COMPARISON_CACHE_PATH else None,
+    ),
+    model=COMPARISON_MODEL,
+    prompt_version=COMPARISON_PROMPT_VERSION,
+)
+
+
+# Every successful extraction is kept server-side so comparisons can refer to it by id
+POLICY_STORE_ENABLED = os.getenv("POLICY_STORE_ENABLED", "true").lower() == "true"
+policy_store = PolicyStore(os.getenv("POLICY_STORE_PATH", "cache/policies.sqlite3"))
+
+
+def store_policy(
+    bank_info: BankInfo,
+    pdf_sha256: str,
+    filename: str,
+    page_texts: Optional[List[str]] = None,
+) -> Optional[str]:
+    """
+    Save an extraction to the policy store and return its id (a store failure only loses the id).
+
+    Page fingerprints are recorded when the document has a text layer, so a
+    later revision of it can be re-extracted incrementally.
+    """
+    if not POLICY_STORE_ENABLED:
+        return None
+    fingerprints = page_fingerprints(page_texts) if page_texts and has_text_layer(page_texts) else None
+    try:
+        return policy_store.save(bank_info, pdf_sha256, filename, fingerprints)
+    except Exception as e:
+        logger.warning(f"Could not store policy from {filename}: {str(e)}")
+        return None
+
+
+def extraction_pipeline() -> str:
+    """The models and extraction mode that produce an extraction, as used in its cache key"""
+    pipeline = f"{EXTRACTION_FAST_MODEL}>{EXTRACTION_MODEL}" if EXTRACTION_CASCADE_ENABLED else EXTRACTION_MODEL
+    if EXTRACTION_FIELD_GROUPS > 1:
+        pipeline += f"/groups={EXTRACTION_FIELD_GROUPS}"
+    return pipeline
+
+
+def extraction_cache_key(pdf_sha256: str) -> str:
+    """Cache key for an extraction of this PDF under the current model, fields and prompt"""
+    return make_cache_key(
+        pdf_sha256,
+        extraction_pipeline(),
+        get_field_config_fingerprint(),
+        EXTRACTION_PROMPT_VERSION,
+    )
+
+
+async def build_pdf_part(pdf: SpooledPDF, filename: str, reused: bool = False):
+    """
+    Build the document part for a spooled PDF and return it with the name of any uploaded file.
+    
+    Small PDFs are sent inline; larger ones are uploaded once through the
+    Files API (streamed from disk) and referenced by URI, so the PDF bytes are
+    never held in memory for the whole model call. A part reused by several
+    concurrent calls is always uploaded, so the bytes are sent only once.
+    """
+    types = await genai_types_async()
+    
+    if pdf.size <= PDF_INLINE_MAX_BYTES and not reused:
+        data = await asyncio.to_thread(pdf.read_bytes)
+        return types.Part.from_bytes(data=data, mime_type='application/pdf'), None
+    
+    client = await model_client.get_async()
+    loop = asyncio.get_running_loop()
+    uploaded = await loop.run_in_executor(
+        file_executor,
+        partial(client.files.upload, file=pdf.path, config={"mime_type": "application/pdf", "display_name": filename})
+    )
+    return types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type or 'application/pdf'), uploaded.name
+
+
+async def delete_uploaded_file(name: str) -> None:
+    """Best-effort removal of a Files API upload (uploads also expire on their own)"""
+    try:
+        client = await model_client.get_async()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(file_executor, partial(client.files.delete, name=name))
+    except Exception as e:
+        logger.warning(f"Could not delete uploaded file {name}: {str(e)}")
+
+
+# Retry mechanism with exponential backoff
+async def process_pdf_with_retry(
+    pdf_content: Union[bytes, SpooledPDF],
+    filename: str,
+    max_retries: int = 3,
+    timings: Optional[Timings] = None,
+    deadline_seconds: Optional[float] = None,
+) -> PDFProcessResult:
+    # Callers that report timings pass their own spans; otherwise the extraction is timed here
+    owns_timings = timings is None
+    if owns_timings:
+        timings = Timings("extraction")
+    
+    if isinstance(pdf_content, SpooledPDF):
+        pdf_size = pdf_content.size
+        with timings.span("hash_pdf"):
+            pdf_sha256 = await asyncio.to_thread(lambda: pdf_content.sha256)
+    else:
+        pdf_size = len(pdf_content)
+        pdf_sha256 = hashlib.sha256(pdf_content).hexdigest()
+    PDF_SIZE_BYTES.observe(pdf_size)
+    logger.info(f"Processing {filename} ({pdf_size} bytes)")
+    
+    try:
+        cache_key = None
+        if EXTRACTION_CACHE_ENABLED:
+            with timings.span("cache_lookup"):
+                cache_key = extraction_cache_key(pdf_sha256)
+                cached = await asyncio.to_thread(extraction_cache.get, cache_key)
+            CACHE_LOOKUPS.inc(cache="extraction", result="miss" if cached is None else "hit")
+            if cached is not None:
+                bank_info = BankInfo.model_validate_json(cached)
+                logger.info(f"✓ Cache hit for {bank_info.bank_name} from {filename}")
                 return PDFProcessResult(
                     filename=filename,
-                    status="failed",
-                    error_message=f"Failed after {max_retries} attempts: {str(e)}"
+                    status="success",
+                    bank_info=bank_info,
+                    cached=True,
+                    policy_id=await asyncio.to_thread(store_policy, bank_info, pdf_sha256, filename)
                 )
+        
+        extract = partial(extract_pdf, pdf_content, filename, pdf_sha256, cache_key, max_retries, timings)
+        with deadline_scope(deadline_seconds or EXTRACTION_DEADLINE_SECONDS):
+            if not SINGLE_FLIGHT_ENABLED:
+                return await extract()
             
-            # Wait before retry with exponential backoff
-            wait_time = (2 ** attempt) + (time.time() % 1)
-            await asyncio.sleep(wait_time)
+            # Identical documents uploaded at the same time share one extraction
+            if isinstance(pdf_content, SpooledPDF):
+                extract = partial(extract_retaining_spool, pdf_content, extract)
+            result, shared = await extraction_flights.run(extraction_cache_key(pdf_sha256), extract)
+        if shared:
+            logger.info(f"✓ {filename} shared an in-flight extraction of the same document")
+            return result.model_copy(update={"filename": filename, "timing": None})
+        return result
+    finally:
+        if owns_timings:
+            timings.finish()
+
+
+async def extract_retaining_spool(pdf: SpooledPDF, extract: Callable[[], Awaitable[PDFProcessResult]]) -> PDFProcessResult:
+    """Run a shared extraction that keeps the spool file until it finishes, even if the request that spooled it ends first"""
+    pdf.retain()
+    try:
+        return await extract()
+    finally:
+        pdf.release()
+
+
+async def extract_pdf(
+    pdf_content: Union[bytes, SpooledPDF],
+    filename: str,
+    pdf_sha256: str,
+    cache_key: Optional[str],
+    max_retries: int,
+    timings: Timings,
+) -> PDFProcessResult:
+    """Extract a document that missed the cache, retrying transient model failures"""
+    types = await genai_types_async()
+    
+    pdf_part = None
+    uploaded_name = None
+    try:
+        # Only the filename slot varies; the rest of the prompt is precompiled
+        with timings.span("build_prompt"):
+            prompt = build_extraction_prompt(filename)
+        
+        # Fields extracted in concurrent groups, when enabled; groups that
+        # succeeded are kept across retries
+        groups = split_field_groups(revisable_fields(), EXTRACTION_FIELD_GROUPS)
+        group_results = {}
+        
+        # The document part is built once and reused across retries
+        evidence_index = None
+        page_texts = None
+        if PAGE_PRUNING_ENABLED or EVIDENCE_VERIFICATION_ENABLED:
+            # The text layer is read once and shared by page pruning and evidence checks
+            with timings.span("read_text_layer"):
+                page_texts = await asyncio.to_thread(
+                    read_page_texts, pdf_content.path if isinstance(pdf_content, SpooledPDF) else pdf_content
+                )
+            if page_texts and any(text.strip() for text in page_texts):
+                if EVIDENCE_VERIFICATION_ENABLED:
+                    with timings.span("build_evidence_index"):
+                        evidence_index = await asyncio.to_thread(EvidenceIndex, page_texts)
+                with timings.span("prune_pages"):
+                    pages = prune_pages(page_texts) if PAGE_PRUNING_ENABLED else None
+                if pages is not None:
+                    logger.info(f"Sending {len(pages)} of {len(page_texts)} pages of {filename} as text")
+                    pdf_part = types.Part.from_text(text=build_page_text_document(filename, pages, len(page_texts)))
+        
+        model = EXTRACTION_FAST_MODEL if EXTRACTION_CASCADE_ENABLED else EXTRACTION_MODEL
+        for attempt in range(max_retries):
+            timings.attempts = attempt + 1
+            try:
+                if pdf_part is None:
+                    with timings.span("build_document"):
+                        if isinstance(pdf_content, SpooledPDF):
+                            pdf_part, uploaded_name = await build_pdf_part(pdf_content, filename, reused=len(groups) > 1)
+                        else:
+                            pdf_part = types.Part.from_bytes(data=pdf_content, mime_type='application/pdf')
+                
+                # Process PDF with Gemini using structured output
+                with timings.span("model_call"):
+                    if len(groups) > 1:
+                        bank_info = await extract_field_groups(pdf_part, filename, model, groups, group_results)
+                    else:
+                        response = await generate_content(
+                            model=model,
+                            contents=[pdf_part, prompt],
+                            config={
+                                "response_mime_type": "application/json",
+                                "response_schema": BankInfo,
+                            }
+                        )
+                        # Use the parsed response directly
+                        bank_info = response.parsed
+                
+                if not isinstance(bank_info, BankInfo):
+                    raise MalformedResponseError("Model response could not be parsed as BankInfo")
+                logger.info(f"✓ Extracted data for {bank_info.bank_name} from {filename}")
+                MODEL_ATTEMPTS.observe(attempt + 1, operation="extraction", outcome="success")
+                
+                if evidence_index is not None:
+                    with timings.span("verify_evidence"):
+                        outcomes = verify_bank_info(bank_info, evidence_index)
+                    if outcomes["corrected"] or outcomes["unverified"]:
+                        logger.warning(f"Evidence check for {filename}: {dict(outcomes)}")
+                
+                field_models = None
+                if EXTRACTION_CASCADE_ENABLED:
+                    bank_info, field_models = await escalate_weak_fields(bank_info, pdf_part, filename, evidence_index, timings)
+                
+                with timings.span("cache_store"):
+                    if cache_key is not None:
+                        await asyncio.to_thread(extraction_cache.set, cache_key, bank_info.model_dump_json())
+                    policy_id = await asyncio.to_thread(store_policy, bank_info, pdf_sha256, filename, page_texts)
+                
+                return PDFProcessResult(
+                    filename=filename,
+                    status="success",
+                    bank_info=bank_info,
+                    policy_id=policy_id,
+                    field_models=field_models
+                )
+                    
+            except Exception as e:
+                # Wait before retry with jittered exponential backoff, honouring retry-after hints
+                wait_time = backoff_delay(attempt, retry_after_seconds(e))
+                if attempt == max_retries - 1 or not is_retryable_error(e) or not retry_fits(model, wait_time):
+                    # Last attempt failed, retrying cannot help (bad request, auth, ...) or the deadline is too close
+                    logger.error(f"✗ Failed to process {filename}: {str(e)}")
+                    MODEL_ATTEMPTS.observe(attempt + 1, operation="extraction", outcome="failed")
+                    return PDFProcessResult(
+                        filename=filename,
+                        status="failed",
+                        error_message=f"Failed after {attempt + 1} attempts: {str(e)}"
+                    )
+                
+                with timings.span("backoff_sleep"):
+                    await asyncio.sleep(wait_time)
+    finally:
+        if uploaded_name is not None:
+            with timings.span("delete_upload"):
+                await delete_uploaded_file(uploaded_name)
     
     return PDFProcessResult(
         filename=filename,
@@ -165,8 +508,285 @@ async def process_pdf_with_retry(pdf_content: bytes, filename: str, max_retries:
         error_message="Max retries exceeded"
     )
 
+async def process_upload(
+    filename: str,
+    open_pdf: Callable[[], Awaitable[SpooledPDF]],
+    semaphore: asyncio.Semaphore,
+    include_timings: bool = False,
+    deadline_seconds: Optional[float] = None,
+) -> PDFProcessResult:
+    """Spool, validate and extract one uploaded file, never raising for per-file failures"""
+    timings = Timings("extraction")
+    result = await _process_upload(filename, open_pdf, semaphore, timings, deadline_seconds)
+    timing = timings.finish()
+    if include_timings:
+        result.timing = timing
+    return result
+
+
+async def _process_upload(
+    filename: str,
+    open_pdf: Callable[[], Awaitable[SpooledPDF]],
+    semaphore: asyncio.Semaphore,
+    timings: Timings,
+    deadline_seconds: Optional[float] = None,
+) -> PDFProcessResult:
+    with timings.span("queue_wait"):
+        await semaphore.acquire()
+    try:
+        try:
+            # Spool the upload to disk (checks PDF magic bytes and size limits)
+            with timings.span("read_upload"):
+                pdf = await open_pdf()
+        except UploadRejectedError as e:
+            return PDFProcessResult(
+                filename=filename,
+                status="failed",
+                error_message=str(e)
+            )
+        except Exception as e:
+            return PDFProcessResult(
+                filename=filename,
+                status="failed",
+                error_message=f"Error reading file: {str(e)}"
+            )
+        
+        try:
+            # Process PDF with retry mechanism
+            return await process_pdf_with_retry(pdf, filename, timings=timings, deadline_seconds=deadline_seconds)
+        finally:
+            pdf.cleanup()
+    finally:
+        semaphore.release()
+
+
+async def extract_fields_with_retry(
+    contents: list,
+    schema: type,
+    filename: str,
+    timings: Timings,
+    max_retries: int = 3,
+    operation: str = "revision",
+):
+    """Run one structured extraction call with retries and return the parsed response, raising once retries are exhausted"""
+    for attempt in range(max_retries):
+        timings.attempts = attempt + 1
+        try:
+            with timings.span("model_call"):
+                response = await generate_content(
+                    model=EXTRACTION_MODEL,
+                    contents=contents,
+                    config={
+                        "response_mime_type": "application/json",
+                        "response_schema": schema,
+                    }
+                )
+            if not isinstance(response.parsed, schema):
+                raise MalformedResponseError(f"Model response could not be parsed as {schema.__name__}")
+            MODEL_ATTEMPTS.observe(attempt + 1, operation=operation, outcome="success")
+            return response.parsed
+        except Exception as e:
+            wait_time = backoff_delay(attempt, retry_after_seconds(e))
+            if attempt == max_retries - 1 or not is_retryable_error(e) or not retry_fits(EXTRACTION_MODEL, wait_time):
+                logger.error(f"✗ Failed to extract fields from {filename}: {str(e)}")
+                MODEL_ATTEMPTS.observe(attempt + 1, operation=operation, outcome="failed")
+                raise
+            with timings.span("backoff_sleep"):
+                await asyncio.sleep(wait_time)
+
+
+async def extract_field_groups(
+    pdf_part,
+    filename: str,
+    model: str,
+    groups: List[List[str]],
+    group_results: Dict[int, BaseModel],
+) -> BankInfo:
+    """
+    Extract each group of fields in its own concurrent call and merge them into one BankInfo.
+    
+    Every call shares the same document part. Groups already in group_results
+    are skipped, so a retry repeats only the groups that failed; the first
+    failure is raised once the other groups have finished.
+    """
+    async def extract_group(index: int) -> None:
+        schema = revision_schema(tuple(groups[index]))
+        response = await generate_content(
+            model=model,
+            contents=[pdf_part, build_field_extraction_prompt(filename, groups[index])],
+            config={
+                "response_mime_type": "application/json",
+                "response_schema": schema,
+            }
+        )
+        if not isinstance(response.parsed, schema):
+            raise MalformedResponseError(f"Model response could not be parsed for fields {', '.join(groups[index])}")
+        group_results[index] = response.parsed
+    
+    pending = [index for index in range(len(groups)) if index not in group_results]
+    outcomes = await asyncio.gather(*(extract_group(index) for index in pending), return_exceptions=True)
+    failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    if failures:
+        logger.warning(f"{len(failures)} of {len(pending)} field groups of {filename} failed")
+        raise failures[0]
+    return merge_field_groups(groups, group_results)
+
+
+async def escalate_weak_fields(
+    bank_info: BankInfo,
+    pdf_part,
+    filename: str,
+    evidence_index: Optional[EvidenceIndex],
+    timings: Timings,
+) -> Tuple[BankInfo, Dict[str, str]]:
+    """
+    Re-extract the weak fields of a fast-model extraction with EXTRACTION_MODEL.
+    
+    The same document part (inline, page text or Files API upload) is reused
+    for the escalation call. Returns the merged extraction and the model that
+    produced each field; if the escalation fails, the fast model's fields are
+    kept.
+    """
+    field_models = {field_key: EXTRACTION_FAST_MODEL for field_key in revisable_fields()}
+    escalate = plan_escalation(bank_info)
+    if not escalate:
+        return bank_info, field_models
+    for reason in escalate.values():
+        EXTRACTION_ESCALATIONS.inc(reason=reason)
+    field_keys = list(escalate)
+    logger.info(f"Escalating {', '.join(field_keys)} of {filename} to {EXTRACTION_MODEL}")
+    
+    with timings.span("build_prompt"):
+        prompt = build_field_extraction_prompt(filename, field_keys)
+    # The extraction's own attempt count is what gets reported
+    attempts = timings.attempts
+    try:
+        escalated = await extract_fields_with_retry(
+            [pdf_part, prompt], revision_schema(tuple(field_keys)), filename, timings, operation="escalation"
+        )
+    except Exception as e:
+        logger.warning(f"Escalation of {filename} failed, keeping the fast model's fields: {str(e)}")
+        return bank_info, field_models
+    finally:
+        timings.attempts = attempts
+    
+    if evidence_index is not None:
+        with timings.span("verify_evidence"):
+            verify_bank_info(escalated, evidence_index)
+    field_models.update({field_key: EXTRACTION_MODEL for field_key in field_keys})
+    return merge_escalation(bank_info, escalated, field_keys), field_models
+
+
+async def process_revision(
+    pdf: SpooledPDF,
+    filename: str,
+    previous_policy_id: str,
+    previous: BankInfo,
+    timings: Timings,
+) -> RevisionResult:
+    """
+    Extract a revised version of a stored policy, re-reading only what changed.
+    
+    The revision's page texts are diffed against the previous version's page
+    fingerprints; only fields whose supporting pages changed are re-extracted
+    (from the text of the changed and supporting pages) and the rest are
+    carried forward. Revisions that cannot be diffed (no text layer, or no
+    fingerprints stored for the previous version) are extracted in full.
+    """
+    with timings.span("read_text_layer"):
+        page_texts = await asyncio.to_thread(read_page_texts, pdf.path)
+        previous_fingerprints = await asyncio.to_thread(policy_store.get_page_fingerprints, previous_policy_id)
+    
+    if not page_texts or not has_text_layer(page_texts) or previous_fingerprints is None:
+        logger.info(f"Revision {filename} cannot be diffed, extracting in full")
+        result = await process_pdf_with_retry(pdf, filename, timings=timings)
+        if result.status != "success":
+            return RevisionResult(filename=filename, status="failed", previous_policy_id=previous_policy_id, error_message=result.error_message)
+        return RevisionResult(
+            filename=filename,
+            status="success",
+            previous_policy_id=previous_policy_id,
+            policy_id=result.policy_id,
+            bank_info=result.bank_info,
+            changelog=field_changelog(previous, result.bank_info, carried_forward=[]),
+            total_pages=len(page_texts) if page_texts else None,
+            full_extraction=True
+        )
+    
+    with timings.span("diff_pages"):
+        plan = plan_revision(previous, previous_fingerprints, page_texts)
+    logger.info(
+        f"Revision {filename}: {len(plan.changed_pages)} of {len(page_texts)} pages changed, "
+        f"re-extracting {plan.reextract or 'no fields'}"
+    )
+    
+    extracted = None
+    if plan.needs_model:
+        types = await genai_types_async()
+
+        with timings.span("build_prompt"):
+            prompt = build_field_extraction_prompt(filename, plan.reextract)
+            document = build_page_text_document(
+                filename, [(number, page_texts[number - 1]) for number in plan.pages_to_send], len(page_texts)
+            )
+        try:
+            extracted = await extract_fields_with_retry(
+                [types.Part.from_text(text=document), prompt], revision_schema(tuple(plan.reextract)), filename, timings
+            )
+        except Exception as e:
+            return RevisionResult(
+                filename=filename,
+                status="failed",
+                previous_policy_id=previous_policy_id,
+                error_message=f"Failed after {timings.attempts} attempts: {str(e)}"
+            )
+    
+    bank_info = apply_revision(previous, plan, extracted)
+    if EVIDENCE_VERIFICATION_ENABLED:
+        with timings.span("verify_evidence"):
+            outcomes = verify_bank_info(bank_info, await asyncio.to_thread(EvidenceIndex, page_texts))
+        if outcomes["corrected"] or outcomes["unverified"]:
+            logger.warning(f"Evidence check for {filename}: {dict(outcomes)}")
+    
+    with timings.span("cache_store"):
+        policy_id = await asyncio.to_thread(lambda: store_policy(bank_info, pdf.sha256, filename, page_texts))
+    logger.info(f"✓ Revised {bank_info.bank_name} from {filename}")
+    
+    return RevisionResult(
+        filename=filename,
+        status="success",
+        previous_policy_id=previous_policy_id,
+        policy_id=policy_id,
+        bank_info=bank_info,
+        changelog=field_changelog(previous, bank_info, plan.carried_forward),
+        changed_pages=plan.changed_pages,
+        total_pages=len(page_texts)
+    )
+
+
+def json_response(model: BaseModel) -> Union[BaseModel, Response]:
+    """Return a response model as-is, or already encoded when FAST_JSON_RESPONSES is on"""
+    if not FAST_JSON_RESPONSES:
+        return model
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def check_batch_size(files: List[UploadFile]) -> None:
+    """Reject a batch up front when its declared size is over the limit"""
+    declared = sum(file.size or 0 for file in files)
+    if declared > MAX_BATCH_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds the {MAX_BATCH_UPLOAD_BYTES // (1024 * 1024)} MB upload limit"
+        )
+
+
 @router.post("/process-pdfs", response_model=ProcessPDFsResponse)
-async def process_pdfs(files: List[UploadFile] = File(...)):
+async def process_pdfs(
+    files: List[UploadFile] = File(...),
+    timings: Annotated[bool, Query(description="Include per-stage timings in each result")] = False,
+    deadline_seconds: Annotated[Optional[float], Query(gt=0, description="Time budget for each file's extraction once it starts (defaults to EXTRACTION_DEADLINE_SECONDS)")] = None,
+):
     """
     Process multiple PDF files and extract comprehensive bank policy information.
     """
@@ -174,47 +794,270 @@ async def process_pdfs(files: List[UploadFile] = File(...)):
     
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
+    check_batch_size(files)
     
-    results = []
+    # Bound how many files are spooled and sent to the model at the same time
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_EXTRACTIONS)
+    budget = BatchBudget(MAX_BATCH_UPLOAD_BYTES)
     
-    for file in files:
-        if not file.filename.lower().endswith('.pdf'):
-            results.append(PDFProcessResult(
-                filename=file.filename,
-                status="failed",
-                error_message="File is not a PDF"
-            ))
-            continue
-        
-        try:
-            # Read PDF content
-            pdf_content = await file.read()
-            
-            # Process PDF with retry mechanism
-            result = await process_pdf_with_retry(pdf_content, file.filename)
-            results.append(result)
-            
-        except Exception as e:
-            results.append(PDFProcessResult(
-                filename=file.filename,
-                status="failed",
-                error_message=f"Error reading file: {str(e)}"
-            ))
+    def opener(file: UploadFile) -> Callable[[], Awaitable[SpooledPDF]]:
+        return partial(spool_upload, file, MAX_UPLOAD_BYTES, budget, UPLOAD_SPOOL_DIR)
+    
+    # Schedule all files at once; gather keeps results in upload order
+    results = await asyncio.gather(*(process_upload(file.filename, opener(file), semaphore, timings, deadline_seconds) for file in files))
     
     # Calculate summary statistics
     successful = sum(1 for r in results if r.status == "success")
     failed = len(results) - successful
     
-    return ProcessPDFsResponse(
+    return json_response(ProcessPDFsResponse(
         results=results,
         total_processed=len(results),
         successful=successful,
         failed=failed
-    )
+    ))
+
+
+@router.post("/process-pdfs/stream")
+async def process_pdfs_stream(
+    files: List[UploadFile] = File(...),
+    timings: Annotated[bool, Query(description="Include per-stage timings in each result")] = False,
+    deadline_seconds: Annotated[Optional[float], Query(gt=0, description="Time budget for each file's extraction once it starts (defaults to EXTRACTION_DEADLINE_SECONDS)")] = None,
+):
+    """
+    Process multiple PDF files and stream results as newline-delimited JSON.
+    
+    Each line is a PDFProcessResultFrame emitted as soon as that file finishes
+    (in completion order, with its upload index); the final line is a
+    ProcessPDFsSummaryFrame with the batch counts.
+    """
+    logger.info(f"Starting streamed batch processing of {len(files)} files")
+    
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    check_batch_size(files)
+    
+    # FastAPI closes the uploads once this handler returns, before the stream
+    # is consumed, so spool every file to disk now
+    budget = BatchBudget(MAX_BATCH_UPLOAD_BYTES)
+    spooled: List[Union[SpooledPDF, Exception]] = []
+    for file in files:
+        try:
+            spooled.append(await spool_upload(file, MAX_UPLOAD_BYTES, budget, UPLOAD_SPOOL_DIR))
+        except Exception as e:
+            spooled.append(e)
+    
+    def opener(index: int) -> Callable[[], Awaitable[SpooledPDF]]:
+        async def open_pdf() -> SpooledPDF:
+            if isinstance(spooled[index], Exception):
+                raise spooled[index]
+            return spooled[index]
+        return open_pdf
+    
+    async def process_indexed(index: int, filename: str, semaphore: asyncio.Semaphore):
+        return index, await process_upload(filename, opener(index), semaphore, timings, deadline_seconds)
+    
+    async def frames():
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_EXTRACTIONS)
+        tasks = [
+            asyncio.create_task(process_indexed(index, file.filename, semaphore))
+            for index, file in enumerate(files)
+        ]
+        successful = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                index, result = await next_result
+                if result.status == "success":
+                    successful += 1
+                yield PDFProcessResultFrame(index=index, result=result).model_dump_json() + "\n"
+            
+            yield ProcessPDFsSummaryFrame(
+                total_processed=len(tasks),
+                successful=successful,
+                failed=len(tasks) - successful
+            ).model_dump_json() + "\n"
+        finally:
+            # Stop outstanding work if the client disconnects mid-stream
+            for task in tasks:
+                task.cancel()
+            for pdf in spooled:
+                if isinstance(pdf, SpooledPDF):
+                    pdf.cleanup()
+    
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+
+async def compare_shard(
+    field_keys: List[str],
+    banks_data: Dict[str, Dict],
+    undecided: Dict[str, List[str]],
+    max_retries: int = 3,
+    reference: Optional[Dict[str, List[str]]] = None,
+) -> Dict[Tuple[str, str], BankComparisonCell]:
+    """
+    Compare the undecided cells of a group of fields in one model call.
+    
+    Banks listed in reference (per field) are sent as reference_only content:
+    the undecided cells are compared against them, but no cells are returned
+    for them. Retries transient failures (including incomplete or unparsable
+    output) on this shard alone and raises once retries are exhausted.
+    """
+    reference = reference or {}
+    # Only the undecided and reference banks' content for these fields, embedded as compact JSON
+    prompt_data = {}
+    for bank_id, bank in banks_data.items():
+        shard_fields = {}
+        for field_key in field_keys:
+            if bank_id in undecided[field_key]:
+                shard_fields[field_key] = {"content": bank[field_key]["content"]}
+            elif bank_id in reference.get(field_key, ()):
+                shard_fields[field_key] = {"content": bank[field_key]["content"], "reference_only": True}
+        if shard_fields:
+            prompt_data[bank_id] = {"bank_name": bank["bank_name"], **shard_fields}
+    bank_names = [bank["bank_name"] for bank in prompt_data.values()]
+    prompt = build_comparison_prompt(bank_names, prompt_data, field_keys)
+    expected = {(field_key, bank_id) for field_key in field_keys for bank_id in undecided[field_key]}
+    
+    for attempt in range(max_retries):
+        try:
+            # Call Gemini AI for comparison analysis
+            response = await generate_content(
+                model=COMPARISON_MODEL,
+                contents=[prompt],
+                config={
+                    "response_mime_type": "application/json",
+                    "response_schema": BankComparisonResponse,
+                }
+            )
+            
+            # Parse the AI response
+            model_result: BankComparisonResponse = response.parsed
+            if not isinstance(model_result, BankComparisonResponse):
+                raise MalformedResponseError("Model response could not be parsed as BankComparisonResponse")
+            
+            # Keep only cells the model was asked about
+            cells = {}
+            for row in model_result.comparison_table:
+                for cell in row.bank_results:
+                    if (row.field_name, cell.bank_id) in expected:
+                        cells[(row.field_name, cell.bank_id)] = cell.model_copy(
+                            update={"bank_name": banks_data[cell.bank_id]["bank_name"]}
+                        )
+            if len(cells) < len(expected):
+                raise MalformedResponseError(f"Model returned {len(cells)} of {len(expected)} comparison cells")
+            # Cells compared against reference banks are only usable with their pairwise relations
+            if any(reference.get(field_key) and cell.status != "SAME" and cell.equivalent_to is None for (field_key, _), cell in cells.items()):
+                raise MalformedResponseError("Model left out equivalent_to for cells compared against reference banks")
+            MODEL_ATTEMPTS.observe(attempt + 1, operation="comparison", outcome="success")
+            return cells
+        
+        except Exception as e:
+            wait_time = backoff_delay(attempt, retry_after_seconds(e))
+            if attempt == max_retries - 1 or not is_retryable_error(e) or not retry_fits(COMPARISON_MODEL, wait_time):
+                MODEL_ATTEMPTS.observe(attempt + 1, operation="comparison", outcome="failed")
+                raise
+            await asyncio.sleep(wait_time)
+
+
+def manual_review_cells(banks_data: Dict[str, Dict], field_key: str, bank_ids: List[str], details: str) -> Dict[Tuple[str, str], BankComparisonCell]:
+    """SUSPECT cells for a field that could not be compared automatically"""
+    return {
+        (field_key, bank_id): BankComparisonCell(
+            bank_id=bank_id,
+            bank_name=banks_data[bank_id]["bank_name"],
+            status="SUSPECT",
+            explanation="Automatic comparison failed for this field; review manually",
+            details=details
+        )
+        for bank_id in bank_ids
+    }
+
+
+async def run_comparison(banks_data: Dict[str, Dict], spans: Timings) -> BankComparisonResponse:
+    """Decide every comparison cell locally, from the cache or with the model, and assemble the table"""
+    # Decide MISSING and identical cells locally; only the rest go to the model
+    field_keys = get_field_keys()
+    with spans.span("precompare"):
+        cells, undecided = precompare(banks_data, field_keys)
+    
+    # Reuse verdicts from earlier comparisons that involved the same content;
+    # where only some are known, the model decides the rest against reference banks
+    reference: Dict[str, List[str]] = {}
+    all_undecided = dict(undecided)
+    if COMPARISON_CACHE_ENABLED:
+        with spans.span("cache_lookup"):
+            for field_key in list(undecided):
+                cached = await asyncio.to_thread(comparison_cache.lookup, banks_data, field_key, undecided[field_key])
+                CACHE_LOOKUPS.inc(cache="comparison", result="miss" if cached is None else "hit")
+                if cached is not None:
+                    cells.update({(field_key, bank_id): cell for bank_id, cell in cached.items()})
+                    del undecided[field_key]
+                    continue
+                asked, context = await asyncio.to_thread(comparison_cache.plan, banks_data, field_key, undecided[field_key])
+                undecided[field_key] = asked
+                if context:
+                    reference[field_key] = context
+    logger.info(f"Decided {len(cells)} cells locally, {sum(len(ids) for ids in undecided.values())} need the model")
+    
+    if undecided:
+        # Compare each group of undecided fields in its own concurrent model call
+        fields = list(undecided)
+        shards = [fields[i:i + COMPARISON_FIELDS_PER_SHARD] for i in range(0, len(fields), COMPARISON_FIELDS_PER_SHARD)]
+        logger.info(f"Sending {len(shards)} comparison shards to Gemini API")
+        with spans.span("model_calls"):
+            outcomes = await asyncio.gather(
+                *(compare_shard(shard, banks_data, undecided, reference=reference) for shard in shards),
+                return_exceptions=True
+            )
+        
+        failed_shards = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if len(failed_shards) == len(shards):
+            raise failed_shards[0]
+        
+        for shard, outcome in zip(shards, outcomes):
+            if isinstance(outcome, Exception):
+                # A failed shard only affects its own fields
+                logger.error(f"✗ Comparison shard {', '.join(shard)} failed: {str(outcome)}")
+                for field_key in shard:
+                    cells.update(manual_review_cells(banks_data, field_key, all_undecided[field_key], str(outcome)))
+                continue
+            
+            for field_key in shard:
+                field_cells = {bank_id: outcome[(field_key, bank_id)] for bank_id in undecided[field_key]}
+                if not COMPARISON_CACHE_ENABLED:
+                    cells.update({(field_key, bank_id): cell for bank_id, cell in field_cells.items()})
+                    continue
+                with spans.span("cache_store"):
+                    await asyncio.to_thread(comparison_cache.store_cells, banks_data, field_key, field_cells, reference.get(field_key))
+                if field_key not in reference:
+                    cells.update({(field_key, bank_id): cell for bank_id, cell in field_cells.items()})
+                    continue
+                
+                # Merge the new cells with the cached ones for the banks that were only referenced
+                with spans.span("cache_lookup"):
+                    merged = await asyncio.to_thread(comparison_cache.lookup, banks_data, field_key, all_undecided[field_key])
+                if merged is None:
+                    logger.error(f"✗ Could not merge cached and new comparison cells for {field_key}")
+                    cells.update(manual_review_cells(banks_data, field_key, all_undecided[field_key], "Cached and new comparison results disagree"))
+                else:
+                    cells.update({(field_key, bank_id): cell for bank_id, cell in merged.items()})
+    
+    # Counts are computed locally rather than trusted from the model
+    with spans.span("assemble"):
+        comparison_table = assemble_table(banks_data, field_keys, cells)
+        comparison_result = BankComparisonResponse(
+            comparison_table=comparison_table,
+            summary=summarize(comparison_table)
+        )
+    return comparison_result
 
 
 @router.post("/compare-banks", response_model=BankComparisonResponse)
-async def compare_banks(request: BankComparisonRequest):
+async def compare_banks(
+    request: BankComparisonRequest,
+    timings: Annotated[bool, Query(description="Include per-stage timings in the response")] = False,
+    deadline_seconds: Annotated[Optional[float], Query(gt=0, description="Time budget for the comparison's model calls (defaults to COMPARISON_DEADLINE_SECONDS)")] = None,
+):
     """
     Compare multiple banks' policy information and return a detailed comparison table.
     """
@@ -223,109 +1066,44 @@ async def compare_banks(request: BankComparisonRequest):
     if len(request.banks) < 2:
         raise HTTPException(status_code=400, detail="At least 2 banks are required for comparison")
     
+    # Stored policies are resolved up front so unknown ids are a 404, not a failed comparison
+    policy_ids = [bank_data.policy_id for bank_data in request.banks if bank_data.policy_id is not None]
+    stored = {}
+    if policy_ids:
+        stored = await asyncio.to_thread(policy_store.get_comparison_data, policy_ids)
+        unknown = [policy_id for policy_id in policy_ids if policy_id not in stored]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Unknown policy ids: {', '.join(unknown)}")
+    
+    spans = Timings("comparison")
     try:
         # Prepare bank data for AI analysis (only content needed for comparison)
         banks_data = {}
         for bank_data in request.banks:
-            banks_data[bank_data.bank_id] = {
-                "bank_name": bank_data.bank_info.bank_name,
-                "fees_and_charges": {
-                    "missing": bank_data.bank_info.fees_and_charges.missing,
-                    "content": bank_data.bank_info.fees_and_charges.content
-                },
-                "prepayment": {
-                    "missing": bank_data.bank_info.prepayment.missing,
-                    "content": bank_data.bank_info.prepayment.content
-                },
-                "ltv_bands": {
-                    "missing": bank_data.bank_info.ltv_bands.missing,
-                    "content": bank_data.bank_info.ltv_bands.content
-                },
-                "eligibility": {
-                    "missing": bank_data.bank_info.eligibility.missing,
-                    "content": bank_data.bank_info.eligibility.content
-                },
-                "tenure": {
-                    "missing": bank_data.bank_info.tenure.missing,
-                    "content": bank_data.bank_info.tenure.content
-                },
-                "interest_reset": {
-                    "missing": bank_data.bank_info.interest_reset.missing,
-                    "content": bank_data.bank_info.interest_reset.content
-                },
-                "documents_required": {
-                    "missing": bank_data.bank_info.documents_required.missing,
-                    "content": bank_data.bank_info.documents_required.content
-                }
-            }
-        
-        # Create comprehensive AI prompt for comparison
-        bank_names = [bank_data.bank_info.bank_name for bank_data in request.banks]
-        prompt = f"""
-        Compare the following {len(request.banks)} banks' policy information and create a detailed comparison analysis:
-
-        Banks to compare: {', '.join(bank_names)}
-
-        **NORMALIZATION FOR COMPARISON (APPLY FIRST):**
-        Before comparing, mentally normalize all units and terminology:
-        - Currency: ₹/Rs/Rs./Rupees → INR, L/Lac/Lakh → Lakh, Cr/Crore → Crore
-        - Terms: Credit score/CIBIL → Credit Score, Pre-closure/Foreclosure → Prepayment, etc.
-        - Formats: Standardize ranges, percentages, and amounts for accurate comparison
-
-        **COMPARISON LOGIC:**
-        For each field ({', '.join(get_field_keys())}), 
-        compare across all banks and assign one of these statuses:
-
-        1. **SAME**: Information is semantically equivalent across banks (even if worded differently or using different units)
-        2. **DIFF**: Information is clearly different between banks (after normalization)
-        3. **MISSING**: Information is not available in this specific bank (missing=true)
-        4. **SUSPECT**: Information contains issues like:
-           - Conflicting information within the same bank's data
-           - Overlapping/contradictory ranges or thresholds
-           - Ambiguous language that could be interpreted multiple ways
-           - Inconsistent units or formats that couldn't be normalized
-           - Incomplete conditions or missing qualifying criteria
-
-        **BANK DATA:**
-        {banks_data}
-
-        **INSTRUCTIONS:**
-        1. For each of the {len(get_field_keys())} fields, compare all banks
-        2. For each bank-field combination, provide:
-           - status: SAME/DIFF/MISSING/SUSPECT
-           - explanation: Brief reason for the status
-           - details: Additional context if needed (optional)
-        
-        3. Create a summary with counts of each status type across all comparisons
-
-        **IMPORTANT:**
-        - SUSPECT is critical - flag any contradictory, ambiguous, or incomplete information
-        - SAME means semantically equivalent after normalization (not exact text match)
-        - Apply normalization rules before comparison: "INR 5 Lakh" = "Rs 5 L" = "5 Lac"
-        - Compare based on normalized content for each bank
-        - If a field is missing in one bank (missing=true), that specific cell should be MISSING
-        - Consider "Prepayment penalty 2%" and "Foreclosure charge 2%" as SAME after normalization
-        """
-        
-        logger.info("Sending comparison request to Gemini API")
-        
-        # Call Gemini AI for comparison analysis
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[prompt],
-            config={
-                "response_mime_type": "application/json",
-                "response_schema": BankComparisonResponse,
-            }
-        )
+            if bank_data.policy_id is not None:
+                # Stored views are re-read so fields configured since they were saved count as missing
+                banks_data[bank_data.bank_id] = ComparisonInput.model_validate(stored[bank_data.policy_id]).comparison_data()
+            else:
+                banks_data[bank_data.bank_id] = bank_data.bank_info.comparison_data()
         
-        # Parse the AI response
-        comparison_result: BankComparisonResponse = response.parsed
+        with deadline_scope(deadline_seconds or COMPARISON_DEADLINE_SECONDS):
+            if SINGLE_FLIGHT_ENABLED:
+                # Identical comparisons requested at the same time share one run
+                flight_key = make_cache_key(canonical_json(list(banks_data.items())), get_field_config_fingerprint(), COMPARISON_PROMPT_VERSION)
+                comparison_result, shared = await comparison_flights.run(flight_key, partial(run_comparison, banks_data, spans))
+                if shared:
+                    logger.info("Shared an in-flight comparison of the same banks")
+            else:
+                comparison_result = await run_comparison(banks_data, spans)
         
         logger.info(f"✓ Successfully compared {len(request.banks)} banks")
         
-        return comparison_result
+        timing = spans.finish()
+        if timings:
+            comparison_result = comparison_result.model_copy(update={"timing": timing})
+        return json_response(comparison_result)
         
     except Exception as e:
+        spans.finish()
         logger.error(f"✗ Failed to compare banks: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Comparison failed: {str(e)}")
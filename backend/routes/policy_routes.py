@@ -0,0 +1,82 @@
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from typing import Annotated, List, Optional
+import asyncio
+
+from models import PolicySummary, RevisionResult, StoredPolicy
+from routes import pdf_routes
+from services.deadlines import deadline_scope
+from services.metrics import Timings
+from services.uploads import BatchBudget, UploadRejectedError, spool_upload
+
+router = APIRouter()
+
+
+@router.get("/policies", response_model=List[PolicySummary])
+async def list_policies(
+    bank_name: Optional[str] = None,
+    date_from: Optional[str] = Query(default=None, description="Earliest policy date (ISO), effective date or else updated date"),
+    date_to: Optional[str] = Query(default=None, description="Latest policy date (ISO)"),
+    document_sha256: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    """
+    List stored policies, newest first, filtered by bank, policy date or source document.
+    """
+    rows = await asyncio.to_thread(
+        pdf_routes.policy_store.search, bank_name, date_from, date_to, document_sha256, limit
+    )
+    return [PolicySummary(**row) for row in rows]
+
+
+@router.get("/policies/{policy_id}", response_model=StoredPolicy)
+async def get_policy(policy_id: str):
+    """
+    Return a stored policy with its full extracted BankInfo.
+    """
+    policy = await asyncio.to_thread(pdf_routes.policy_store.get, policy_id)
+    if policy is None:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    return StoredPolicy(**policy)
+
+
+@router.delete("/policies/{policy_id}", status_code=204)
+async def delete_policy(policy_id: str):
+    """
+    Remove a stored policy.
+    """
+    if not await asyncio.to_thread(pdf_routes.policy_store.delete, policy_id):
+        raise HTTPException(status_code=404, detail="Policy not found")
+
+
+@router.post("/policies/{policy_id}/revisions", response_model=RevisionResult)
+async def revise_policy(
+    policy_id: str,
+    file: UploadFile = File(...),
+    timings: Annotated[bool, Query(description="Include per-stage timings in the result")] = False,
+    deadline_seconds: Annotated[Optional[float], Query(gt=0, description="Time budget for the revision's extraction (defaults to EXTRACTION_DEADLINE_SECONDS)")] = None,
+):
+    """
+    Process a revised MITC of a stored policy, re-extracting only the fields
+    whose pages changed, and return the updated policy with a field changelog.
+    """
+    previous = await asyncio.to_thread(pdf_routes.policy_store.get, policy_id)
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    
+    try:
+        pdf = await spool_upload(
+            file, pdf_routes.MAX_UPLOAD_BYTES, BatchBudget(pdf_routes.MAX_UPLOAD_BYTES), pdf_routes.UPLOAD_SPOOL_DIR
+        )
+    except UploadRejectedError as e:
+        return RevisionResult(filename=file.filename, status="failed", previous_policy_id=policy_id, error_message=str(e))
+    
+    revision_timings = Timings("revision")
+    try:
+        with deadline_scope(deadline_seconds or pdf_routes.EXTRACTION_DEADLINE_SECONDS):
+            result = await pdf_routes.process_revision(pdf, file.filename, policy_id, previous["bank_info"], revision_timings)
+    finally:
+        pdf.cleanup()
+    timing = revision_timings.finish()
+    if timings:
+        result.timing = timing
+    return result
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def make_cache_key(*parts: str) -> str:
+    """Build a fixed-length cache key from its component parts"""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    """
+    Persistent key/value cache stored in a local SQLite file.
+
+    Entries expire after ttl_seconds (if set) and the least recently used
+    entries are evicted once the cache holds more than max_entries. Reads
+    only write an entry's access time once it is more than
+    touch_interval_seconds old, so hot entries are not rewritten on every hit.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 1000,
+        ttl_seconds: Optional[float] = None,
+        touch_interval_seconds: float = 60.0,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.touch_interval_seconds = touch_interval_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connect lazily so importing a module that owns a cache never touches disk
+        if self._conn is None:
+            if self.path != ":memory:":
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if absent or expired"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, created_at, accessed_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at, accessed_at = row
+            now = time.time()
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                conn.commit()
+                return None
+
+            if now - accessed_at >= self.touch_interval_seconds:
+                conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store value under key and evict expired and least recently used entries"""
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.ttl_seconds is not None:
+                conn.execute("DELETE FROM cache_entries WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+
+    def clear(self) -> None:
+        """Remove every entry from the cache"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM cache_entries")
+            conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class LRUCache:
+    """
+    Bounded in-memory LRU cache of string values.
+
+    If a SQLiteCache is given as backing, writes go through to it and memory
+    misses fall back to it, so entries survive restarts.
+    """
+
+    def __init__(self, max_entries: int = 10000, backing: Optional[SQLiteCache] = None):
+        self.max_entries = max_entries
+        self.backing = backing
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the value for key from memory, falling back to the backing store"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+
+        if self.backing is not None:
+            value = self.backing.get(key)
+            if value is not None:
+                self._remember(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store value in memory and write it through to the backing store"""
+        self._remember(key, value)
+        if self.backing is not None:
+            self.backing.set(key, value)
+
+    def _remember(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry from memory and the backing store"""
+        with self._lock:
+            self._entries.clear()
+        if self.backing is not None:
+            self.backing.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
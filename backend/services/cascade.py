@@ -0,0 +1,56 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from config.fields import get_strong_model_fields
+from models import BankInfo, FieldWithEvidence
+from services.revisions import HEADER_FIELDS, revisable_fields
+
+
+def weak_field_reason(value: FieldWithEvidence) -> Optional[str]:
+    """Why a field extracted by the fast model should be re-run on the strong model, or None if it holds"""
+    if value.missing:
+        return "missing"
+    if not value.content or not value.content.strip():
+        return "no content"
+    if not value.evidence:
+        return "no evidence"
+    # Verification is only set when the PDF has a text layer
+    if all(evidence.verification == "unverified" for evidence in value.evidence):
+        return "unverified evidence"
+    return None
+
+
+def plan_escalation(bank_info: BankInfo) -> Dict[str, str]:
+    """
+    Fields of a fast-model extraction to re-extract with the strong model, with the reason for each.
+
+    A document the fast model judged invalid is escalated in full, so a
+    rejection always comes from the strong model. Fields configured with
+    "cascade": false are always escalated.
+    """
+    if not bank_info.is_valid_home_loan_mitc:
+        return {field_key: "document judged invalid" for field_key in revisable_fields()}
+    strong_model_fields = set(get_strong_model_fields())
+    escalate = {}
+    for field_key in revisable_fields():
+        reason = "configured" if field_key in strong_model_fields else weak_field_reason(getattr(bank_info, field_key))
+        if reason is not None:
+            escalate[field_key] = reason
+    return escalate
+
+
+def merge_escalation(fast: BankInfo, escalated: BaseModel, field_keys: List[str]) -> BankInfo:
+    """
+    Merge the strong model's partial extraction into the fast model's one.
+
+    escalated holds the header plus the escalated fields; its header replaces
+    the fast model's, and every other field is kept from the fast model.
+    """
+    values = {}
+    for name, value in fast:
+        if name in field_keys or name in HEADER_FIELDS:
+            values[name] = getattr(escalated, name)
+        else:
+            values[name] = value
+    return BankInfo(**values)
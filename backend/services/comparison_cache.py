@@ -0,0 +1,165 @@
+import hashlib
+import json
+from collections import Counter
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+from models import BankComparisonCell
+from services.cache import LRUCache, make_cache_key
+from services.comparison_rules import normalize_content
+
+
+def content_hash(content: str) -> str:
+    """Hash of a field's normalized content, so equivalent wordings share cache entries"""
+    return hashlib.sha256(normalize_content(content).encode("utf-8")).hexdigest()
+
+
+class ComparisonCache:
+    """
+    Verdicts from earlier comparisons, reusable across requests with different bank sets.
+
+    Two kinds of entry are kept per field, keyed on normalized content hashes
+    (plus the model and prompt version):
+    - verdict: whether one bank's content is SUSPECT on its own
+    - pair: whether two contents are semantically equivalent
+
+    A field's cells can be decided locally once every content has a verdict and
+    every pair of contents has a known relation: a cell is SAME when its content
+    is equivalent to every other bank's, DIFF otherwise. When only some of that
+    is cached, plan() picks the cells the model still has to decide.
+    """
+
+    def __init__(self, store: LRUCache, model: str, prompt_version: str):
+        self.store = store
+        self.model = model
+        self.prompt_version = prompt_version
+
+    def _verdict_key(self, field_key: str, digest: str) -> str:
+        return make_cache_key("verdict", self.model, self.prompt_version, field_key, digest)
+
+    def _pair_key(self, field_key: str, first: str, second: str) -> str:
+        low, high = sorted((first, second))
+        return make_cache_key("pair", self.model, self.prompt_version, field_key, low, high)
+
+    def _known(self, banks_data: Dict[str, Dict], field_key: str, bank_ids: List[str]) -> Tuple[Dict[str, str], Dict[str, Dict], Dict[Tuple[str, str], bool]]:
+        """Content hash per bank, and whichever verdicts and pair relations between those contents are cached"""
+        digests = {bank_id: content_hash(banks_data[bank_id][field_key]["content"]) for bank_id in bank_ids}
+
+        verdicts = {}
+        for digest in set(digests.values()):
+            value = self.store.get(self._verdict_key(field_key, digest))
+            if value is not None:
+                verdicts[digest] = json.loads(value)
+
+        equivalent = {}
+        for first, second in combinations(sorted(set(digests.values())), 2):
+            value = self.store.get(self._pair_key(field_key, first, second))
+            if value is not None:
+                equivalent[(first, second)] = json.loads(value)["equivalent"]
+        return digests, verdicts, equivalent
+
+    def lookup(self, banks_data: Dict[str, Dict], field_key: str, bank_ids: List[str]) -> Optional[Dict[str, BankComparisonCell]]:
+        """Cells for these banks' field, or None if any verdict or pair is not cached"""
+        digests, verdicts, equivalent = self._known(banks_data, field_key, bank_ids)
+        unique = set(digests.values())
+        if len(verdicts) < len(unique) or len(equivalent) < len(unique) * (len(unique) - 1) // 2:
+            return None
+
+        def same(a: str, b: str) -> bool:
+            return a == b or equivalent[tuple(sorted((a, b)))]
+
+        cells = {}
+        for bank_id in bank_ids:
+            bank_name = banks_data[bank_id]["bank_name"]
+            verdict = verdicts[digests[bank_id]]
+            if verdict["suspect"]:
+                cells[bank_id] = BankComparisonCell(
+                    bank_id=bank_id,
+                    bank_name=bank_name,
+                    status="SUSPECT",
+                    explanation=verdict["explanation"],
+                    details=verdict.get("details")
+                )
+                continue
+
+            others = [other for other in bank_ids if other != bank_id]
+            matches = [other for other in others if same(digests[bank_id], digests[other])]
+            differs = [banks_data[other]["bank_name"] for other in others if other not in matches]
+            if differs:
+                explanation = f"Differs from {', '.join(differs)}"
+            else:
+                explanation = f"Equivalent to {', '.join(banks_data[other]['bank_name'] for other in matches)}"
+            cells[bank_id] = BankComparisonCell(
+                bank_id=bank_id,
+                bank_name=bank_name,
+                status="DIFF" if differs else "SAME",
+                explanation=explanation,
+                equivalent_to=matches
+            )
+        return cells
+
+    def plan(self, banks_data: Dict[str, Dict], field_key: str, bank_ids: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Split a field the cache cannot decide into the banks whose cells the
+        model must return and the banks it only compares them against.
+
+        Contents without a cached verdict are always asked for; unknown pairs
+        are then covered greedily, so adding one bank to a cached comparison
+        asks for that bank's cell alone, with the others as reference.
+        """
+        digests, verdicts, equivalent = self._known(banks_data, field_key, bank_ids)
+        unknown = [pair for pair in combinations(sorted(set(digests.values())), 2) if pair not in equivalent]
+
+        asked = {digest for digest in digests.values() if digest not in verdicts}
+        uncovered = [pair for pair in unknown if not asked.intersection(pair)]
+        while uncovered:
+            counts = Counter(digest for pair in uncovered for digest in pair)
+            asked.add(max(sorted(counts), key=counts.__getitem__))
+            uncovered = [pair for pair in uncovered if not asked.intersection(pair)]
+
+        partners = {digest for pair in unknown if asked.intersection(pair) for digest in pair} - asked
+        return (
+            [bank_id for bank_id in bank_ids if digests[bank_id] in asked],
+            [bank_id for bank_id in bank_ids if digests[bank_id] in partners],
+        )
+
+    def store_cells(
+        self,
+        banks_data: Dict[str, Dict],
+        field_key: str,
+        cells: Dict[str, BankComparisonCell],
+        compared_with: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Record what a model comparison of this field revealed about each content and pair.
+
+        compared_with lists the reference banks the cells were compared
+        against besides each other.
+        """
+        compared = list(cells) + [bank_id for bank_id in compared_with or [] if bank_id not in cells]
+        digests = {bank_id: content_hash(banks_data[bank_id][field_key]["content"]) for bank_id in compared}
+
+        for bank_id, cell in cells.items():
+            self.store.set(self._verdict_key(field_key, digests[bank_id]), json.dumps({
+                "suspect": cell.status == "SUSPECT",
+                "explanation": cell.explanation,
+                "details": cell.details,
+            }))
+
+        for bank_id, cell in cells.items():
+            others = [other for other in compared if other != bank_id and digests[other] != digests[bank_id]]
+            if cell.status == "SAME":
+                # SAME means equivalent to every other bank, even if equivalent_to was left empty
+                relations = {other: True for other in others}
+            elif cell.equivalent_to is not None and not (cell.status == "DIFF" and set(others) <= set(cell.equivalent_to)):
+                relations = {other: other in cell.equivalent_to for other in others}
+            elif cell.status == "DIFF" and len(others) == 1:
+                relations = {others[0]: False}
+            else:
+                # A DIFF among three or more banks does not say which pair differs
+                relations = {}
+            for other, is_equivalent in relations.items():
+                self.store.set(
+                    self._pair_key(field_key, digests[bank_id], digests[other]),
+                    json.dumps({"equivalent": is_equivalent})
+                )
@@ -0,0 +1,116 @@
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from models import BankComparisonCell, ComparisonRow, SummaryCount
+
+STATUSES = ("SAME", "DIFF", "MISSING", "SUSPECT")
+
+# The normalization rules given to the model in the extraction and comparison
+# prompts, applied locally so trivially equal cells never reach the model
+_NORMALIZATION_RULES = [
+    # Currency & units (every amount in these documents is INR, so the marker is dropped)
+    (r"₹|\brs\b\.?|\brupees\b|\binr\b", " "),
+    (r"(\d)\s*(?:lakhs?|lacs?|l)\b", r"\1 lakh"),
+    (r"(\d)\s*(?:crores?|cr)\b", r"\1 crore"),
+    (r"\s*(?:per\s*cent|percent|pct)\b", "%"),
+    (r"(\d)\s+%", r"\1%"),
+    (r"(\d)\s*(?:yrs?|years?)\b", r"\1 years"),
+    (r"(\d)\s*(?:mths?|months?)\b", r"\1 months"),
+    (r"\bupto\b", "up to"),
+    # Terminology
+    (r"\b(?:cibil score|cibil|credit rating)\b", "credit score"),
+    (r"\b(?:pre-closure|preclosure|foreclosure|early closure)\b", "prepayment"),
+    (r"\b(?:administrative fee|handling charges)\b", "processing fee"),
+    (r"\b(?:part payment|partial prepayment)\b", "partial prepayment"),
+    (r"\b(?:rate of interest|roi)\b", "interest rate"),
+    (r"\b(?:instalments?|installments?|monthly payments?)\b", "emi"),
+    (r"\b(?:loan quantum|principal)\b", "loan amount"),
+    (r"\b(?:salary certificate|income documents)\b", "income proof"),
+]
+_COMPILED_RULES = [(re.compile(pattern), replacement) for pattern, replacement in _NORMALIZATION_RULES]
+_DIGIT_GROUPING = re.compile(r"(?<=\d),(?=\d)")
+_TRAILING_ZEROS = re.compile(r"(\d+)\.0+\b")
+_PUNCTUATION = re.compile(r"[:;,()\[\]\"']")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_content(text: str) -> str:
+    """Canonical form of extracted content: INR/Lakh/Crore/percent/tenure units and standard terms"""
+    text = text.lower()
+    text = _DIGIT_GROUPING.sub("", text)
+    text = _TRAILING_ZEROS.sub(r"\1", text)
+    for pattern, replacement in _COMPILED_RULES:
+        text = pattern.sub(replacement, text)
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip(" .")
+
+
+def precompare(banks_data: Dict[str, Dict], field_keys: List[str]) -> Tuple[Dict[Tuple[str, str], BankComparisonCell], Dict[str, List[str]]]:
+    """
+    Decide the cells that need no model.
+
+    banks_data maps bank_id to {"bank_name": ..., field_key: {"missing", "content"}}.
+    Returns (decided cells keyed by (field_key, bank_id), undecided bank ids per field).
+    A cell is MISSING when the field is missing for that bank; when every bank
+    that has the field has the same normalized content, those cells are SAME.
+    """
+    decided: Dict[Tuple[str, str], BankComparisonCell] = {}
+    undecided: Dict[str, List[str]] = {}
+
+    for field_key in field_keys:
+        present: Dict[str, str] = {}
+        for bank_id, bank in banks_data.items():
+            field = bank.get(field_key) or {"missing": True}
+            if field.get("missing") or not field.get("content"):
+                decided[(field_key, bank_id)] = BankComparisonCell(
+                    bank_id=bank_id,
+                    bank_name=bank["bank_name"],
+                    status="MISSING",
+                    explanation="Information not found in this bank's document"
+                )
+            else:
+                present[bank_id] = normalize_content(field["content"])
+
+        if len(present) >= 2 and len(set(present.values())) == 1:
+            for bank_id in present:
+                others = [banks_data[other]["bank_name"] for other in present if other != bank_id]
+                decided[(field_key, bank_id)] = BankComparisonCell(
+                    bank_id=bank_id,
+                    bank_name=banks_data[bank_id]["bank_name"],
+                    status="SAME",
+                    explanation=f"Identical to {', '.join(others)} after normalization"
+                )
+        elif present:
+            undecided[field_key] = list(present)
+
+    return decided, undecided
+
+
+def assemble_table(
+    banks_data: Dict[str, Dict],
+    field_keys: List[str],
+    cells: Dict[Tuple[str, str], BankComparisonCell],
+) -> List[ComparisonRow]:
+    """Build comparison rows in field order with cells in request bank order"""
+    table = []
+    for field_key in field_keys:
+        bank_results = []
+        for bank_id, bank in banks_data.items():
+            cell = cells.get((field_key, bank_id))
+            if cell is None:
+                cell = BankComparisonCell(
+                    bank_id=bank_id,
+                    bank_name=bank["bank_name"],
+                    status="SUSPECT",
+                    explanation="No comparison result was returned for this cell; review manually"
+                )
+            bank_results.append(cell)
+        table.append(ComparisonRow(field_name=field_key, bank_results=bank_results))
+    return table
+
+
+def summarize(table: List[ComparisonRow]) -> List[SummaryCount]:
+    """Count statuses across the whole table"""
+    counts = Counter(cell.status for row in table for cell in row.bank_results)
+    return [SummaryCount(status=status, count=counts.get(status, 0)) for status in STATUSES]
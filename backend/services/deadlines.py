@@ -0,0 +1,39 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Monotonic time by which the current request's model work has to finish;
+# tasks started inside a scope inherit it
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceededError(Exception):
+    """The request's time budget ran out before another model call could be made"""
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """Give everything awaited inside a time budget of seconds (None or 0: none); nested scopes can only shorten it"""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_seconds() -> Optional[float]:
+    """Time left in the current deadline scope, or None outside one"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def can_fit(seconds: float) -> bool:
+    """True if something taking seconds would still finish within the current deadline"""
+    remaining = remaining_seconds()
+    return remaining is None or remaining > seconds
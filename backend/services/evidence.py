@@ -0,0 +1,83 @@
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Set, Tuple
+
+from models import BankInfo, Evidence, FieldWithEvidence
+
+# Snippets are matched as overlapping word n-grams so small wording or
+# whitespace differences from the model still match
+SHINGLE_SIZE = 3
+# Fraction of a snippet's shingles that must occur on a page to count as found there
+EVIDENCE_MATCH_THRESHOLD = float(os.getenv("EVIDENCE_MATCH_THRESHOLD", "0.6"))
+
+_TOKEN = re.compile(r"\w+|%")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _shingles(tokens: List[str]) -> Set[Tuple[str, ...]]:
+    return {tuple(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+class EvidenceIndex:
+    """
+    Inverted index from word shingles to the pages they occur on.
+
+    Built once per document from its text layer; each lookup costs time
+    proportional to the snippet length, not the document.
+    """
+
+    def __init__(self, page_texts: List[str]):
+        self.page_count = len(page_texts)
+        self._pages: Dict[Tuple[str, ...], Set[int]] = defaultdict(set)
+        self._normalized: Dict[int, str] = {}
+        for number, text in enumerate(page_texts, start=1):
+            tokens = _tokens(text)
+            self._normalized[number] = f" {' '.join(tokens)} "
+            for shingle in _shingles(tokens):
+                self._pages[shingle].add(number)
+
+    def page_scores(self, snippet: str) -> Dict[int, float]:
+        """Fraction of the snippet found on each page that contains any of it"""
+        tokens = _tokens(snippet)
+        if not tokens:
+            return {}
+        if len(tokens) < SHINGLE_SIZE:
+            # Too short for shingles: look for the whole phrase
+            phrase = f" {' '.join(tokens)} "
+            return {number: 1.0 for number, text in self._normalized.items() if phrase in text}
+
+        shingles = _shingles(tokens)
+        hits = Counter(number for shingle in shingles for number in self._pages.get(shingle, ()))
+        return {number: count / len(shingles) for number, count in hits.items()}
+
+    def verify(self, evidence: Evidence) -> None:
+        """Annotate evidence as verified, corrected to the page it occurs on, or unverified"""
+        scores = self.page_scores(evidence.line_snippet)
+        if evidence.page_number is not None and scores.get(evidence.page_number, 0) >= EVIDENCE_MATCH_THRESHOLD:
+            evidence.verification = "verified"
+            return
+
+        matches = [number for number, score in scores.items() if score >= EVIDENCE_MATCH_THRESHOLD]
+        if not matches:
+            evidence.verification = "unverified"
+            return
+
+        best = max(matches, key=lambda number: (scores[number], -number))
+        evidence.reported_page_number = evidence.page_number
+        evidence.page_number = best
+        evidence.verification = "corrected"
+
+
+def verify_bank_info(bank_info: BankInfo, index: EvidenceIndex) -> Counter:
+    """Verify every evidence item of an extraction in place and return counts per outcome"""
+    outcomes = Counter()
+    for _, value in bank_info:
+        if isinstance(value, FieldWithEvidence) and value.evidence:
+            for evidence in value.evidence:
+                index.verify(evidence)
+                outcomes[evidence.verification] += 1
+    return outcomes
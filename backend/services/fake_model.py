@@ -0,0 +1,116 @@
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from google.genai.errors import ClientError, ServerError
+
+from config.fields import get_field_keys
+from models import BankComparisonCell, BankComparisonResponse, BankInfo, ComparisonRow, Evidence, FieldWithEvidence
+
+
+@dataclass
+class FakeModelConfig:
+    """Behaviour of the simulated model: latency, failures and response size"""
+    # Log-normal latency per model: median seconds, and sigma of the underlying normal
+    median_latency: Dict[str, float] = field(default_factory=lambda: {"gemini-2.5-pro": 0.2, "gemini-2.5-flash": 0.05})
+    latency_sigma: float = 0.5
+    default_latency: float = 0.1
+    # Fraction of calls failing with a 500 or throttled with a 429
+    failure_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: Optional[float] = None
+    # Response size knobs
+    evidence_per_field: int = 2
+    content_chars: int = 200
+    seed: int = 0
+
+
+class FakeModelClient:
+    """
+    Offline stand-in for genai.Client with the same call shape.
+
+    client.models.generate_content blocks for a sampled latency and returns a
+    structured response for the requested schema; client.files.upload and
+    delete return immediately. Safe to call from several threads.
+    """
+
+    def __init__(self, config: Optional[FakeModelConfig] = None):
+        self.config = config or FakeModelConfig()
+        self.calls = 0
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+        self.files = SimpleNamespace(upload=self._upload_file, delete=self._delete_file)
+
+    def _sample(self, model: str):
+        with self._lock:
+            self.calls += 1
+            median = self.config.median_latency.get(model, self.config.default_latency)
+            latency = self._random.lognormvariate(0, self.config.latency_sigma) * median
+            roll = self._random.random()
+            variant = self._random.randrange(1_000_000)
+        return latency, roll, variant
+
+    def generate_content(self, model: str, contents, config):
+        latency, roll, variant = self._sample(model)
+        time.sleep(latency)
+
+        if roll < self.config.throttle_rate:
+            details = []
+            if self.config.retry_after is not None:
+                details = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{self.config.retry_after}s"}]
+            raise ClientError(429, {"error": {"code": 429, "message": "Resource exhausted", "status": "RESOURCE_EXHAUSTED", "details": details}})
+        if roll < self.config.throttle_rate + self.config.failure_rate:
+            raise ServerError(500, {"error": {"code": 500, "message": "Internal error", "status": "INTERNAL"}})
+
+        schema = config["response_schema"]
+        if schema is BankComparisonResponse:
+            parsed = self._comparison(contents[-1])
+        else:
+            parsed = self._extraction(variant, schema or BankInfo)
+        return SimpleNamespace(
+            parsed=parsed,
+            usage_metadata=SimpleNamespace(prompt_token_count=len(str(contents[-1])) // 4, candidates_token_count=len(parsed.model_dump_json()) // 4),
+        )
+
+    def _field(self, variant: int, field_key: str) -> FieldWithEvidence:
+        filler = "Terms apply as per the sanction letter. " * (self.config.content_chars // 40 + 1)
+        return FieldWithEvidence(
+            missing=False,
+            content=f"{field_key} value {variant % 97}. {filler[:self.config.content_chars]}",
+            evidence=[
+                Evidence(page_number=page + 1, line_snippet=f"{field_key} clause {variant % 97}.{page}")
+                for page in range(self.config.evidence_per_field)
+            ],
+        )
+
+    def _extraction(self, variant: int, schema):
+        # BankInfo, or a partial schema holding a subset of its fields
+        values = {field_key: self._field(variant, field_key) for field_key in get_field_keys() if field_key in schema.model_fields}
+        return schema(bank_name=f"BANK{variant % 1000}", is_valid_home_loan_mitc=True, **values)
+
+    def _comparison(self, prompt: str) -> BankComparisonResponse:
+        # The prompt embeds the banks and fields to compare as one line of JSON
+        bank_data = json.loads(prompt.split("**BANK DATA (JSON):**\n")[1].split("\n")[0])
+        rows: Dict[str, list] = {}
+        for bank_id, bank in bank_data.items():
+            for field_key in bank:
+                if field_key != "bank_name":
+                    rows.setdefault(field_key, []).append(BankComparisonCell(
+                        bank_id=bank_id, bank_name=bank.get("bank_name", bank_id),
+                        status="DIFF", explanation="Values differ", equivalent_to=[],
+                    ))
+        return BankComparisonResponse(
+            comparison_table=[ComparisonRow(field_name=field_key, bank_results=cells) for field_key, cells in rows.items()],
+            summary=[],
+        )
+
+    def _upload_file(self, file, config=None):
+        return SimpleNamespace(name=f"files/{self._random.randrange(1_000_000)}", uri="https://fake.local/file", mime_type="application/pdf")
+
+    def _delete_file(self, name):
+        return None
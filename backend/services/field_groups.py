@@ -0,0 +1,35 @@
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from models import BankInfo, FieldWithEvidence
+from services.revisions import HEADER_FIELDS
+
+
+def split_field_groups(field_keys: List[str], group_count: int) -> List[List[str]]:
+    """Split fields into at most group_count contiguous groups of near-equal size, in configuration order"""
+    group_count = max(1, min(group_count, len(field_keys)))
+    size, extra = divmod(len(field_keys), group_count)
+    groups, start = [], 0
+    for index in range(group_count):
+        end = start + size + (1 if index < extra else 0)
+        groups.append(field_keys[start:end])
+        start = end
+    return groups
+
+
+def merge_field_groups(groups: List[List[str]], parts: Dict[int, BaseModel]) -> BankInfo:
+    """
+    Combine the partial extractions of every field group into one BankInfo.
+
+    Each part holds the header plus its group's fields; the header is taken
+    from the first group. BankInfo fields left out of the field configuration
+    are filled in as missing.
+    """
+    values = {name: getattr(parts[0], name) for name in HEADER_FIELDS}
+    for index, group in enumerate(groups):
+        values.update({field_key: getattr(parts[index], field_key) for field_key in group})
+    for name, field in BankInfo.model_fields.items():
+        if name not in values and field.annotation is FieldWithEvidence:
+            values[name] = FieldWithEvidence(missing=True)
+    return BankInfo(**values)
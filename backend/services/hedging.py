@@ -0,0 +1,50 @@
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Send a duplicate model request when the first one has been outstanding for
+# longer than this percentile of the model's recent successful call latency
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+# No hedging until this many latencies have been observed for a model
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+LATENCY_WINDOW = 500
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies for one model"""
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Latency at the given percentile, or None until enough calls have been seen"""
+        with self._lock:
+            if len(self._samples) < max(1, self.min_samples):
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait before hedging a call, or None if this model is not hedged yet"""
+        return self.percentile(HEDGE_PERCENTILE) if HEDGING_ENABLED else None
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(model: str) -> LatencyTracker:
+    """The shared latency tracker of a model"""
+    with _trackers_lock:
+        if model not in _trackers:
+            _trackers[model] = LatencyTracker()
+        return _trackers[model]
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    Persistent extraction job queue backed by SQLite plus a file spool.
+
+    Uploaded PDFs are written to spool_dir and every file of a job becomes a
+    queue row. Workers claim rows with a lease; rows whose lease expires (for
+    example because the process died mid-extraction) are claimed again, so
+    queued and interrupted work survives a restart. Several processes can
+    share the same database file.
+    """
+
+    def __init__(self, path: str, spool_dir: str, lease_seconds: float = 600):
+        self.path = path
+        self.spool_dir = spool_dir
+        self.lease_seconds = lease_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            os.makedirs(self.spool_dir, exist_ok=True)
+            # Autocommit mode so claims can use explicit BEGIN IMMEDIATE transactions
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_files ("
+                "job_id TEXT NOT NULL, idx INTEGER NOT NULL, filename TEXT NOT NULL, "
+                "spool_path TEXT, status TEXT NOT NULL, lease_expires_at REAL, result TEXT, "
+                "PRIMARY KEY (job_id, idx))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_files_status ON job_files (status, lease_expires_at)")
+            self._conn = conn
+        return self._conn
+
+    def create_job(self, files: List[Tuple[str, Optional[str], Optional[str]]]) -> str:
+        """
+        Store a job and return its id.
+
+        Each file is (filename, spooled_pdf_path, precomputed_result). Spooled
+        PDFs are moved into spool_dir; files that already have a result (e.g.
+        rejected uploads) are stored as done.
+        """
+        job_id = uuid.uuid4().hex
+        rows = []
+        with self._lock:
+            conn = self._connection()
+            for idx, (filename, source_path, result) in enumerate(files):
+                spool_path = None
+                if result is None:
+                    spool_path = os.path.join(self.spool_dir, f"{job_id}_{idx}.pdf")
+                    shutil.move(source_path, spool_path)
+                rows.append((job_id, idx, filename, spool_path, "done" if result is not None else "queued", result))
+
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO jobs (id, created_at) VALUES (?, ?)", (job_id, time.time()))
+            conn.executemany(
+                "INSERT INTO job_files (job_id, idx, filename, spool_path, status, result) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        return job_id
+
+    def claim(self) -> Optional[Tuple[str, int, str, str]]:
+        """Claim the oldest queued (or lease-expired) file as (job_id, idx, filename, spool_path)"""
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT f.job_id, f.idx, f.filename, f.spool_path FROM job_files f "
+                    "JOIN jobs j ON j.id = f.job_id "
+                    "WHERE f.status = 'queued' OR (f.status = 'running' AND f.lease_expires_at < ?) "
+                    "ORDER BY j.created_at, f.idx LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE job_files SET status = 'running', lease_expires_at = ? WHERE job_id = ? AND idx = ?",
+                        (now + self.lease_seconds, row[0], row[1]),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return row
+
+    def complete(self, job_id: str, idx: int, result: str) -> None:
+        """Record a file's serialized PDFProcessResult and drop its spooled PDF"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT spool_path FROM job_files WHERE job_id = ? AND idx = ?", (job_id, idx)
+            ).fetchone()
+            conn.execute(
+                "UPDATE job_files SET status = 'done', result = ?, spool_path = NULL, lease_expires_at = NULL "
+                "WHERE job_id = ? AND idx = ?",
+                (result, job_id, idx),
+            )
+        if row and row[0] and os.path.exists(row[0]):
+            os.remove(row[0])
+
+    def get_job(self, job_id: str) -> Optional[List[Dict]]:
+        """Return the job's files in upload order, or None if the job does not exist"""
+        with self._lock:
+            conn = self._connection()
+            if conn.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is None:
+                return None
+            rows = conn.execute(
+                "SELECT idx, filename, status, result FROM job_files WHERE job_id = ? ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        return [
+            {"index": idx, "filename": filename, "status": status, "result": result}
+            for idx, filename, status, result in rows
+        ]
+
+
+async def run_job_worker(
+    queue: JobQueue,
+    process: Callable[[str, str], Awaitable[str]],
+    wakeup: asyncio.Event,
+    poll_interval: float = 1.0,
+) -> None:
+    """
+    Claim and process queued files until cancelled.
+
+    process receives the filename and spooled PDF path and returns the
+    serialized result to store. Idle workers sleep until woken or until
+    poll_interval passes (workers in other processes rely on polling).
+    """
+    while True:
+        claimed = await asyncio.to_thread(queue.claim)
+        if claimed is None:
+            wakeup.clear()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        job_id, idx, filename, spool_path = claimed
+        try:
+            result = await process(filename, spool_path)
+        except asyncio.CancelledError:
+            # Leave the row leased; it is picked up again once the lease expires
+            raise
+        except Exception as e:
+            logger.error(f"✗ Job {job_id} file {filename} could not be processed: {str(e)}")
+            continue
+        await asyncio.to_thread(queue.complete, job_id, idx, result)
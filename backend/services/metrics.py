@@ -0,0 +1,231 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from models import ProcessingTiming
+
+# Default latency buckets (seconds), spanning cache hits to slow Pro extractions
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets, with sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # One slot per bucket, then sum and count
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return int(series[-1]) if series else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = []
+        for key, series in items:
+            labels = list(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {_format_value(count)}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(series[-1])}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose samples are read from a callback at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in sorted(self.callback().items())
+        ]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "stage_duration_seconds", "Wall time of one processing stage", ["operation", "stage"]
+))
+OPERATION_SECONDS = registry.register(Histogram(
+    "operation_duration_seconds", "End-to-end wall time of one extraction or comparison", ["operation"]
+))
+MODEL_CALL_SECONDS = registry.register(Histogram(
+    "model_call_duration_seconds", "Latency of one model call, including rate-limiter wait", ["model", "outcome"]
+))
+MODEL_ATTEMPTS = registry.register(Histogram(
+    "model_attempts", "Model attempts needed per extraction or comparison shard", ["operation", "outcome"],
+    buckets=(1, 2, 3, 4, 5),
+))
+MODEL_HEDGES = registry.register(Counter(
+    "model_hedged_calls_total", "Model calls that sent a hedged duplicate, by which request answered first (none: both failed)", ["model", "winner"]
+))
+MODEL_TOKENS = registry.register(Counter(
+    "model_tokens_total", "Tokens reported in model response usage metadata", ["model", "kind"]
+))
+PDF_SIZE_BYTES = registry.register(Histogram(
+    "pdf_size_bytes", "Size of PDFs submitted for extraction", [],
+    buckets=(100_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000),
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    "cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"]
+))
+SINGLE_FLIGHT_CALLS = registry.register(Counter(
+    "single_flight_calls_total", "Extractions and comparisons that started a model call (leader) or joined one in flight (shared)", ["operation", "role"]
+))
+EXTRACTION_ESCALATIONS = registry.register(Counter(
+    "extraction_escalations_total", "Fields re-extracted by the strong model in cascade mode, by reason", ["reason"]
+))
+
+# Usage metadata attributes and the label they are counted under
+_USAGE_FIELDS = {
+    "prompt_token_count": "prompt",
+    "candidates_token_count": "output",
+    "thoughts_token_count": "thoughts",
+    "cached_content_token_count": "cached",
+}
+
+
+def record_token_usage(model: str, response) -> None:
+    """Count the tokens a model response reports (absent or non-numeric fields are skipped)"""
+    usage = getattr(response, "usage_metadata", None)
+    for attribute, kind in _USAGE_FIELDS.items():
+        value = getattr(usage, attribute, None)
+        if isinstance(value, int) and value > 0:
+            MODEL_TOKENS.inc(value, model=model, kind=kind)
+
+
+class Timings:
+    """
+    Per-request timing spans for one operation.
+
+    Every span is observed in stage_duration_seconds; the accumulated
+    per-stage times can also be returned in the response payload.
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.stages: Dict[str, float] = {}
+        self.attempts: Optional[int] = None
+        self._started = time.perf_counter()
+        self._total: Optional[float] = None
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[stage] = self.stages.get(stage, 0.0) + elapsed
+            STAGE_SECONDS.observe(elapsed, operation=self.operation, stage=stage)
+
+    def finish(self) -> ProcessingTiming:
+        """Record the end-to-end time (once) and return the timing summary"""
+        if self._total is None:
+            self._total = time.perf_counter() - self._started
+            OPERATION_SECONDS.observe(self._total, operation=self.operation)
+        return ProcessingTiming(
+            total_ms=round(self._total * 1000, 3),
+            stages_ms={stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            attempts=self.attempts,
+        )
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelClientUnavailableError(RuntimeError):
+    """No model client could be created (e.g. GEMINI_API_KEY is not set)"""
+
+
+def create_gemini_client():
+    """Build the Gemini SDK client from GEMINI_API_KEY (the SDK is only imported here)"""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ModelClientUnavailableError("GEMINI_API_KEY environment variable is required")
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
+def genai_types():
+    """google.genai.types, imported on first use (importing the SDK takes a while)"""
+    from google.genai import types
+    return types
+
+
+async def genai_types_async():
+    """Like genai_types(), but the first import runs off the event loop"""
+    module = sys.modules.get("google.genai.types")
+    if module is not None:
+        return module
+    return await asyncio.to_thread(genai_types)
+
+
+class ModelClientProvider:
+    """
+    Lazily created model client with the genai.Client call shape
+    (client.models.generate_content, client.files.upload/delete).
+
+    The client is built by the factory on first use, so importing the app
+    neither loads the SDK nor needs an API key. Tests, benchmarks and
+    create_app() inject another client (e.g. FakeModelClient) with set().
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self._client: Optional[Any] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """True once a client has been created or injected"""
+        return self._client is not None
+
+    def get(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self.factory()
+                    logger.info(f"✓ Model client ready ({type(self._client).__name__})")
+        return self._client
+
+    async def get_async(self) -> Any:
+        """Like get(), but builds the client off the event loop the first time"""
+        if self._client is not None:
+            return self._client
+        return await asyncio.to_thread(self.get)
+
+    def set(self, client: Optional[Any]) -> None:
+        """Serve from the given client; None goes back to creating one on first use"""
+        with self._lock:
+            self._client = client
+
+    @contextmanager
+    def override(self, client: Any):
+        """Serve from the given client within the block, restoring the previous one afterwards"""
+        with self._lock:
+            previous, self._client = self._client, client
+        try:
+            yield client
+        finally:
+            self.set(previous)
+
+
+model_client = ModelClientProvider(create_gemini_client)
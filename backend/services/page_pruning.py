@@ -0,0 +1,76 @@
+import os
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from config.fields import field_config_registry
+
+# Documents shorter than this are always sent whole
+PAGE_PRUNING_MIN_PAGES = int(os.getenv("PAGE_PRUNING_MIN_PAGES", "8"))
+# Best-scoring pages kept for each field
+PAGE_PRUNING_PAGES_PER_FIELD = int(os.getenv("PAGE_PRUNING_PAGES_PER_FIELD", "3"))
+# A page with less extracted text than this is treated as scanned
+PAGE_TEXT_MIN_CHARS = int(os.getenv("PAGE_TEXT_MIN_CHARS", "100"))
+
+# Synonym patterns for the most recent field-config fingerprint
+_patterns: Dict[str, Pattern] = {}
+_patterns_fingerprint = None
+
+
+def _field_patterns() -> Dict[str, Pattern]:
+    global _patterns, _patterns_fingerprint
+    snapshot = field_config_registry.snapshot()
+    if snapshot.fingerprint != _patterns_fingerprint:
+        _patterns = {}
+        for field_key, field_info in snapshot.config.items():
+            terms = [field_info["display_name"], *field_info.get("synonyms", [])]
+            alternatives = "|".join(re.escape(term.lower()) for term in sorted(terms, key=len, reverse=True))
+            _patterns[field_key] = re.compile(rf"\b(?:{alternatives})\b")
+        _patterns_fingerprint = snapshot.fingerprint
+    return _patterns
+
+
+def score_pages(page_texts: List[str]) -> Dict[str, List[int]]:
+    """Synonym hit counts per field for each page"""
+    lowered = [text.lower() for text in page_texts]
+    return {
+        field_key: [len(pattern.findall(text)) for text in lowered]
+        for field_key, pattern in _field_patterns().items()
+    }
+
+
+def has_text_layer(page_texts: List[str]) -> bool:
+    """True unless most pages lack extractable text (scanned documents)"""
+    pages_with_text = sum(1 for text in page_texts if len(text.strip()) >= PAGE_TEXT_MIN_CHARS)
+    return pages_with_text >= len(page_texts) / 2
+
+
+def select_pages(page_texts: List[str]) -> Optional[List[int]]:
+    """
+    Zero-based indexes of the pages worth sending, or None to send the whole document.
+
+    The first page (bank name, dates, document type) is always kept, plus the
+    best-scoring pages for each field. Short documents, scanned documents
+    (mostly pages without a text layer) and documents where pruning would
+    keep nearly everything are sent whole.
+    """
+    if len(page_texts) < PAGE_PRUNING_MIN_PAGES:
+        return None
+    if not has_text_layer(page_texts):
+        return None
+
+    selected = {0}
+    for scores in score_pages(page_texts).values():
+        ranked = sorted((index for index, score in enumerate(scores) if score > 0), key=lambda index: -scores[index])
+        selected.update(ranked[:PAGE_PRUNING_PAGES_PER_FIELD])
+
+    if len(selected) >= len(page_texts) * 0.8:
+        return None
+    return sorted(selected)
+
+
+def prune_pages(page_texts: List[str]) -> Optional[List[Tuple[int, str]]]:
+    """Relevant pages as (original 1-based page number, text), or None to send the full document"""
+    selected = select_pages(page_texts)
+    if selected is None:
+        return None
+    return [(index + 1, page_texts[index]) for index in selected]
@@ -0,0 +1,34 @@
+import io
+import logging
+from typing import List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def load_pdf_reader():
+    """pypdf's PdfReader, imported on first use"""
+    from pypdf import PdfReader
+    return PdfReader
+
+
+def extract_page_texts(pdf: Union[bytes, str]) -> List[str]:
+    """Text layer of every page (pdf is the document bytes or a file path)"""
+    if isinstance(pdf, bytes):
+        reader = load_pdf_reader()(io.BytesIO(pdf))
+        return [page.extract_text() or "" for page in reader.pages]
+    # Given a path, pypdf reads the whole file into memory; from an open file it reads objects as needed
+    with open(pdf, "rb") as f:
+        reader = load_pdf_reader()(f)
+        return [page.extract_text() or "" for page in reader.pages]
+
+
+def read_page_texts(pdf: Union[bytes, str]) -> Optional[List[str]]:
+    """
+    Page texts for local preprocessing, or None if the PDF cannot be parsed
+    locally (the model may still manage, so this never raises).
+    """
+    try:
+        return extract_page_texts(pdf)
+    except Exception as e:
+        logger.warning(f"Could not read PDF text layer: {str(e)}")
+        return None
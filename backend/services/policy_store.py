@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from models import BankInfo, ComparisonInput
+
+
+def comparison_fields(bank_info: BankInfo) -> Dict:
+    """The slim per-field view used for comparisons: bank name plus missing/content of every configured field"""
+    return ComparisonInput.model_validate(bank_info).comparison_data()
+
+
+class PolicyStore:
+    """
+    Server-side store of extracted BankInfo records in SQLite.
+
+    One row per source document (keyed by its SHA-256, so re-uploading the same
+    PDF updates its row and keeps its id). Bank name, policy date (effective
+    date, else updated date) and document hash are indexed for lookup. The slim
+    comparison view of each policy is stored alongside the full record (the
+    most recently used ones are kept parsed in memory), as are fingerprints of
+    the source document's page texts for diffing later revisions.
+    """
+
+    def __init__(self, path: str, parsed_cache_entries: int = 1000):
+        self.path = path
+        self.parsed_cache_entries = parsed_cache_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._comparison_data: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS policies ("
+                "id TEXT PRIMARY KEY, document_sha256 TEXT NOT NULL, filename TEXT, "
+                "bank_name TEXT NOT NULL, bank_name_key TEXT NOT NULL, "
+                "effective_date TEXT, updated_date TEXT, policy_date TEXT, is_valid_home_loan_mitc INTEGER NOT NULL, "
+                "bank_info TEXT NOT NULL, comparison_data TEXT NOT NULL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, page_fingerprints TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(policies)")}
+            if "page_fingerprints" not in columns:
+                # Stores created before revisions were tracked
+                conn.execute("ALTER TABLE policies ADD COLUMN page_fingerprints TEXT")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_policies_document ON policies (document_sha256)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_policies_bank ON policies (bank_name_key, policy_date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_policies_date ON policies (policy_date)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def save(
+        self,
+        bank_info: BankInfo,
+        document_sha256: str,
+        filename: Optional[str] = None,
+        page_fingerprints: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Insert or update the policy extracted from a document and return its id.
+
+        Page fingerprints are kept from an earlier save when none are given
+        (e.g. for extraction cache hits, where the text layer is not read).
+        """
+        now = time.time()
+        comparison_data = comparison_fields(bank_info)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO policies (id, document_sha256, filename, bank_name, bank_name_key, effective_date, "
+                "updated_date, policy_date, is_valid_home_loan_mitc, bank_info, comparison_data, created_at, updated_at, "
+                "page_fingerprints) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (document_sha256) DO UPDATE SET filename = excluded.filename, "
+                "bank_name = excluded.bank_name, bank_name_key = excluded.bank_name_key, "
+                "effective_date = excluded.effective_date, updated_date = excluded.updated_date, policy_date = excluded.policy_date, "
+                "is_valid_home_loan_mitc = excluded.is_valid_home_loan_mitc, bank_info = excluded.bank_info, "
+                "comparison_data = excluded.comparison_data, updated_at = excluded.updated_at, "
+                "page_fingerprints = COALESCE(excluded.page_fingerprints, policies.page_fingerprints)",
+                (
+                    uuid.uuid4().hex, document_sha256, filename, bank_info.bank_name, bank_info.bank_name.strip().lower(),
+                    bank_info.effective_date, bank_info.updated_date, bank_info.effective_date or bank_info.updated_date,
+                    int(bank_info.is_valid_home_loan_mitc),
+                    bank_info.model_dump_json(), json.dumps(comparison_data), now, now,
+                    json.dumps(page_fingerprints) if page_fingerprints is not None else None,
+                ),
+            )
+            conn.commit()
+            policy_id, updated_at = conn.execute(
+                "SELECT id, updated_at FROM policies WHERE document_sha256 = ?", (document_sha256,)
+            ).fetchone()
+            self._remember(policy_id, updated_at, comparison_data)
+        return policy_id
+
+    def _remember(self, policy_id: str, updated_at: float, comparison_data: Dict) -> None:
+        self._comparison_data[policy_id] = (updated_at, comparison_data)
+        self._comparison_data.move_to_end(policy_id)
+        while len(self._comparison_data) > self.parsed_cache_entries:
+            self._comparison_data.popitem(last=False)
+
+    def get(self, policy_id: str) -> Optional[Dict]:
+        """Full stored record (metadata plus BankInfo), or None if unknown"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id, document_sha256, filename, created_at, updated_at, bank_info FROM policies WHERE id = ?",
+                (policy_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "policy_id": row[0],
+            "document_sha256": row[1],
+            "filename": row[2],
+            "created_at": row[3],
+            "updated_at": row[4],
+            "bank_info": BankInfo.model_validate_json(row[5]),
+        }
+
+    def get_page_fingerprints(self, policy_id: str) -> Optional[List[str]]:
+        """Page text fingerprints of the policy's source document, or None if not recorded"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT page_fingerprints FROM policies WHERE id = ?", (policy_id,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def get_comparison_data(self, policy_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Slim comparison views for the given ids (unknown ids are left out).
+
+        A parsed view is reused only while its row's updated_at is unchanged,
+        so updates and deletes by other processes sharing the file are seen.
+        """
+        if not policy_ids:
+            return {}
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            placeholders = ",".join("?" for _ in policy_ids)
+            versions = conn.execute(
+                f"SELECT id, updated_at FROM policies WHERE id IN ({placeholders})", list(policy_ids)
+            ).fetchall()
+            stale = []
+            for policy_id, updated_at in versions:
+                cached = self._comparison_data.get(policy_id)
+                if cached is not None and cached[0] == updated_at:
+                    self._comparison_data.move_to_end(policy_id)
+                    found[policy_id] = cached[1]
+                else:
+                    stale.append(policy_id)
+            if stale:
+                placeholders = ",".join("?" for _ in stale)
+                rows = conn.execute(
+                    f"SELECT id, updated_at, comparison_data FROM policies WHERE id IN ({placeholders})", stale
+                ).fetchall()
+                for policy_id, updated_at, comparison_data in rows:
+                    found[policy_id] = json.loads(comparison_data)
+                    self._remember(policy_id, updated_at, found[policy_id])
+        return found
+
+    def search(
+        self,
+        bank_name: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        document_sha256: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict]:
+        """Policy summaries matching all given filters, newest policy date first"""
+        clauses, params = [], []
+        if bank_name:
+            clauses.append("bank_name_key = ?")
+            params.append(bank_name.strip().lower())
+        if date_from:
+            clauses.append("policy_date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("policy_date <= ?")
+            params.append(date_to)
+        if document_sha256:
+            clauses.append("document_sha256 = ?")
+            params.append(document_sha256)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, bank_name, effective_date, updated_date, is_valid_home_loan_mitc, document_sha256, filename, updated_at "
+                f"FROM policies {where} ORDER BY policy_date DESC, updated_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [
+            {
+                "policy_id": row[0],
+                "bank_name": row[1],
+                "effective_date": row[2],
+                "updated_date": row[3],
+                "is_valid_home_loan_mitc": bool(row[4]),
+                "document_sha256": row[5],
+                "filename": row[6],
+                "updated_at": row[7],
+            }
+            for row in rows
+        ]
+
+    def delete(self, policy_id: str) -> bool:
+        """Remove a policy; returns False if it did not exist"""
+        with self._lock:
+            conn = self._connection()
+            deleted = conn.execute("DELETE FROM policies WHERE id = ?", (policy_id,)).rowcount
+            conn.commit()
+            self._comparison_data.pop(policy_id, None)
+        return deleted > 0
@@ -0,0 +1,250 @@
+import json
+import re
+from typing import Dict, List, Tuple
+
+from config.fields import field_config_registry
+
+# Bump whenever a prompt changes in a way that affects model output; the
+# versions are part of the extraction and comparison cache keys
+EXTRACTION_PROMPT_VERSION = "2"
+COMPARISON_PROMPT_VERSION = "5"
+
+# Per-request slots are written as {{name}} in the templates below
+_SLOT_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+
+class PromptTemplate:
+    """Prompt text pre-split into static segments and the per-request slots between them"""
+
+    def __init__(self, segments: List[str], slots: List[str]):
+        self.segments = segments
+        self.slots = slots
+
+    @classmethod
+    def compile(cls, template: str, **static_values: str) -> "PromptTemplate":
+        """
+        Split template on its {{slot}} markers. Slots named in static_values are
+        filled in now; the rest are left for render(). Static values are never
+        scanned for slot markers, so config text can contain braces safely.
+        """
+        parts = _SLOT_PATTERN.split(template)
+        segments = [parts[0]]
+        slots = []
+        for name, text in zip(parts[1::2], parts[2::2]):
+            if name in static_values:
+                segments[-1] += static_values[name] + text
+            else:
+                slots.append(name)
+                segments.append(text)
+        return cls(segments, slots)
+
+    def render(self, **values) -> str:
+        """Fill in the per-request slots"""
+        pieces = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            pieces.append(str(values[slot]))
+            pieces.append(segment)
+        return "".join(pieces)
+
+
+EXTRACTION_TEMPLATE = """\
+Analyze this bank policy document (filename: {{filename}}) and extract the following information with evidence.
+
+**DOCUMENT VALIDATION (CRITICAL - ANALYZE FIRST):**
+Before extracting any information, determine if this is a valid home loan MITC (Most Important Terms and Conditions) document:
+- Check if it contains home loan/housing loan related terms
+- Look for typical MITC sections like fees, charges, prepayment, LTV, eligibility, tenure
+- Verify it's an official bank policy document (not marketing material, application forms, or unrelated documents)
+- If invalid, set is_valid_home_loan_mitc=false and provide validation_reason explaining why
+
+**NORMALIZATION RULES (CRITICAL - APPLY TO ALL EXTRACTED CONTENT):**
+When extracting and summarizing information, normalize units, currency, and terminology:
+
+**Currency & Units:**
+- Convert ₹/Rs/Rs./Rupees → "INR"
+- Convert L/Lac/Lakh → "Lakh" (standardize to "Lakh")
+- Convert Cr/Crore → "Crore" (standardize to "Crore")
+- Keep percentages as % but ensure consistent format (e.g., "2.5%" not "2.5 percent")
+- Standardize amounts: "INR 5 Lakh", "INR 2.5 Crore", "0.5%"
+
+**Terminology Standardization:**
+- Credit score/CIBIL score/Credit rating → "Credit Score"
+- Pre-closure/Foreclosure/Early closure/Prepayment → "Prepayment"
+- Tenure/Term/Loan period/Repayment period → "Tenure"
+- Processing fee/Administrative fee/Handling charges → "Processing Fee"
+- Part payment/Partial prepayment → "Partial Prepayment"
+- ROI/Interest rate/Rate of interest → "Interest Rate"
+- EMI/Installment/Monthly payment → "EMI"
+- Loan amount/Principal/Loan quantum → "Loan Amount"
+- Income proof/Salary certificate/Income documents → "Income Proof"
+
+**Format Consistency:**
+- Use consistent date formats when mentioning policy dates
+- Standardize ranges: "INR 25 Lakh to INR 5 Crore" (not "25L-5Cr")
+- Use standard percentage format: "up to 80% LTV" (not "upto 80 percent LTV")
+- Standardize tenure format: "up to 30 years" (not "upto 30 yrs")
+
+**CHAIN OF THOUGHT APPROACH:**
+For each field below, follow this reasoning:
+1. First, search thoroughly through the document for relevant information
+2. If you find relevant information: set missing=false, provide normalized content and evidence
+3. If you don't find information: set missing=true, leave content and evidence as null/empty
+4. ALWAYS apply normalization rules to the content field before finalizing
+
+**FIELDS TO EXTRACT:**
+
+1. **Bank Name**: Extract the short form name (e.g., ICICI, HDFC, SBI, DBS, AXIS, etc.)
+
+2. **Document Validation**:
+   - is_valid_home_loan_mitc: true/false based on whether this is a valid home loan MITC document
+   - validation_reason: explanation if invalid (e.g., "This appears to be a credit card terms document", "This is a marketing brochure, not MITC", "Document is not related to home loans")
+
+3. **Policy Dates (CRITICAL - LOOK FOR THESE FIRST)**:
+   Search for policy dates in this priority order:
+   - effective_date: Look for "effective from", "effective date", "comes into effect", "applicable from", "valid from"
+   - updated_date: Look for "updated on", "revised on", "modified on", "last updated", "version date"
+   - Convert dates to ISO format: YYYY-MM-DD (assume Asia/Kolkata timezone)
+   - date_source: Indicate which date was found ("effective_date", "updated_date", or "not_found")
+   - Examples: "15th March 2024" → "2024-03-15", "1st April 2025" → "2025-04-01"
+   - If multiple dates found, prefer effective_date over updated_date
+{{field_instructions}}
+
+**RESPONSE FORMAT:**
+For each field:
+- **missing**: boolean (true if not found, false if found)
+- **content**: string (only if missing=false) - Brief explanation/summary of what was found
+- **evidence**: array (only if missing=false) - List of supporting evidence with page numbers and exact text snippets
+
+**LOGIC:**
+- If missing=true: content and evidence should be null/empty
+- If missing=false: content and evidence must be provided with actual findings
+"""
+
+COMPARISON_TEMPLATE = """\
+Compare the following {{bank_count}} banks' policy information and create a detailed comparison analysis:
+
+Banks to compare: {{bank_names}}
+
+**NORMALIZATION FOR COMPARISON (APPLY FIRST):**
+Before comparing, mentally normalize all units and terminology:
+- Currency: ₹/Rs/Rs./Rupees → INR, L/Lac/Lakh → Lakh, Cr/Crore → Crore
+- Terms: Credit score/CIBIL → Credit Score, Pre-closure/Foreclosure → Prepayment, etc.
+- Formats: Standardize ranges, percentages, and amounts for accurate comparison
+
+**COMPARISON LOGIC:**
+For each field ({{field_keys}}),
+compare across all banks and assign one of these statuses:
+
+1. **SAME**: Information is semantically equivalent across banks (even if worded differently or using different units)
+2. **DIFF**: Information is clearly different between banks (after normalization)
+3. **MISSING**: Information is not available in this specific bank (missing=true)
+4. **SUSPECT**: Information contains issues like:
+   - Conflicting information within the same bank's data
+   - Overlapping/contradictory ranges or thresholds
+   - Ambiguous language that could be interpreted multiple ways
+   - Inconsistent units or formats that couldn't be normalized
+   - Incomplete conditions or missing qualifying criteria
+
+**BANK DATA (JSON):**
+{{bank_data}}
+
+**INSTRUCTIONS:**
+1. For each of the {{field_count}} fields, compare all banks
+2. For each bank-field combination, provide:
+   - status: SAME/DIFF/MISSING/SUSPECT
+   - explanation: Brief reason for the status
+   - details: Additional context if needed (optional)
+   - equivalent_to: bank_ids (from BANK DATA) whose information for this field is semantically equivalent to this bank's; empty list if none
+
+3. Create a summary with counts of each status type across all comparisons
+
+**IMPORTANT:**
+- SUSPECT is critical - flag any contradictory, ambiguous, or incomplete information
+- SAME means semantically equivalent after normalization (not exact text match) to every other bank listed for that field
+- Apply normalization rules before comparison: "INR 5 Lakh" = "Rs 5 L" = "5 Lac"
+- Compare based on normalized content for each bank
+- If a field is missing in one bank (missing=true), that specific cell should be MISSING
+- Only the fields and banks listed in BANK DATA need a result; other cells are already decided
+- Entries marked "reference_only": true are already decided: compare the other banks against them (and list them in equivalent_to when equivalent), but return no cell for them
+- Consider "Prepayment penalty 2%" and "Foreclosure charge 2%" as SAME after normalization
+"""
+
+
+PAGE_TEXT_TEMPLATE = """\
+The document {{filename}} has {{total_pages}} pages. Below is the text layer of the
+{{page_count}} pages relevant to the requested fields; the other pages were omitted.
+Each page starts with a "=== Page N ===" marker giving its ORIGINAL page number:
+use those numbers for evidence page_number.
+
+{{pages}}
+"""
+
+
+def _field_instructions(config: Dict) -> str:
+    # Fields 1-3 (bank name, validation, dates) are fixed in the template
+    return "".join(
+        f"\n{number}. **{field_info['display_name']}**: {field_info['description']}"
+        for number, field_info in enumerate(config.values(), start=4)
+    )
+
+
+# Compiled templates for the most recent field-config fingerprint
+_compiled: Dict[str, PromptTemplate] = {}
+_compiled_fingerprint = None
+
+
+def _get_compiled(name: str) -> PromptTemplate:
+    global _compiled, _compiled_fingerprint
+    snapshot = field_config_registry.snapshot()
+    if snapshot.fingerprint != _compiled_fingerprint:
+        _compiled = {
+            "extraction": PromptTemplate.compile(
+                EXTRACTION_TEMPLATE,
+                field_instructions=_field_instructions(snapshot.config),
+            ),
+            "extraction_subset": PromptTemplate.compile(EXTRACTION_TEMPLATE),
+            "comparison": PromptTemplate.compile(COMPARISON_TEMPLATE),
+            "page_text": PromptTemplate.compile(PAGE_TEXT_TEMPLATE),
+        }
+        _compiled_fingerprint = snapshot.fingerprint
+    return _compiled[name]
+
+
+def canonical_json(data) -> str:
+    """Compact, key-sorted JSON used to embed data in prompts and cache keys"""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def build_extraction_prompt(filename: str) -> str:
+    """Build the extraction prompt for one document"""
+    return _get_compiled("extraction").render(filename=filename)
+
+
+def build_field_extraction_prompt(filename: str, field_keys: List[str]) -> str:
+    """Build the extraction prompt for one document, limited to the given fields"""
+    config = field_config_registry.snapshot().config
+    return _get_compiled("extraction_subset").render(
+        filename=filename,
+        field_instructions=_field_instructions({field_key: config[field_key] for field_key in field_keys}),
+    )
+
+
+def build_page_text_document(filename: str, pages: List[Tuple[int, str]], total_pages: int) -> str:
+    """Render selected (page number, text) pages as a text document in place of the PDF"""
+    return _get_compiled("page_text").render(
+        filename=filename,
+        total_pages=total_pages,
+        page_count=len(pages),
+        pages="\n\n".join(f"=== Page {number} ===\n{text.strip()}" for number, text in pages),
+    )
+
+
+def build_comparison_prompt(bank_names: List[str], banks_data: Dict, field_keys: List[str]) -> str:
+    """Build the comparison prompt for a set of banks, limited to the given fields"""
+    return _get_compiled("comparison").render(
+        bank_count=len(bank_names),
+        bank_names=", ".join(bank_names),
+        bank_data=canonical_json(banks_data),
+        field_keys=", ".join(field_keys),
+        field_count=len(field_keys),
+    )
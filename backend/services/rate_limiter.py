@@ -0,0 +1,264 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from services.metrics import CallbackGauge, registry
+
+
+class SharedTokenBucket:
+    """
+    Requests-per-minute token bucket for one model kept in a local SQLite file,
+    so every process on the host using the same file draws from one budget.
+
+    Each take is a single IMMEDIATE transaction (refill, take, write back);
+    throttling pauses are shared the same way. Times are wall-clock so they
+    compare across processes.
+    """
+
+    def __init__(self, path: str, name: str, requests_per_minute: float, capacity: float):
+        self.path = path
+        self.name = name
+        self.rate = requests_per_minute / 60.0
+        self.capacity = capacity
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, refilled_at REAL NOT NULL, paused_until REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _update(self, change) -> Optional[float]:
+        """Apply change(tokens, refilled_at, paused_until, now) -> (state, result) atomically across processes"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT tokens, refilled_at, paused_until FROM rate_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                state, result = change(*(row or (self.capacity, now, 0.0)), now)
+                conn.execute("INSERT OR REPLACE INTO rate_buckets VALUES (?, ?, ?, ?)", (self.name, *state))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def take(self) -> float:
+        """Take a token if available; otherwise return how long until one is"""
+        def change(tokens, refilled_at, paused_until, now):
+            if now < paused_until:
+                return (tokens, refilled_at, paused_until), paused_until - now
+            tokens = min(self.capacity, tokens + max(0.0, now - refilled_at) * self.rate)
+            if tokens >= 1:
+                return (tokens - 1, now, paused_until), 0.0
+            return (tokens, now, paused_until), (1 - tokens) / self.rate
+        return self._update(change)
+
+    def pause(self, seconds: float) -> None:
+        """Stop every process from starting calls for the given time and empty the bucket"""
+        def change(tokens, refilled_at, paused_until, now):
+            return (0.0, now, max(paused_until, now + seconds)), None
+        self._update(change)
+
+
+class AdaptiveRateLimiter:
+    """
+    Process-wide limiter for calls to one model.
+
+    Combines a token bucket (requests per minute quota) with an AIMD
+    concurrency window: every success grows the window by 1/window, a
+    throttling error (429/503) halves it and pauses new calls for the
+    provider's retry-after hint. Throttles of calls that started before the
+    last decrease belong to the same overload, so they only extend the pause.
+    With a shared_bucket the quota and pauses are shared with other
+    processes; the concurrency window stays per process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        burst: Optional[int] = None,
+        default_pause: float = 1.0,
+        shared_bucket: Optional[SharedTokenBucket] = None,
+    ):
+        self.name = name
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, max_concurrency))
+        self.tokens = self.capacity
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.default_pause = default_pause
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._decreased_at = float("-inf")
+        self._refilled_at = time.monotonic()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.shared_bucket = shared_bucket
+
+    def _take_token(self) -> float:
+        """Take a token if available; otherwise return how long until one is"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        self.tokens = min(self.capacity, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def _reserve(self) -> float:
+        if self.shared_bucket is None:
+            return self._take_token()
+        return await asyncio.to_thread(self.shared_bucket.take)
+
+    async def acquire(self) -> None:
+        """Wait for a concurrency slot and a rate token"""
+        while self.in_flight >= int(self.concurrency_limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken by release() but cancelled before resuming: pass the slot on
+                    self._wake_waiters()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+        try:
+            while True:
+                wait = await self._reserve()
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self) -> None:
+        """Give back a concurrency slot and wake waiters that now fit in the window"""
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        free = int(self.concurrency_limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def record_success(self) -> None:
+        """Additive increase of the concurrency window"""
+        self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+
+    async def record_throttle(self, retry_after: Optional[float] = None, started_at: Optional[float] = None) -> None:
+        """
+        Multiplicative decrease of the window and a pause before the next call.
+
+        started_at is when the throttled call got its slot (time.monotonic());
+        the window is not decreased again for calls started before the last decrease.
+        """
+        if started_at is None or started_at >= self._decreased_at:
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+            self._decreased_at = time.monotonic()
+        pause = retry_after if retry_after is not None else self.default_pause
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+        self.tokens = 0.0
+        if self.shared_bucket is not None:
+            # The pause is a blocking SQLite transaction, like take()
+            await asyncio.to_thread(self.shared_bucket.pause, pause)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a concurrency slot and rate token for the duration of one call; yields when the call started"""
+        await self.acquire()
+        try:
+            yield time.monotonic()
+        finally:
+            self.release()
+
+
+# Default quotas per model (requests per minute, max concurrent calls); can be
+# overridden with e.g. GEMINI_2_5_PRO_RPM / GEMINI_2_5_PRO_MAX_CONCURRENCY
+DEFAULT_MODEL_LIMITS = {
+    "gemini-2.5-pro": (150, 16),
+    "gemini-2.5-flash": (1000, 64),
+}
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+# SQLite file holding the requests-per-minute budgets shared by all processes
+# on this host (set automatically by `python main.py --workers N`); empty
+# keeps each process's budget in memory
+RATE_LIMIT_STATE_ENV = "RATE_LIMIT_STATE_PATH"
+
+
+def _env_prefix(model: str) -> str:
+    return model.upper().replace("-", "_").replace(".", "_")
+
+
+def model_max_concurrency(model: str) -> int:
+    """Largest concurrency window of a model's limiter, from env/default quotas"""
+    default_concurrency = DEFAULT_MODEL_LIMITS.get(model, (60, 8))[1]
+    return int(os.getenv(f"{_env_prefix(model)}_MAX_CONCURRENCY", str(default_concurrency)))
+
+
+def get_rate_limiter(model: str) -> AdaptiveRateLimiter:
+    """Get the shared limiter for a model, creating it from env/default quotas on first use"""
+    limiter = _limiters.get(model)
+    if limiter is None:
+        default_rpm = DEFAULT_MODEL_LIMITS.get(model, (60, 8))[0]
+        rpm = float(os.getenv(f"{_env_prefix(model)}_RPM", str(default_rpm)))
+        max_concurrency = model_max_concurrency(model)
+        state_path = os.getenv(RATE_LIMIT_STATE_ENV)
+        limiter = AdaptiveRateLimiter(
+            name=model,
+            requests_per_minute=rpm,
+            max_concurrency=max_concurrency,
+            shared_bucket=SharedTokenBucket(state_path, model, rpm, capacity=float(max(1, max_concurrency))) if state_path else None,
+        )
+        _limiters[model] = limiter
+    return limiter
+
+
+def reset_rate_limiters() -> None:
+    """Forget all limiters so the next calls start fresh from the current env quotas"""
+    _limiters.clear()
+
+
+registry.register(CallbackGauge(
+    "model_in_flight", "Model calls currently holding a rate-limiter slot", ["model"],
+    lambda: {(name,): limiter.in_flight for name, limiter in _limiters.items()},
+))
+registry.register(CallbackGauge(
+    "model_concurrency_limit", "Current adaptive (AIMD) concurrency window per model", ["model"],
+    lambda: {(name,): limiter.concurrency_limit for name, limiter in _limiters.items()},
+))
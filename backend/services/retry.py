@@ -0,0 +1,78 @@
+import random
+import re
+from typing import Optional
+
+# HTTP status codes from the model API that can succeed when retried
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Status codes meaning "slow down": quota exhausted or provider overloaded
+THROTTLE_STATUS_CODES = {429, 503}
+
+_DURATION_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)s\s*$")
+
+
+class MalformedResponseError(Exception):
+    """The model answered but its output could not be parsed into the response schema"""
+
+
+class ModelTimeoutError(TimeoutError):
+    """A model call did not answer within its time limit"""
+
+
+def error_status_code(error: Exception) -> Optional[int]:
+    """HTTP status code of a model API error (google.genai APIError exposes it as .code)"""
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """True for transient failures: throttling, server errors, timeouts, network errors, unparsable output"""
+    if isinstance(error, (MalformedResponseError, TimeoutError, ConnectionError)):
+        return True
+
+    code = error_status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+
+    # httpx transport errors (connection resets, read timeouts) raised by the SDK
+    return any(cls.__name__ in ("TransportError", "TimeoutException") for cls in type(error).__mro__)
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """True if the provider asked us to slow down"""
+    return error_status_code(error) in THROTTLE_STATUS_CODES
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Server-provided retry delay, from a Retry-After header or a google.rpc.RetryInfo detail"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            value = headers.get("retry-after")
+            if value is not None:
+                return float(value)
+        except (TypeError, ValueError):
+            pass
+
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details", []) or []:
+            if isinstance(detail, dict) and "retryDelay" in detail:
+                match = _DURATION_PATTERN.match(str(detail["retryDelay"]))
+                if match:
+                    return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None, base: float = 1.0, cap: float = 30.0) -> float:
+    """
+    Delay before retry number attempt + 1.
+
+    Uses exponential backoff with full jitter so concurrent callers that fail
+    together do not retry together; a server retry-after hint is a lower bound.
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
@@ -0,0 +1,149 @@
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, create_model
+
+from config.fields import get_field_keys
+from models import BankInfo, FieldChange, FieldWithEvidence
+from services.comparison_rules import normalize_content
+from services.page_pruning import score_pages
+
+# Document-level BankInfo attributes; they sit on the first page, so they are
+# re-read whenever a revision changes it
+HEADER_FIELDS = ["bank_name", "is_valid_home_loan_mitc", "validation_reason", "effective_date", "updated_date", "date_source"]
+
+
+def page_fingerprints(page_texts: List[str]) -> List[Optional[str]]:
+    """Whitespace- and case-insensitive hash of each page's text (None for pages without text)"""
+    fingerprints = []
+    for text in page_texts:
+        normalized = " ".join(text.lower().split())
+        fingerprints.append(hashlib.sha256(normalized.encode("utf-8")).hexdigest() if normalized else None)
+    return fingerprints
+
+
+def revisable_fields() -> List[str]:
+    """Configured fields that are stored on BankInfo, in configuration order"""
+    return [field_key for field_key in get_field_keys() if field_key in BankInfo.model_fields]
+
+
+@lru_cache(maxsize=128)
+def revision_schema(field_keys: Tuple[str, ...]) -> Type[BaseModel]:
+    """Response schema holding the header fields plus only the given fields of BankInfo"""
+    return create_model(
+        "BankInfoRevision",
+        **{name: (BankInfo.model_fields[name].annotation, BankInfo.model_fields[name]) for name in [*HEADER_FIELDS, *field_keys]},
+    )
+
+
+@dataclass
+class RevisionPlan:
+    """What a revision changed and what has to be extracted again"""
+    page_map: Dict[int, int]  # previous page number -> page number in the revision, for unchanged pages
+    changed_pages: List[int]  # pages of the revision not found unchanged in the previous version
+    reextract: List[str]
+    carried_forward: List[str]
+    pages_to_send: List[int]
+
+    @property
+    def needs_model(self) -> bool:
+        # Unchanged first page and no stale fields: the previous extraction still holds
+        return bool(self.reextract) or 1 in self.changed_pages
+
+
+def plan_revision(previous: BankInfo, previous_fingerprints: List[Optional[str]], page_texts: List[str]) -> RevisionPlan:
+    """
+    Diff a revised document against the page fingerprints of the previous version.
+
+    Pages are matched by content, so inserted or removed pages do not mark the
+    rest of the document as changed. A field is re-extracted when any page its
+    evidence cited is gone or edited, or when a changed page mentions it (a
+    newly added clause); otherwise it is carried forward.
+    """
+    fingerprints = page_fingerprints(page_texts)
+    positions: Dict[str, List[int]] = {}
+    for number, fingerprint in enumerate(fingerprints, start=1):
+        if fingerprint is not None:
+            positions.setdefault(fingerprint, []).append(number)
+
+    # Repeated identical pages are paired up in document order
+    page_map = {}
+    for number, fingerprint in enumerate(previous_fingerprints, start=1):
+        candidates = positions.get(fingerprint) if fingerprint is not None else None
+        if candidates:
+            page_map[number] = candidates.pop(0)
+    unchanged = set(page_map.values())
+    changed_pages = [number for number in range(1, len(page_texts) + 1) if number not in unchanged]
+
+    scores = score_pages(page_texts)
+    reextract, carried_forward = [], []
+    pages_to_send = {1, *changed_pages}
+    for field_key in revisable_fields():
+        cited = {e.page_number for e in getattr(previous, field_key).evidence or [] if e.page_number is not None}
+        mentioned = any(scores[field_key][number - 1] > 0 for number in changed_pages)
+        if mentioned or any(page not in page_map for page in cited):
+            reextract.append(field_key)
+            # Unchanged pages the field was found on are still needed for its full content
+            pages_to_send.update(page_map[page] for page in cited if page in page_map)
+        else:
+            carried_forward.append(field_key)
+
+    return RevisionPlan(
+        page_map=page_map,
+        changed_pages=changed_pages,
+        reextract=reextract,
+        carried_forward=carried_forward,
+        pages_to_send=sorted(pages_to_send),
+    )
+
+
+def carry_forward(value: FieldWithEvidence, page_map: Dict[int, int]) -> FieldWithEvidence:
+    """Copy of a field with its evidence moved to the pages' positions in the revision"""
+    value = value.model_copy(deep=True)
+    for evidence in value.evidence or []:
+        evidence.page_number = page_map.get(evidence.page_number, evidence.page_number)
+        evidence.verification = None
+        evidence.reported_page_number = None
+    return value
+
+
+def _content_key(value: FieldWithEvidence) -> Optional[str]:
+    return None if value.missing or not value.content else normalize_content(value.content)
+
+
+def field_changelog(previous: BankInfo, revised: BankInfo, carried_forward: List[str]) -> List[FieldChange]:
+    """Per-field changes between two versions of a policy"""
+    changelog = []
+    for field_key in revisable_fields():
+        before, after = getattr(previous, field_key), getattr(revised, field_key)
+        if field_key in carried_forward:
+            status = "carried_forward"
+        else:
+            status = "unchanged" if _content_key(before) == _content_key(after) else "changed"
+        changelog.append(FieldChange(
+            field_name=field_key,
+            status=status,
+            previous_content=None if before.missing else before.content,
+            content=None if after.missing else after.content,
+        ))
+    return changelog
+
+
+def apply_revision(previous: BankInfo, plan: RevisionPlan, extracted: Optional[BaseModel]) -> BankInfo:
+    """
+    Merge a partial extraction of the revision into the previous version.
+
+    extracted holds the header and re-extracted fields (None when the plan
+    needed no model call); every other field is carried forward.
+    """
+    values = {}
+    for name, value in previous:
+        if isinstance(value, FieldWithEvidence):
+            values[name] = getattr(extracted, name) if name in plan.reextract else carry_forward(value, plan.page_map)
+        elif name in HEADER_FIELDS and extracted is not None:
+            values[name] = getattr(extracted, name)
+        else:
+            values[name] = value
+    return BankInfo(**values)
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Tuple, TypeVar
+
+from services.metrics import SINGLE_FLIGHT_CALLS
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """One in-flight call and the number of callers waiting on it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls that share a key into one in-flight call.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs wait on the same task and get its result or exception.
+    A cancelled caller only stops waiting: the call itself is cancelled once
+    no caller is left. Finished calls are forgotten right away, so results
+    are not reused afterwards (that is what the caches are for).
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        # Keyed per event loop, since tasks cannot be awaited across loops
+        self._flights: Dict[Tuple[int, str], _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Run call() unless the same key is already in flight; returns the result and whether it was shared"""
+        flight_key = (id(asyncio.get_running_loop()), key)
+        flight = self._flights.get(flight_key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[flight_key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+        SINGLE_FLIGHT_CALLS.inc(operation=self.operation, role="shared" if shared else "leader")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Callers arriving from now on start a fresh call
+                self._forget(flight_key, flight)
+                flight.task.cancel()
+
+    def _forget(self, flight_key: Tuple[int, str], flight: _Flight) -> None:
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+        # Nobody may be left to see the outcome of an abandoned call
+        if flight.task.done() and not flight.task.cancelled():
+            flight.task.exception()
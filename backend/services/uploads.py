@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+from fastapi import UploadFile
+
+# PDF files start with "%PDF-"; the spec tolerates leading junk within the first 1 KB
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadRejectedError(Exception):
+    """The upload was refused (not a PDF, or over a size limit); the message is user-facing"""
+
+
+class BatchBudget:
+    """Running total of bytes of the files accepted for one batch, enforcing the batch size limit"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+
+    def check(self, size: int) -> None:
+        """Raise if a file of this size would not fit in what is left of the batch"""
+        if self.used + size > self.max_bytes:
+            raise UploadRejectedError(f"Batch exceeds the {self.max_bytes // (1024 * 1024)} MB upload limit")
+
+    def consume(self, size: int) -> None:
+        """Charge an accepted file against the batch"""
+        self.check(size)
+        self.used += size
+
+
+class SpooledPDF:
+    """
+    A PDF spooled to a file on disk, with its size and SHA-256 computed while spooling.
+
+    Work that may outlive the request that spooled the file (an extraction
+    shared with other requests) retains it; cleanup() then only removes the
+    file once the last retainer has released it.
+    """
+
+    def __init__(self, path: str, size: int, sha256: Optional[str] = None, delete: bool = True):
+        self.path = path
+        self.size = size
+        self._sha256 = sha256
+        self.delete = delete
+        self._retained = 0
+        self._cleanup_requested = False
+
+    @classmethod
+    def from_path(cls, path: str, delete: bool = False) -> "SpooledPDF":
+        """Wrap an existing file on disk (hash computed lazily)"""
+        return cls(path, os.path.getsize(path), delete=delete)
+
+    @property
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            with open(self.path, "rb") as f:
+                for chunk in iter(lambda: f.read(SPOOL_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            self._sha256 = digest.hexdigest()
+        return self._sha256
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def retain(self) -> None:
+        """Keep the spool file until a matching release(), even if cleanup() is called meanwhile"""
+        self._retained += 1
+
+    def release(self) -> None:
+        self._retained -= 1
+        if self._cleanup_requested:
+            self.cleanup()
+
+    def cleanup(self) -> None:
+        """Remove the spool file if this object owns it and nothing retains it (safe to call more than once)"""
+        self._cleanup_requested = True
+        if self._retained == 0 and self.delete and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def spool_upload(
+    file: UploadFile,
+    max_bytes: int,
+    budget: Optional[BatchBudget] = None,
+    spool_dir: Optional[str] = None,
+) -> SpooledPDF:
+    """
+    Copy an upload to a temporary file chunk by chunk, hashing it on the fly.
+
+    Raises UploadRejectedError if the content is not a PDF or exceeds
+    max_bytes (or the batch budget, which is only charged for accepted files);
+    memory use stays at one chunk and writes run off the event loop.
+    """
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=spool_dir)
+    digest = hashlib.sha256()
+    size = 0
+    header = b""
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if len(header) < PDF_MAGIC_WINDOW:
+                    header += chunk[:PDF_MAGIC_WINDOW - len(header)]
+                    if len(header) >= PDF_MAGIC_WINDOW and PDF_MAGIC not in header:
+                        raise UploadRejectedError("File is not a PDF")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejectedError(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+                if budget is not None:
+                    budget.check(size)
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+
+        if PDF_MAGIC not in header:
+            raise UploadRejectedError("File is not a PDF")
+        # Only accepted files count against the batch
+        if budget is not None:
+            budget.consume(size)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    return SpooledPDF(path, size, digest.hexdigest())
@@ -0,0 +1,66 @@
+import asyncio
+from unittest.mock import patch
+
+from benchmark import Scenario, ScenarioResult, find_regressions, main, run_scenario
+from services.fake_model import FakeModelClient, FakeModelConfig
+
+FAST = {"gemini-2.5-pro": 0.001, "gemini-2.5-flash": 0.001}
+
+
+class TestBenchmarkHarness:
+    """Tests for the offline benchmark harness"""
+
+    def test_scenarios_drive_the_app_with_the_fake_model(self):
+        config = FakeModelConfig(median_latency=FAST)
+        extract = asyncio.run(run_scenario(Scenario("extract", "extract", size=3, concurrency=2, requests=4), config, model_rpm=100000))
+        compare = asyncio.run(run_scenario(Scenario("compare", "compare", size=3, concurrency=2, requests=2), config, model_rpm=100000))
+
+        assert (extract.requests, extract.errors, extract.model_calls) == (4, 0, 12)
+        assert extract.p50_ms <= extract.p95_ms <= extract.p99_ms
+        assert extract.throughput_rps > 0 and extract.peak_memory_mb > 0
+        # One model call per undecided field
+        assert (compare.requests, compare.errors, compare.model_calls) == (2, 0, 14)
+
+    @patch('routes.pdf_routes.backoff_delay', return_value=0)
+    def test_injected_throttling_is_retried(self, _):
+        config = FakeModelConfig(median_latency=FAST, throttle_rate=0.5, seed=3)
+        result = asyncio.run(run_scenario(Scenario("extract", "extract", size=4, concurrency=1, requests=2), config, model_rpm=100000))
+        assert result.model_calls > 8
+
+    def test_regressions_against_baseline(self):
+        baseline = {"s": {"throughput_rps": 10.0, "p95_ms": 100.0, "peak_memory_mb": 2.0, "errors": 0}}
+        steady = ScenarioResult("s", 4, 0, 9.0, 50.0, 110.0, 120.0, 2.5, 4)
+        slower = ScenarioResult("s", 4, 1, 5.0, 50.0, 200.0, 220.0, 2.0, 4)
+        unknown = ScenarioResult("new", 4, 0, 1.0, 1.0, 1.0, 1.0, 1.0, 4)
+
+        assert find_regressions([steady, unknown], baseline, tolerance=0.25, memory_tolerance=0.5) == []
+        regressions = find_regressions([slower], baseline, tolerance=0.25, memory_tolerance=0.5)
+        assert len(regressions) == 3
+
+    def test_cli_saves_and_checks_baseline(self, tmp_path, capsys):
+        path = str(tmp_path / "baseline.json")
+        args = ["--batch-sizes", "1", "--bank-counts", "2", "--concurrency", "1", "--requests", "1",
+                "--pro-latency", "0.001", "--flash-latency", "0.001"]
+        assert main(args + ["--save-baseline", path]) == 0
+        assert main(args + ["--baseline", path, "--tolerance", "100", "--memory-tolerance", "100"]) == 0
+        assert "No regressions" in capsys.readouterr().out
+
+
+class TestFakeModelClient:
+    """Tests for the simulated model backend"""
+
+    def test_failure_and_throttle_rates(self):
+        from google.genai.errors import ClientError, ServerError
+
+        fake = FakeModelClient(FakeModelConfig(median_latency=FAST, failure_rate=0.3, throttle_rate=0.2, seed=1))
+        outcomes = {"ok": 0, "429": 0, "500": 0}
+        for _ in range(200):
+            try:
+                fake.models.generate_content(model="gemini-2.5-flash", contents=["x"], config={"response_schema": None})
+                outcomes["ok"] += 1
+            except ClientError:
+                outcomes["429"] += 1
+            except ServerError:
+                outcomes["500"] += 1
+        assert 20 <= outcomes["429"] <= 60
+        assert 40 <= outcomes["500"] <= 80
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+from unittest.mock import Mock
+
+from models import BankInfo, FieldWithEvidence
+from routes.pdf_routes import process_pdf_with_retry
+from services.cache import SQLiteCache, make_cache_key
+
+
+def make_response(bank_name: str) -> Mock:
+    response = Mock()
+    response.parsed = BankInfo(
+        bank_name=bank_name,
+        is_valid_home_loan_mitc=True,
+        fees_and_charges=FieldWithEvidence(missing=True),
+        prepayment=FieldWithEvidence(missing=True),
+        ltv_bands=FieldWithEvidence(missing=True),
+        eligibility=FieldWithEvidence(missing=True),
+        tenure=FieldWithEvidence(missing=True),
+        interest_reset=FieldWithEvidence(missing=True),
+        documents_required=FieldWithEvidence(missing=True)
+    )
+    return response
+
+
+class TestSQLiteCache:
+    """Tests for the SQLite-backed cache"""
+
+    def test_persists_across_instances(self, tmp_path):
+        """Entries written by one cache instance are visible to another on the same file"""
+        path = str(tmp_path / "cache.sqlite3")
+        SQLiteCache(path).set("key", "value")
+        assert SQLiteCache(path).get("key") == "value"
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted once max_entries is exceeded"""
+        cache = SQLiteCache(":memory:", max_entries=2, touch_interval_seconds=0)
+        cache.set("a", "1")
+        time.sleep(0.01)
+        cache.set("b", "2")
+        time.sleep(0.01)
+        assert cache.get("a") == "1"  # touch "a" so "b" becomes least recently used
+        time.sleep(0.01)
+        cache.set("c", "3")
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+
+    def test_reads_within_touch_interval_do_not_write(self):
+        """A hit only rewrites the access time once the last one is older than the touch interval"""
+        cache = SQLiteCache(":memory:", touch_interval_seconds=0.05)
+        cache.set("key", "value")
+        writes = cache._connection().total_changes
+        for _ in range(3):
+            assert cache.get("key") == "value"
+        assert cache._connection().total_changes == writes
+
+        time.sleep(0.06)
+        assert cache.get("key") == "value"
+        assert cache._connection().total_changes == writes + 1
+
+    def test_ttl_expiry(self):
+        """Entries older than the TTL are not returned"""
+        cache = SQLiteCache(":memory:", ttl_seconds=0.05)
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        time.sleep(0.1)
+        assert cache.get("key") is None
+
+    def test_make_cache_key_is_order_sensitive(self):
+        """Keys differ when any component differs"""
+        assert make_cache_key("a", "b") == make_cache_key("a", "b")
+        assert make_cache_key("a", "b") != make_cache_key("b", "a")
+
+
+class TestExtractionCache:
+    """Tests for caching of PDF extractions"""
+
+    def test_repeat_upload_is_served_from_cache(self, mock_client):
+        """The same PDF bytes are only sent to the model once"""
+        mock_client.models.generate_content.return_value = make_response("HDFC")
+
+        first = asyncio.run(process_pdf_with_retry(b"%PDF-1.4 same bytes", "hdfc.pdf"))
+        second = asyncio.run(process_pdf_with_retry(b"%PDF-1.4 same bytes", "hdfc-copy.pdf"))
+
+        assert first.cached is False
+        assert second.cached is True
+        assert second.filename == "hdfc-copy.pdf"
+        assert second.bank_info == first.bank_info
+        assert mock_client.models.generate_content.call_count == 1
+
+    def test_failures_are_not_cached(self, mock_client):
+        """A failed extraction is retried on the next upload"""
+        mock_client.models.generate_content.side_effect = [Exception("API Error"), make_response("SBI")]
+
+        first = asyncio.run(process_pdf_with_retry(b"%PDF-1.4 sbi", "sbi.pdf", max_retries=1))
+        second = asyncio.run(process_pdf_with_retry(b"%PDF-1.4 sbi", "sbi.pdf", max_retries=1))
+
+        assert first.status == "failed"
+        assert second.status == "success"
+        assert second.cached is False
+
+    def test_field_config_change_invalidates_entries(self, mock_client, tmp_path, monkeypatch):
+        """Changing FIELD_CONFIG_FILE produces a different cache key"""
+        mock_client.models.generate_content.return_value = make_response("ICICI")
+        asyncio.run(process_pdf_with_retry(b"%PDF-1.4 icici", "icici.pdf"))
+
+        config_file = tmp_path / "fields.json"
+        config_file.write_text(json.dumps({
+            "tenure": {"display_name": "Tenure", "description": "Loan tenure", "synonyms": ["tenure"]}
+        }))
+        monkeypatch.setenv("FIELD_CONFIG_FILE", str(config_file))
+
+        result = asyncio.run(process_pdf_with_retry(b"%PDF-1.4 icici", "icici.pdf"))
+
+        assert result.cached is False
+        assert mock_client.models.generate_content.call_count == 2
@@ -0,0 +1,103 @@
+import asyncio
+from unittest.mock import Mock
+
+from config.fields import FieldConfigSnapshot
+from models import BankInfo, Evidence, FieldWithEvidence
+from routes.pdf_routes import process_pdf_with_retry
+from services.cascade import plan_escalation
+
+FIELDS = ["fees_and_charges", "prepayment", "ltv_bands", "eligibility", "tenure", "interest_reset", "documents_required"]
+
+
+def found(content: str, snippet: str) -> FieldWithEvidence:
+    return FieldWithEvidence(missing=False, content=content, evidence=[Evidence(page_number=1, line_snippet=snippet)])
+
+
+def make_fast_extraction() -> BankInfo:
+    values = {field_key: found(f"{field_key} terms", f"{field_key} clause") for field_key in FIELDS}
+    values["ltv_bands"] = FieldWithEvidence(missing=True)
+    values["tenure"] = FieldWithEvidence(missing=False, content="up to 30 years")
+    return BankInfo(bank_name="HDFC", is_valid_home_loan_mitc=True, **values)
+
+
+class TestEscalationPlan:
+    """Tests for choosing which fast-model fields go to the strong model"""
+
+    def test_weak_and_configured_fields_are_escalated(self, monkeypatch):
+        monkeypatch.setattr("services.cascade.get_strong_model_fields", lambda: ["eligibility"])
+        bank_info = make_fast_extraction()
+        bank_info.prepayment.evidence[0].verification = "unverified"
+
+        assert plan_escalation(bank_info) == {
+            "prepayment": "unverified evidence",
+            "ltv_bands": "missing",
+            "eligibility": "configured",
+            "tenure": "no evidence",
+        }
+
+    def test_invalid_document_is_escalated_in_full(self):
+        bank_info = make_fast_extraction().model_copy(update={"is_valid_home_loan_mitc": False})
+        assert set(plan_escalation(bank_info)) == set(FIELDS)
+
+    def test_cascade_flag_in_field_config(self):
+        snapshot = FieldConfigSnapshot.from_config({
+            "tenure": {"display_name": "Tenure", "description": "Tenure"},
+            "ltv_bands": {"display_name": "LTV", "description": "LTV", "cascade": False},
+        })
+        assert snapshot.strong_model_fields == ["ltv_bands"]
+
+
+class TestCascadeExtraction:
+    """Tests for the fast-then-strong extraction mode"""
+
+    def test_only_weak_fields_reach_the_strong_model(self, mock_client, monkeypatch):
+        monkeypatch.setattr("routes.pdf_routes.EXTRACTION_CASCADE_ENABLED", True)
+
+        def fake_generate_content(model, contents, config):
+            response = Mock()
+            if model == "gemini-2.5-flash":
+                response.parsed = make_fast_extraction()
+            else:
+                response.parsed = config["response_schema"](
+                    bank_name="HDFC",
+                    is_valid_home_loan_mitc=True,
+                    effective_date="2024-04-01",
+                    ltv_bands=found("up to 80% LTV", "LTV up to 80%"),
+                    tenure=found("up to 30 years", "Tenure: up to 30 years"),
+                )
+            return response
+
+        mock_client.models.generate_content.side_effect = fake_generate_content
+        result = asyncio.run(process_pdf_with_retry(b"fake_pdf_content", "test.pdf"))
+
+        assert result.status == "success"
+        calls = mock_client.models.generate_content.call_args_list
+        assert [call.kwargs["model"] for call in calls] == ["gemini-2.5-flash", "gemini-2.5-pro"]
+        strong_call = calls[1].kwargs
+        assert set(strong_call["config"]["response_schema"].model_fields) >= {"ltv_bands", "tenure"}
+        assert "fees_and_charges" not in strong_call["config"]["response_schema"].model_fields
+        # The document part is shared by both calls
+        assert strong_call["contents"][0] is calls[0].kwargs["contents"][0]
+
+        assert result.bank_info.ltv_bands.content == "up to 80% LTV"
+        assert result.bank_info.fees_and_charges.content == "fees_and_charges terms"
+        assert result.bank_info.effective_date == "2024-04-01"
+        assert result.field_models["ltv_bands"] == "gemini-2.5-pro"
+        assert result.field_models["fees_and_charges"] == "gemini-2.5-flash"
+
+    def test_failed_escalation_keeps_fast_fields(self, mock_client, monkeypatch):
+        from google.genai.errors import ClientError
+
+        monkeypatch.setattr("routes.pdf_routes.EXTRACTION_CASCADE_ENABLED", True)
+        response = Mock()
+        response.parsed = make_fast_extraction()
+        mock_client.models.generate_content.side_effect = [
+            response,
+            ClientError(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT"}}),
+        ]
+
+        result = asyncio.run(process_pdf_with_retry(b"fake_pdf_content", "test.pdf"))
+
+        assert result.status == "success"
+        assert result.bank_info.ltv_bands.missing is True
+        assert set(result.field_models.values()) == {"gemini-2.5-flash"}
@@ -0,0 +1,318 @@
+import asyncio
+import json
+from unittest.mock import Mock, patch
+
+from models import (
+    BankComparisonCell, BankComparisonData, BankComparisonRequest, BankComparisonResponse,
+    BankInfo, ComparisonInput, ComparisonRow, FieldWithEvidence
+)
+from routes.pdf_routes import compare_banks
+from services.comparison_rules import normalize_content, precompare
+
+
+def make_bank(bank_id: str, bank_name: str, **fields) -> BankComparisonData:
+    values = {
+        key: FieldWithEvidence(missing=True)
+        for key in ["fees_and_charges", "prepayment", "ltv_bands", "eligibility", "tenure", "interest_reset", "documents_required"]
+    }
+    values.update({key: FieldWithEvidence(missing=False, content=content) for key, content in fields.items()})
+    return BankComparisonData(
+        bank_id=bank_id,
+        bank_info=BankInfo(bank_name=bank_name, is_valid_home_loan_mitc=True, **values)
+    )
+
+
+class TestNormalization:
+    """Tests for local content normalization"""
+
+    def test_equivalent_units_and_terms(self):
+        assert normalize_content("Processing fee Rs. 5,000") == normalize_content("processing fee: ₹5000")
+        assert normalize_content("Loan up to 25L") == normalize_content("Loan upto INR 25 Lakh")
+        assert normalize_content("Max 2 Cr") == normalize_content("max 2 crore")
+        assert normalize_content("Foreclosure charge 2 percent") == normalize_content("Prepayment charge 2%")
+        assert normalize_content("upto 30 yrs") == normalize_content("Up to 30 years.")
+        assert normalize_content("Rate 8.0%") == normalize_content("rate 8%")
+
+    def test_different_values_stay_different(self):
+        assert normalize_content("Processing fee 0.5%") != normalize_content("Processing fee 1%")
+        assert normalize_content("up to 20 years") != normalize_content("up to 30 years")
+
+
+class TestPrecompare:
+    """Tests for locally decided comparison cells"""
+
+    def test_missing_and_identical_cells_are_decided(self):
+        banks_data = {
+            "a": {"bank_name": "HDFC", "tenure": {"missing": False, "content": "up to 30 yrs"}, "prepayment": {"missing": True, "content": None}},
+            "b": {"bank_name": "ICICI", "tenure": {"missing": False, "content": "Up to 30 years"}, "prepayment": {"missing": False, "content": "Nil"}},
+            "c": {"bank_name": "SBI", "tenure": {"missing": True, "content": None}, "prepayment": {"missing": False, "content": "2%"}},
+        }
+        decided, undecided = precompare(banks_data, ["tenure", "prepayment"])
+
+        assert decided[("tenure", "a")].status == "SAME"
+        assert decided[("tenure", "b")].status == "SAME"
+        assert decided[("tenure", "c")].status == "MISSING"
+        assert decided[("prepayment", "a")].status == "MISSING"
+        assert undecided == {"prepayment": ["b", "c"]}
+
+
+class TestComparisonInput:
+    """Tests for the slim comparison input"""
+
+    def test_bank_info_payload_keeps_only_configured_fields(self):
+        """Evidence is dropped without validation and unlisted fields count as missing"""
+        comparison_input = ComparisonInput.model_validate({
+            "bank_name": "HDFC",
+            "is_valid_home_loan_mitc": True,
+            "tenure": {"missing": False, "content": "up to 30 years", "evidence": [{"page": "not a number"}]},
+            "not_a_field": {"missing": False, "content": "ignored"},
+        })
+        data = comparison_input.comparison_data()
+
+        assert data["bank_name"] == "HDFC"
+        assert data["tenure"] == {"missing": False, "content": "up to 30 years"}
+        assert data["prepayment"] == {"missing": True, "content": None}
+        assert "not_a_field" not in data
+
+    def test_slim_and_full_inputs_compare_alike(self):
+        """A BankInfo object and the slim payload give the same comparison data"""
+        full = make_bank("a", "HDFC", tenure="up to 30 years").bank_info
+        slim = BankComparisonData(bank_id="a", bank_info={
+            "bank_name": "HDFC", "fields": {"tenure": {"missing": False, "content": "up to 30 years"}}
+        }).bank_info
+
+        assert full.comparison_data() == slim.comparison_data()
+
+    def test_fast_json_responses_encode_the_same_body(self, monkeypatch):
+        """The pre-encoded response carries the same JSON as the response model"""
+        from routes import pdf_routes
+
+        result = BankComparisonResponse(comparison_table=[ComparisonRow(field_name="tenure", bank_results=[
+            BankComparisonCell(bank_id="a", bank_name="HDFC", status="SAME", explanation="Same")
+        ])], summary=[])
+        assert pdf_routes.json_response(result) is result
+
+        monkeypatch.setattr(pdf_routes, "FAST_JSON_RESPONSES", True)
+        response = pdf_routes.json_response(result)
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == result.model_dump(mode="json")
+
+
+class TestCompareBanks:
+    """Tests for the comparison endpoint with the local pre-pass"""
+
+    def test_only_undecided_cells_reach_the_model(self, mock_client):
+        """The model sees only undecided fields and the summary is counted locally"""
+        response = Mock()
+        response.parsed = BankComparisonResponse(
+            comparison_table=[
+                ComparisonRow(field_name="fees_and_charges", bank_results=[
+                    BankComparisonCell(bank_id="a", bank_name="?", status="DIFF", explanation="0.5% vs 1%"),
+                    BankComparisonCell(bank_id="b", bank_name="?", status="DIFF", explanation="1% vs 0.5%"),
+                ]),
+                # Cells the model was not asked about are ignored
+                ComparisonRow(field_name="tenure", bank_results=[
+                    BankComparisonCell(bank_id="a", bank_name="?", status="SUSPECT", explanation="ignored"),
+                ]),
+            ],
+            summary=[]
+        )
+        mock_client.models.generate_content.return_value = response
+
+        request = BankComparisonRequest(banks=[
+            make_bank("a", "HDFC", fees_and_charges="Processing fee 0.5%", tenure="upto 30 yrs"),
+            make_bank("b", "ICICI", fees_and_charges="Processing fee 1%", tenure="Up to 30 years"),
+        ])
+        result = asyncio.run(compare_banks(request))
+
+        prompt = mock_client.models.generate_content.call_args.kwargs["contents"][0]
+        assert "For each field (fees_and_charges)" in prompt
+        assert "30 years" not in prompt
+
+        rows = {row.field_name: row for row in result.comparison_table}
+        assert [c.status for c in rows["fees_and_charges"].bank_results] == ["DIFF", "DIFF"]
+        assert [c.bank_name for c in rows["fees_and_charges"].bank_results] == ["HDFC", "ICICI"]
+        assert [c.status for c in rows["tenure"].bank_results] == ["SAME", "SAME"]
+        assert [c.status for c in rows["prepayment"].bank_results] == ["MISSING", "MISSING"]
+        assert {s.status: s.count for s in result.summary} == {"SAME": 2, "DIFF": 2, "MISSING": 10, "SUSPECT": 0}
+
+    def test_fully_decidable_comparison_skips_the_model(self, mock_client):
+        """No model call when every cell is MISSING or identical"""
+        request = BankComparisonRequest(banks=[
+            make_bank("a", "HDFC", tenure="up to 30 years"),
+            make_bank("b", "ICICI", tenure="upto 30 yrs"),
+        ])
+        result = asyncio.run(compare_banks(request))
+
+        mock_client.models.generate_content.assert_not_called()
+        assert len(result.comparison_table) == 7
+        assert {s.status: s.count for s in result.summary}["SAME"] == 2
+
+    @patch('routes.pdf_routes.backoff_delay', return_value=0)
+    def test_fields_are_sharded_and_retried_independently(self, _, mock_client):
+        """Each undecided field gets its own call; a failing shard is retried alone and then degrades to SUSPECT"""
+        from google.genai.errors import ServerError
+
+        calls = []
+
+        def fake_generate_content(model, contents, config):
+            prompt = contents[0]
+            field_key = prompt.split("For each field (")[1].split(")")[0]
+            calls.append(field_key)
+            if field_key == "tenure":
+                raise ServerError(503, {"error": {"code": 503}})
+            if field_key == "prepayment" and calls.count("prepayment") == 1:
+                raise ServerError(503, {"error": {"code": 503}})
+            response = Mock()
+            response.parsed = BankComparisonResponse(
+                comparison_table=[ComparisonRow(field_name=field_key, bank_results=[
+                    BankComparisonCell(bank_id=bank_id, bank_name="?", status="DIFF", explanation="differs")
+                    for bank_id in "abc"
+                ])],
+                summary=[]
+            )
+            return response
+
+        mock_client.models.generate_content.side_effect = fake_generate_content
+        request = BankComparisonRequest(banks=[
+            make_bank(bank_id, name, fees_and_charges=f"fee {i}%", prepayment=f"{i}% charge", tenure=f"{i + 10} years")
+            for i, (bank_id, name) in enumerate([("a", "HDFC"), ("b", "ICICI"), ("c", "SBI")])
+        ])
+        result = asyncio.run(compare_banks(request))
+
+        assert sorted(calls) == ["fees_and_charges", "prepayment", "prepayment", "tenure", "tenure", "tenure"]
+        rows = {row.field_name: row for row in result.comparison_table}
+        assert [c.status for c in rows["fees_and_charges"].bank_results] == ["DIFF"] * 3
+        assert [c.status for c in rows["prepayment"].bank_results] == ["DIFF"] * 3
+        assert [c.status for c in rows["tenure"].bank_results] == ["SUSPECT"] * 3
+
+
+class TestComparisonCache:
+    """Tests for reusing comparison verdicts across requests"""
+
+    def test_repeat_and_incremental_comparisons_reuse_cached_cells(self, mock_client):
+        """Known content pairs are decided locally; only new content reaches the model"""
+        def fake_generate_content(model, contents, config):
+            # Every listed bank differs from every other one
+            bank_data = contents[0].split("**BANK DATA (JSON):**\n")[1].split("\n")[0]
+            bank_ids = sorted(json.loads(bank_data))
+            response = Mock()
+            response.parsed = BankComparisonResponse(
+                comparison_table=[ComparisonRow(field_name="fees_and_charges", bank_results=[
+                    BankComparisonCell(bank_id=bank_id, bank_name="?", status="DIFF", explanation="differs", equivalent_to=[])
+                    for bank_id in bank_ids
+                ])],
+                summary=[]
+            )
+            return response
+
+        mock_client.models.generate_content.side_effect = fake_generate_content
+        hdfc = make_bank("a", "HDFC", fees_and_charges="Processing fee 0.5%")
+        icici = make_bank("b", "ICICI", fees_and_charges="Processing fee 1%")
+        sbi = make_bank("c", "SBI", fees_and_charges="Processing fee 0.75%")
+
+        asyncio.run(compare_banks(BankComparisonRequest(banks=[hdfc, icici])))
+        assert mock_client.models.generate_content.call_count == 1
+
+        # Same content under different wording and bank ids: no model call
+        repeat = asyncio.run(compare_banks(BankComparisonRequest(banks=[
+            make_bank("x", "ICICI", fees_and_charges="processing fee: 1 percent"),
+            make_bank("y", "HDFC", fees_and_charges="Processing fee 0.5%"),
+        ])))
+        assert mock_client.models.generate_content.call_count == 1
+        cells = repeat.comparison_table[0].bank_results
+        assert [c.status for c in cells] == ["DIFF", "DIFF"]
+        assert cells[0].explanation == "Differs from HDFC"
+
+        # Adding SBI introduces unknown pairs: only SBI's cell is asked for, with HDFC and ICICI as reference
+        trio = asyncio.run(compare_banks(BankComparisonRequest(banks=[hdfc, icici, sbi])))
+        assert mock_client.models.generate_content.call_count == 2
+        prompt = mock_client.models.generate_content.call_args.kwargs["contents"][0]
+        bank_data = json.loads(prompt.split("**BANK DATA (JSON):**\n")[1].split("\n")[0])
+        assert {bank_id: entry["fees_and_charges"].get("reference_only", False) for bank_id, entry in bank_data.items()} == {"a": True, "b": True, "c": False}
+        assert [c.status for c in trio.comparison_table[0].bank_results] == ["DIFF", "DIFF", "DIFF"]
+
+        # Every pair is now known
+        subset = asyncio.run(compare_banks(BankComparisonRequest(banks=[icici, sbi])))
+        assert mock_client.models.generate_content.call_count == 2
+        assert [c.status for c in subset.comparison_table[0].bank_results] == ["DIFF", "DIFF"]
+
+    def test_equivalent_pairs_are_combined_into_cells(self):
+        """Cells are SAME only when equivalent to every other bank; SUSPECT verdicts are kept"""
+        from services.cache import LRUCache
+        from services.comparison_cache import ComparisonCache
+
+        cache = ComparisonCache(LRUCache(), model="m", prompt_version="1")
+        banks_data = {
+            bank_id: {"bank_name": bank_id.upper(), "prepayment": {"missing": False, "content": content}}
+            for bank_id, content in [("a", "Nil"), ("b", "No charges"), ("c", "2% of outstanding"), ("d", "1-2% or 3%?")]
+        }
+        assert cache.lookup(banks_data, "prepayment", ["a", "b"]) is None
+
+        cache.store_cells(banks_data, "prepayment", {
+            "a": BankComparisonCell(bank_id="a", bank_name="A", status="DIFF", explanation="", equivalent_to=["b"]),
+            "b": BankComparisonCell(bank_id="b", bank_name="B", status="DIFF", explanation="", equivalent_to=["a"]),
+            "c": BankComparisonCell(bank_id="c", bank_name="C", status="DIFF", explanation="", equivalent_to=[]),
+            "d": BankComparisonCell(bank_id="d", bank_name="D", status="SUSPECT", explanation="Contradictory rates", equivalent_to=[]),
+        })
+
+        pair = cache.lookup(banks_data, "prepayment", ["a", "b"])
+        assert pair["a"].status == "SAME" and pair["a"].explanation == "Equivalent to B"
+        trio = cache.lookup(banks_data, "prepayment", ["a", "b", "c", "d"])
+        assert {bank_id: cell.status for bank_id, cell in trio.items()} == {"a": "DIFF", "b": "DIFF", "c": "DIFF", "d": "SUSPECT"}
+        assert trio["a"].equivalent_to == ["b"]
+        assert trio["d"].explanation == "Contradictory rates"
+
+        # Another model or prompt version never sees these entries
+        assert ComparisonCache(cache.store, model="m", prompt_version="2").lookup(banks_data, "prepayment", ["a", "b"]) is None
+
+    def test_same_cells_are_cached_as_equivalent(self):
+        """A SAME cell counts as equivalent to every other bank even when equivalent_to is empty"""
+        from services.cache import LRUCache
+        from services.comparison_cache import ComparisonCache
+
+        cache = ComparisonCache(LRUCache(), model="m", prompt_version="1")
+        banks_data = {
+            bank_id: {"bank_name": bank_id.upper(), "tenure": {"missing": False, "content": content}}
+            for bank_id, content in [("a", "up to 30 years"), ("b", "maximum tenure 30 years")]
+        }
+        cache.store_cells(banks_data, "tenure", {
+            bank_id: BankComparisonCell(bank_id=bank_id, bank_name=bank_id.upper(), status="SAME", explanation="", equivalent_to=[])
+            for bank_id in "ab"
+        })
+
+        assert [cell.status for cell in cache.lookup(banks_data, "tenure", ["a", "b"]).values()] == ["SAME", "SAME"]
+
+    def test_plan_asks_only_for_uncached_cells(self):
+        """Known contents become reference banks for the new ones"""
+        from services.cache import LRUCache
+        from services.comparison_cache import ComparisonCache
+
+        cache = ComparisonCache(LRUCache(), model="m", prompt_version="1")
+        banks_data = {
+            bank_id: {"bank_name": bank_id.upper(), "prepayment": {"missing": False, "content": content}}
+            for bank_id, content in [("a", "Nil"), ("b", "2% of outstanding"), ("c", "1%"), ("d", "3%")]
+        }
+        assert cache.plan(banks_data, "prepayment", ["a", "b"]) == (["a", "b"], [])
+
+        cache.store_cells(banks_data, "prepayment", {
+            bank_id: BankComparisonCell(bank_id=bank_id, bank_name=bank_id.upper(), status="DIFF", explanation="", equivalent_to=[])
+            for bank_id in "ab"
+        })
+        assert cache.plan(banks_data, "prepayment", ["a", "b", "c"]) == (["c"], ["a", "b"])
+        assert cache.plan(banks_data, "prepayment", ["a", "b", "c", "d"]) == (["c", "d"], ["a", "b"])
+
+    def test_lru_cache_is_bounded_and_persists(self, tmp_path):
+        """The memory layer evicts least recently used keys; the SQLite backing still has them"""
+        from services.cache import LRUCache, SQLiteCache
+
+        cache = LRUCache(max_entries=2, backing=SQLiteCache(str(tmp_path / "cmp.sqlite3")))
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert len(cache) == 2
+        assert "b" not in cache._entries
+
+        restarted = LRUCache(max_entries=2, backing=SQLiteCache(str(tmp_path / "cmp.sqlite3")))
+        assert restarted.get("b") == "2"
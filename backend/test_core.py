@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import Mock, patch
+from google.genai.errors import ClientError, ServerError
 from models import BankInfo, FieldWithEvidence, Evidence
-from routes.pdf_routes import process_pdf_with_retry
+from routes.pdf_routes import process_pdf_with_retry, process_pdfs
 
 
 class TestCoreSystem:
@@ -46,7 +47,6 @@ class TestCoreSystem:
         assert found_field.content is not None
         assert len(found_field.evidence) == 1
 
-    @patch('routes.pdf_routes.client')
     def test_pdf_processing_handles_api_errors(self, mock_client):
         """Test that PDF processing gracefully handles AI API failures"""
         # Mock AI API failure
@@ -63,7 +63,6 @@ class TestCoreSystem:
         # Should not crash the entire system
         assert True  # If we reach here, error was handled
 
-    @patch('routes.pdf_routes.client')
     def test_pdf_processing_retry_mechanism(self, mock_client):
         """Test that PDF processing retries on failure"""
         # Mock API to fail twice, then succeed
@@ -81,8 +80,8 @@ class TestCoreSystem:
         )
         
         mock_client.models.generate_content.side_effect = [
-            Exception("First failure"),
-            Exception("Second failure"), 
+            ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE"}}),
+            ServerError(500, {"error": {"code": 500, "status": "INTERNAL"}}), 
             mock_response
         ]
         
@@ -94,6 +93,17 @@ class TestCoreSystem:
         assert result.bank_info.bank_name == "TEST"
         assert mock_client.models.generate_content.call_count == 3
 
+    def test_pdf_processing_does_not_retry_permanent_errors(self, mock_client):
+        """Test that errors which cannot succeed on retry fail immediately"""
+        mock_client.models.generate_content.side_effect = ClientError(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT"}})
+
+        import asyncio
+        result = asyncio.run(process_pdf_with_retry(b"fake_pdf_content", "test.pdf", max_retries=3))
+
+        assert result.status == "failed"
+        assert result.error_message.startswith("Failed after 1 attempts")
+        assert mock_client.models.generate_content.call_count == 1
+
     def test_date_fields_in_bank_info(self):
         """Test that new date fields work correctly in BankInfo model"""
         bank_info = BankInfo(
@@ -131,3 +141,86 @@ class TestCoreSystem:
         
         assert bank_info_no_dates.effective_date is None
         assert bank_info_no_dates.updated_date is None
+
+    def test_batch_processing_is_concurrent_and_ordered(self):
+        """Test that a batch runs files concurrently and keeps upload order"""
+        import asyncio
+        import io
+        from fastapi import UploadFile
+        from models import PDFProcessResult
+
+        delays = {"slow.pdf": 0.3, "medium.pdf": 0.2, "fast.pdf": 0.1}
+        in_flight = {"current": 0, "peak": 0}
+
+        async def fake_process(pdf_content, filename, max_retries=3, timings=None, deadline_seconds=None):
+            in_flight["current"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+            await asyncio.sleep(delays[filename])
+            in_flight["current"] -= 1
+            if filename == "medium.pdf":
+                return PDFProcessResult(filename=filename, status="failed", error_message="boom")
+            return PDFProcessResult(filename=filename, status="success")
+
+        files = [UploadFile(file=io.BytesIO(b"%PDF-1.4"), filename=name) for name in delays]
+        files.append(UploadFile(file=io.BytesIO(b"text"), filename="notes.txt"))
+
+        with patch('routes.pdf_routes.process_pdf_with_retry', side_effect=fake_process):
+            response = asyncio.run(process_pdfs(files))
+
+        # Results stay in upload order and failures are isolated per file
+        assert [r.filename for r in response.results] == ["slow.pdf", "medium.pdf", "fast.pdf", "notes.txt"]
+        assert [r.status for r in response.results] == ["success", "failed", "success", "failed"]
+        assert response.successful == 2
+        assert response.failed == 2
+
+        # All three PDFs were being extracted at the same time
+        assert in_flight["peak"] == 3
+
+    def test_prompt_templates(self):
+        """Test that prompts fill per-request slots and embed bank data as compact JSON"""
+        from services.prompts import PromptTemplate, build_extraction_prompt, build_comparison_prompt
+
+        template = PromptTemplate.compile("A {{static}} B {{dynamic}} C", static="{{not_a_slot}}")
+        assert template.slots == ["dynamic"]
+        assert template.render(dynamic="x") == "A {{not_a_slot}} B x C"
+
+        extraction_prompt = build_extraction_prompt("hdfc_mitc.pdf")
+        assert "(filename: hdfc_mitc.pdf)" in extraction_prompt
+        assert "4. **Fees & Charges**" in extraction_prompt
+
+        comparison_prompt = build_comparison_prompt(
+            ["HDFC", "ICICI"],
+            {"b": {"tenure": {"missing": True, "content": None}}, "a": {"tenure": {"missing": False, "content": "up to 30 years"}}},
+            ["tenure"]
+        )
+        assert "Banks to compare: HDFC, ICICI" in comparison_prompt
+        assert "For each field (tenure)" in comparison_prompt
+        assert '{"a":{"tenure":{"content":"up to 30 years","missing":false}},"b":{"tenure":{"content":null,"missing":true}}}' in comparison_prompt
+
+    def test_streaming_batch_emits_results_as_they_finish(self):
+        """Test that /process-pdfs/stream emits each result on completion, then a summary"""
+        import asyncio
+        import json
+        from fastapi.testclient import TestClient
+        from main import app
+        from models import PDFProcessResult
+
+        delays = {"slow.pdf": 0.3, "fast.pdf": 0.05}
+
+        async def fake_process(pdf_content, filename, max_retries=3, timings=None, deadline_seconds=None):
+            await asyncio.sleep(delays[filename])
+            return PDFProcessResult(filename=filename, status="success")
+
+        files = [("files", (name, b"%PDF-1.4", "application/pdf")) for name in delays]
+        files.append(("files", ("notes.txt", b"text", "text/plain")))
+
+        with patch('routes.pdf_routes.process_pdf_with_retry', side_effect=fake_process):
+            with TestClient(app) as http:
+                response = http.post("/process-pdfs/stream", files=files)
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        frames = [json.loads(line) for line in response.text.splitlines()]
+
+        # Results arrive in completion order and carry their upload index
+        assert [(f["index"], f["result"]["filename"]) for f in frames[:3]] == [(2, "notes.txt"), (1, "fast.pdf"), (0, "slow.pdf")]
+        assert frames[3] == {"type": "summary", "total_processed": 3, "successful": 2, "failed": 1}
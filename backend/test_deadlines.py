@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from routes.pdf_routes import generate_content, process_pdf_with_retry
+from services.deadlines import can_fit, deadline_scope, remaining_seconds
+from services.hedging import LatencyTracker, get_latency_tracker
+from services.metrics import MODEL_HEDGES
+from services.model_client import genai_types_async
+from services.rate_limiter import get_rate_limiter
+from services.retry import ModelTimeoutError
+
+
+class TestDeadlines:
+    """Tests for per-request deadlines and per-call timeouts"""
+
+    def test_nested_scopes_only_shorten_the_deadline(self):
+        assert remaining_seconds() is None and can_fit(1000)
+        with deadline_scope(10):
+            with deadline_scope(60):
+                assert remaining_seconds() <= 10
+            with deadline_scope(1):
+                assert not can_fit(5)
+            with deadline_scope(None):
+                assert 9 < remaining_seconds() <= 10
+        assert remaining_seconds() is None
+
+    @patch('routes.pdf_routes.MODEL_CALL_TIMEOUT_SECONDS', 0.05)
+    def test_stuck_call_times_out(self, mock_client):
+        mock_client.models.generate_content.side_effect = lambda **kwargs: time.sleep(1)
+
+        with pytest.raises(ModelTimeoutError):
+            asyncio.run(generate_content(model="gemini-2.5-flash", contents=["prompt"], config={"response_mime_type": "application/json"}))
+        # The SDK is asked to abort the HTTP request as well
+        assert mock_client.models.generate_content.call_args.kwargs["config"]["http_options"] == {"timeout": 50}
+
+    @patch('routes.pdf_routes.backoff_delay', return_value=0)
+    @patch('routes.pdf_routes.MODEL_CALL_TIMEOUT_SECONDS', 0.1)
+    def test_retries_stop_at_the_request_deadline(self, _, mock_client):
+        mock_client.models.generate_content.side_effect = lambda **kwargs: time.sleep(1)
+        # Importing the SDK types on first use is not part of the budget under test
+        asyncio.run(genai_types_async())
+
+        start = time.perf_counter()
+        result = asyncio.run(process_pdf_with_retry(b"fake_pdf_content", "stuck.pdf", max_retries=10, deadline_seconds=0.25))
+
+        assert result.status == "failed"
+        assert time.perf_counter() - start < 0.6
+        assert mock_client.models.generate_content.call_count < 10
+
+
+class TestHedging:
+    """Tests for hedged model requests"""
+
+    def test_latency_percentile_needs_enough_samples(self):
+        tracker = LatencyTracker(min_samples=3)
+        tracker.observe(1.0)
+        assert tracker.percentile(95) is None
+        for seconds in (2.0, 3.0, 4.0):
+            tracker.observe(seconds)
+        assert tracker.percentile(50) in (2.0, 3.0)
+        assert tracker.percentile(100) == 4.0
+
+    @patch('services.hedging.HEDGING_ENABLED', True)
+    def test_slow_call_is_hedged_and_first_answer_wins(self, mock_client):
+        model = "test-hedged-model"
+        tracker = get_latency_tracker(model)
+        for _ in range(tracker.min_samples):
+            tracker.observe(0.01)
+
+        calls = []
+        lock = threading.Lock()
+
+        def generate(**kwargs):
+            with lock:
+                calls.append(1)
+                number = len(calls)
+            if number == 1:
+                time.sleep(0.5)
+            return Mock(parsed=f"answer {number}", usage_metadata=None)
+
+        mock_client.models.generate_content.side_effect = generate
+        hedges_won = MODEL_HEDGES.value(model=model, winner="hedge")
+
+        async def run():
+            response = await generate_content(model=model, contents=["prompt"], config={})
+            # The losing SDK call still runs, so it keeps its limiter slot until it returns
+            held = get_rate_limiter(model).in_flight
+            await asyncio.sleep(0.6)
+            return response, held, get_rate_limiter(model).in_flight
+
+        response, held, in_flight_after = asyncio.run(run())
+
+        assert response.parsed == "answer 2"
+        assert len(calls) == 2
+        assert MODEL_HEDGES.value(model=model, winner="hedge") == hedges_won + 1
+        assert (held, in_flight_after) == (1, 0)
@@ -0,0 +1,73 @@
+import asyncio
+from unittest.mock import Mock
+
+from models import BankInfo, Evidence, FieldWithEvidence
+from routes.pdf_routes import process_pdf_with_retry
+from services.evidence import EvidenceIndex
+from test_page_pruning import make_policy_pages, make_text_pdf
+
+
+class TestEvidenceIndex:
+    """Tests for checking evidence snippets against the page text"""
+
+    def setup_method(self):
+        self.index = EvidenceIndex(make_policy_pages())
+
+    def test_snippet_on_reported_page_is_verified(self):
+        evidence = Evidence(page_number=7, line_snippet="Processing fee: 0.5% of the loan amount")
+        self.index.verify(evidence)
+        assert evidence.verification == "verified"
+        assert evidence.page_number == 7
+
+    def test_fuzzy_match_tolerates_small_differences(self):
+        evidence = Evidence(page_number=12, line_snippet="Tenure - up to 30 years; prepayment charges NIL for floating-rate loans")
+        self.index.verify(evidence)
+        assert evidence.verification == "verified"
+
+    def test_wrong_page_is_corrected(self):
+        evidence = Evidence(page_number=3, line_snippet="Documents required: KYC documents, income proof")
+        self.index.verify(evidence)
+        assert evidence.verification == "corrected"
+        assert evidence.page_number == 20
+        assert evidence.reported_page_number == 3
+
+    def test_hallucinated_snippet_is_unverified(self):
+        evidence = Evidence(page_number=7, line_snippet="Processing fee waived for women borrowers above 60")
+        self.index.verify(evidence)
+        assert evidence.verification == "unverified"
+        assert evidence.page_number == 7
+
+    def test_verification_fields_are_hidden_from_the_model_schema(self):
+        properties = Evidence.model_json_schema()["properties"]
+        assert set(properties) == {"page_number", "line_snippet"}
+
+
+class TestVerifiedExtraction:
+    """Tests for evidence checks in the extraction path"""
+
+    def test_extracted_evidence_is_annotated(self, mock_client):
+        response = Mock()
+        response.parsed = BankInfo(
+            bank_name="HDFC",
+            is_valid_home_loan_mitc=True,
+            fees_and_charges=FieldWithEvidence(missing=False, content="0.5%", evidence=[
+                Evidence(page_number=7, line_snippet="Processing fee: 0.5% of the loan amount."),
+                Evidence(page_number=7, line_snippet="Annual maintenance charge of Rs 500"),
+            ]),
+            prepayment=FieldWithEvidence(missing=True),
+            ltv_bands=FieldWithEvidence(missing=True),
+            eligibility=FieldWithEvidence(missing=True),
+            tenure=FieldWithEvidence(missing=False, content="30 years", evidence=[
+                Evidence(page_number=11, line_snippet="Tenure: up to 30 years"),
+            ]),
+            interest_reset=FieldWithEvidence(missing=True),
+            documents_required=FieldWithEvidence(missing=True)
+        )
+        mock_client.models.generate_content.return_value = response
+
+        result = asyncio.run(process_pdf_with_retry(make_text_pdf(make_policy_pages()), "hdfc.pdf"))
+
+        fees = result.bank_info.fees_and_charges.evidence
+        assert [e.verification for e in fees] == ["verified", "unverified"]
+        tenure = result.bank_info.tenure.evidence[0]
+        assert (tenure.verification, tenure.page_number, tenure.reported_page_number) == ("corrected", 12, 11)
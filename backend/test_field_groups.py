@@ -0,0 +1,80 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+from google.genai.errors import ServerError
+
+from models import Evidence, FieldWithEvidence
+from routes.pdf_routes import process_pdf_with_retry
+from services.field_groups import split_field_groups
+from services.revisions import HEADER_FIELDS
+from services.uploads import SpooledPDF
+
+
+def fake_group_extraction(calls, fail_once=()):
+    """generate_content stand-in answering any partial schema, failing the first call for the given fields"""
+    def generate_content(model, contents, config):
+        schema = config["response_schema"]
+        fields = [name for name in schema.model_fields if name not in HEADER_FIELDS]
+        calls.append(fields)
+        if any(field_key in fail_once for field_key in fields) and calls.count(fields) == 1:
+            raise ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE"}})
+        response = Mock()
+        response.parsed = schema(
+            bank_name="SBI",
+            is_valid_home_loan_mitc=True,
+            **{
+                field_key: FieldWithEvidence(missing=False, content=f"{field_key} terms", evidence=[Evidence(page_number=1, line_snippet=field_key)])
+                for field_key in fields
+            }
+        )
+        return response
+    return generate_content
+
+
+class TestFieldGroups:
+    """Tests for extracting one document as concurrent field groups"""
+
+    def test_split_keeps_order_and_balances_groups(self):
+        fields = ["a", "b", "c", "d", "e", "f", "g"]
+        assert split_field_groups(fields, 3) == [["a", "b", "c"], ["d", "e"], ["f", "g"]]
+        assert split_field_groups(fields, 1) == [fields]
+        assert split_field_groups(["a", "b"], 5) == [["a"], ["b"]]
+
+    @patch('routes.pdf_routes.backoff_delay', return_value=0)
+    @patch('routes.pdf_routes.EXTRACTION_FIELD_GROUPS', 3)
+    def test_groups_are_merged_and_retried_alone(self, _, mock_client):
+        calls = []
+        mock_client.models.generate_content.side_effect = fake_group_extraction(calls, fail_once=("tenure",))
+
+        result = asyncio.run(process_pdf_with_retry(b"fake_pdf_content", "test.pdf"))
+
+        assert result.status == "success"
+        assert sorted(calls[:3]) == [
+            ["eligibility", "tenure"],
+            ["fees_and_charges", "prepayment", "ltv_bands"],
+            ["interest_reset", "documents_required"],
+        ]
+        # Only the failed group is sent again
+        assert len(calls) == 4 and calls[3] == ["eligibility", "tenure"]
+        assert result.bank_info.bank_name == "SBI"
+        assert result.bank_info.tenure.content == "tenure terms"
+        assert result.bank_info.documents_required.content == "documents_required terms"
+
+    @patch('routes.pdf_routes.EXTRACTION_FIELD_GROUPS', 2)
+    def test_small_pdf_is_uploaded_once_for_all_groups(self, mock_client, tmp_path):
+        path = tmp_path / "small.pdf"
+        path.write_bytes(b"%PDF-1.4 " + b"x" * 100)
+        uploaded = Mock(uri="https://files.example/small", mime_type="application/pdf")
+        uploaded.name = "files/small"
+        mock_client.files.upload.return_value = uploaded
+        calls = []
+        mock_client.models.generate_content.side_effect = fake_group_extraction(calls)
+
+        result = asyncio.run(process_pdf_with_retry(SpooledPDF.from_path(str(path)), "small.pdf"))
+
+        assert result.status == "success"
+        assert len(calls) == 2
+        mock_client.files.upload.assert_called_once()
+        parts = [call.kwargs["contents"][0] for call in mock_client.models.generate_content.call_args_list]
+        assert all(part.file_data.file_uri == "https://files.example/small" for part in parts)
+        mock_client.files.delete.assert_called_once_with(name="files/small")
@@ -0,0 +1,57 @@
+import json
+import os
+from unittest.mock import patch
+
+from config.fields import DEFAULT_FIELDS, FieldConfigRegistry
+
+
+def write_config(path, fields):
+    path.write_text(json.dumps({
+        key: {"display_name": key.title(), "description": f"{key} details", "synonyms": [key]}
+        for key in fields
+    }))
+
+
+class TestFieldConfigRegistry:
+    """Tests for the memoized field configuration"""
+
+    def test_defaults_without_config_file(self, monkeypatch):
+        """Falls back to DEFAULT_FIELDS when FIELD_CONFIG_FILE is unset"""
+        monkeypatch.delenv("FIELD_CONFIG_FILE", raising=False)
+        snapshot = FieldConfigRegistry().snapshot()
+        assert snapshot.config == DEFAULT_FIELDS
+        assert snapshot.keys == list(DEFAULT_FIELDS.keys())
+        assert snapshot.display_names["ltv_bands"] == "LTV Bands"
+
+    def test_file_is_parsed_once(self, tmp_path, monkeypatch):
+        """Repeated access does not re-open the configuration file"""
+        config_file = tmp_path / "fields.json"
+        write_config(config_file, ["tenure"])
+        monkeypatch.setenv("FIELD_CONFIG_FILE", str(config_file))
+        registry = FieldConfigRegistry(reload_interval=0)
+
+        with patch("builtins.open", wraps=open) as mock_open:
+            for _ in range(10):
+                assert registry.snapshot().keys == ["tenure"]
+        assert mock_open.call_count == 1
+
+    def test_reloads_when_mtime_changes(self, tmp_path, monkeypatch):
+        """Editing the file is picked up and changes the fingerprint"""
+        config_file = tmp_path / "fields.json"
+        write_config(config_file, ["tenure"])
+        monkeypatch.setenv("FIELD_CONFIG_FILE", str(config_file))
+        registry = FieldConfigRegistry(reload_interval=0)
+        before = registry.snapshot()
+
+        write_config(config_file, ["tenure", "prepayment"])
+        stat = os.stat(config_file)
+        os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        after = registry.snapshot()
+
+        assert after.keys == ["tenure", "prepayment"]
+        assert after.fingerprint != before.fingerprint
+
+    def test_fingerprint_is_stable(self, monkeypatch):
+        """The same configuration always yields the same fingerprint"""
+        monkeypatch.delenv("FIELD_CONFIG_FILE", raising=False)
+        assert FieldConfigRegistry().snapshot().fingerprint == FieldConfigRegistry().snapshot().fingerprint
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from models import PDFProcessResult
+from routes import job_routes
+from services.jobs import JobQueue
+
+
+class TestJobQueue:
+    """Tests for the persistent job queue"""
+
+    def test_interrupted_work_is_reclaimed_after_restart(self, tmp_path):
+        """A file claimed by a worker that died is claimed again once its lease expires"""
+        path, spool = str(tmp_path / "jobs.sqlite3"), str(tmp_path / "spool")
+        uploads = []
+        for name in ("a.pdf", "b.pdf"):
+            upload = tmp_path / f"upload_{name}"
+            upload.write_bytes(b"%PDF-1.4 " + name.encode())
+            uploads.append((name, str(upload), None))
+        queue = JobQueue(path, spool, lease_seconds=0.05)
+        job_id = queue.create_job(uploads)
+
+        first = queue.claim()
+        assert first[:3] == (job_id, 0, "a.pdf")
+
+        # Simulate a restart: a fresh queue on the same files
+        restarted = JobQueue(path, spool, lease_seconds=0.05)
+        assert restarted.claim()[:3] == (job_id, 1, "b.pdf")
+        assert restarted.claim() is None
+        time.sleep(0.1)
+        reclaimed = restarted.claim()
+        assert reclaimed[:3] == (job_id, 0, "a.pdf")
+
+        restarted.complete(job_id, 0, '{"done": true}')
+        files = restarted.get_job(job_id)
+        assert files[0]["status"] == "done"
+        assert files[1]["status"] == "running"
+        assert restarted.get_job("missing") is None
+
+
+class TestJobRoutes:
+    """Tests for the /jobs API"""
+
+    def test_job_lifecycle(self):
+        """A submitted job is processed in the background and reports results in upload order"""
+        async def fake_process(pdf_content, filename, max_retries=3, deadline_seconds=None):
+            # Extraction has to finish before the file's lease runs out and it is claimed again
+            assert deadline_seconds < job_routes.job_queue.lease_seconds
+            await asyncio.sleep(0.05)
+            return PDFProcessResult(filename=filename, status="success")
+
+        files = [
+            ("files", ("hdfc.pdf", b"%PDF-1.4 hdfc", "application/pdf")),
+            ("files", ("notes.txt", b"text", "text/plain")),
+            ("files", ("icici.pdf", b"%PDF-1.4 icici", "application/pdf")),
+        ]
+
+        with patch('routes.pdf_routes.process_pdf_with_retry', side_effect=fake_process):
+            with TestClient(app) as http:
+                created = http.post("/jobs", files=files)
+                assert created.status_code == 202
+                job_id = created.json()["job_id"]
+
+                deadline = time.monotonic() + 5
+                while True:
+                    job = http.get(f"/jobs/{job_id}").json()
+                    if job["status"] == "completed" or time.monotonic() > deadline:
+                        break
+                    time.sleep(0.05)
+
+                assert http.get("/jobs/unknown").status_code == 404
+
+        assert job["status"] == "completed"
+        assert job["total_files"] == 3
+        assert job["successful"] == 2
+        assert job["failed"] == 1
+        assert [f["filename"] for f in job["files"]] == ["hdfc.pdf", "notes.txt", "icici.pdf"]
+        assert job["files"][1]["result"]["error_message"] == "File is not a PDF"
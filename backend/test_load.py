@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from unittest.mock import Mock
+
+import httpx
+
+from main import app, warm_up_model_client
+from models import BankInfo, FieldWithEvidence, BankComparisonResponse, BankComparisonCell, ComparisonRow
+
+
+MODEL_LATENCY = 0.5
+
+
+def make_bank_info(bank_name: str, processing_fee: str = "0.5%") -> BankInfo:
+    return BankInfo(
+        bank_name=bank_name,
+        is_valid_home_loan_mitc=True,
+        fees_and_charges=FieldWithEvidence(missing=False, content=f"Processing fee: {processing_fee}"),
+        prepayment=FieldWithEvidence(missing=True),
+        ltv_bands=FieldWithEvidence(missing=True),
+        eligibility=FieldWithEvidence(missing=True),
+        tenure=FieldWithEvidence(missing=False, content="up to 30 years"),
+        interest_reset=FieldWithEvidence(missing=True),
+        documents_required=FieldWithEvidence(missing=True)
+    )
+
+
+class InFlightCounter:
+    """Tracks how many model calls run at the same time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+
+
+def slow_generate_content(model, contents, config, in_flight=None):
+    """Blocking stand-in for the Gemini SDK call"""
+    if in_flight is not None:
+        with in_flight:
+            time.sleep(MODEL_LATENCY)
+    else:
+        time.sleep(MODEL_LATENCY)
+    response = Mock()
+    if config["response_schema"] is BankComparisonResponse:
+        response.parsed = BankComparisonResponse(
+            comparison_table=[ComparisonRow(field_name="fees_and_charges", bank_results=[
+                BankComparisonCell(bank_id="a", bank_name="HDFC", status="DIFF", explanation="0.5% vs 1%"),
+                BankComparisonCell(bank_id="b", bank_name="ICICI", status="DIFF", explanation="1% vs 0.5%"),
+            ])],
+            summary=[]
+        )
+    else:
+        response.parsed = make_bank_info("TEST")
+    return response
+
+
+class TestEventLoopLoad:
+    """Load tests proving model calls do not block the event loop"""
+
+    def test_health_check_latency_stays_flat_during_extractions(self, mock_client):
+        """Health checks stay fast while extractions and comparisons are in flight"""
+        in_flight_calls = InFlightCounter()
+        mock_client.models.generate_content.side_effect = lambda **kwargs: slow_generate_content(**kwargs, in_flight=in_flight_calls)
+
+        async def run():
+            # ASGITransport skips the lifespan, so warm up the way the server does at startup
+            await warm_up_model_client()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                # Distinct documents, so concurrent extractions are not coalesced into one call
+                files = [("files", (f"bank_{i}.pdf", f"%PDF-1.4 fake {i}".encode(), "application/pdf")) for i in range(4)]
+                comparison = {
+                    "banks": [
+                        {"bank_id": "a", "bank_info": make_bank_info("HDFC").model_dump()},
+                        {"bank_id": "b", "bank_info": make_bank_info("ICICI", "1%").model_dump()},
+                    ]
+                }
+                in_flight = [
+                    asyncio.create_task(http.post("/process-pdfs", files=files)),
+                    asyncio.create_task(http.post("/compare-banks", json=comparison)),
+                ]
+
+                # Give the model calls time to start before probing health
+                await asyncio.sleep(0.05)
+                latencies = []
+                while not all(task.done() for task in in_flight):
+                    start = time.monotonic()
+                    health = await http.get("/")
+                    latencies.append(time.monotonic() - start)
+                    assert health.status_code == 200
+                    await asyncio.sleep(0.02)
+
+                responses = await asyncio.gather(*in_flight)
+                return latencies, responses
+
+        latencies, responses = asyncio.run(run())
+
+        assert all(response.status_code == 200 for response in responses)
+        assert responses[0].json()["successful"] == 4
+        # 4 extractions plus the comparison (fees differ, so it needs the model)
+        assert mock_client.models.generate_content.call_count == 5
+
+        # Many health checks were served while the models were running, each quickly
+        assert len(latencies) >= 5
+        assert max(latencies) < 0.1
+
+        # Extractions and the comparison overlapped instead of running back to back
+        assert in_flight_calls.peak >= 3
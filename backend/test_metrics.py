@@ -0,0 +1,89 @@
+import asyncio
+from unittest.mock import Mock
+
+import httpx
+
+from main import app
+from models import BankComparisonRequest, BankInfo, FieldWithEvidence
+from routes.pdf_routes import compare_banks
+from services.metrics import CACHE_LOOKUPS, Counter, Histogram, MODEL_TOKENS, MetricsRegistry
+from test_comparison import make_bank
+
+
+class TestMetricsRegistry:
+    """Tests for the Prometheus text rendering"""
+
+    def test_renders_counters_and_cumulative_histograms(self):
+        registry = MetricsRegistry()
+        requests = registry.register(Counter("requests_total", "Requests served", ["route"]))
+        latency = registry.register(Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1)))
+        requests.inc(route="/")
+        requests.inc(2, route="/")
+        latency.observe(0.05, route="/")
+        latency.observe(0.5, route="/")
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{route="/"} 3' in text
+        assert 'latency_seconds_bucket{route="/",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/",le="1"} 2' in text
+        assert 'latency_seconds_bucket{route="/",le="+Inf"} 2' in text
+        assert 'latency_seconds_sum{route="/"} 0.55' in text
+        assert 'latency_seconds_count{route="/"} 2' in text
+
+
+class TestInstrumentedEndpoints:
+    """Tests for timings in payloads and the /metrics route"""
+
+    def test_extraction_timings_and_metrics(self, mock_client):
+        response = Mock()
+        response.parsed = BankInfo(
+            bank_name="HDFC",
+            is_valid_home_loan_mitc=True,
+            fees_and_charges=FieldWithEvidence(missing=True),
+            prepayment=FieldWithEvidence(missing=True),
+            ltv_bands=FieldWithEvidence(missing=True),
+            eligibility=FieldWithEvidence(missing=True),
+            tenure=FieldWithEvidence(missing=True),
+            interest_reset=FieldWithEvidence(missing=True),
+            documents_required=FieldWithEvidence(missing=True)
+        )
+        response.usage_metadata = Mock(prompt_token_count=1200, candidates_token_count=300, thoughts_token_count=None, cached_content_token_count=None)
+        mock_client.models.generate_content.return_value = response
+        prompt_tokens = MODEL_TOKENS.value(model="gemini-2.5-pro", kind="prompt")
+        cache_hits = CACHE_LOOKUPS.value(cache="extraction", result="hit")
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                files = [("files", ("hdfc.pdf", b"%PDF-1.4 same bytes", "application/pdf"))]
+                first = await http.post("/process-pdfs?timings=true", files=files)
+                second = await http.post("/process-pdfs", files=files)
+                metrics = await http.get("/metrics")
+                return first.json(), second.json(), metrics
+
+        first, second, metrics = asyncio.run(run())
+
+        timing = first["results"][0]["timing"]
+        assert timing["attempts"] == 1
+        assert {"queue_wait", "read_upload", "cache_lookup", "model_call"} <= set(timing["stages_ms"])
+        assert timing["total_ms"] >= timing["stages_ms"]["model_call"]
+        # Timings are opt-in; the repeat is a cache hit
+        assert second["results"][0]["timing"] is None
+        assert second["results"][0]["cached"] is True
+
+        assert MODEL_TOKENS.value(model="gemini-2.5-pro", kind="prompt") == prompt_tokens + 1200
+        assert CACHE_LOOKUPS.value(cache="extraction", result="hit") == cache_hits + 1
+        assert metrics.status_code == 200
+        assert metrics.headers["content-type"].startswith("text/plain")
+        for name in ["stage_duration_seconds_bucket", "model_call_duration_seconds_count", "model_attempts_bucket", "pdf_size_bytes_count", "model_in_flight"]:
+            assert name in metrics.text
+
+    def test_comparison_timings_are_opt_in(self):
+        request = BankComparisonRequest(banks=[
+            make_bank("a", "HDFC", tenure="up to 30 years"),
+            make_bank("b", "ICICI", tenure="upto 30 yrs"),
+        ])
+        assert asyncio.run(compare_banks(request, timings=False)).timing is None
+        timing = asyncio.run(compare_banks(request, timings=True)).timing
+        assert "precompare" in timing.stages_ms
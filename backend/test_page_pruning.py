@@ -0,0 +1,116 @@
+import asyncio
+import tracemalloc
+from unittest.mock import Mock
+
+from pypdf import PdfWriter
+
+from models import BankInfo, FieldWithEvidence
+from routes.pdf_routes import process_pdf_with_retry
+from services.page_pruning import prune_pages, select_pages
+from services.pdf_text import read_page_texts
+
+BOILERPLATE = "This page intentionally describes general banking terms and grievance redressal contacts.\nThe bank reserves all rights to update this information at its discretion at any time."
+
+
+def make_text_pdf(page_texts):
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = "BT /F1 10 Tf 20 800 Td " + " ".join(f"({line}) Tj 0 -14 Td" for line in text.split("\n")) + " ET" if text else ""
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def make_policy_pages():
+    pages = [BOILERPLATE] * 30
+    pages[0] = "HDFC Bank Home Loan - Most Important Terms and Conditions\n" + BOILERPLATE
+    pages[6] = "Processing fee: 0.5% of the loan amount. Other charges as applicable.\n" + BOILERPLATE
+    pages[11] = "Tenure: up to 30 years. Prepayment charges: Nil for floating rate loans.\n" + BOILERPLATE
+    pages[19] = "Documents required: KYC documents, income proof.\n" + BOILERPLATE
+    return pages
+
+
+class TestPageSelection:
+    """Tests for choosing the pages relevant to the configured fields"""
+
+    def test_keeps_first_and_relevant_pages_with_original_numbers(self):
+        pages = prune_pages(make_policy_pages())
+        assert [number for number, _ in pages] == [1, 7, 12, 20]
+        assert "Processing fee" in dict(pages)[7]
+
+    def test_short_and_scanned_documents_are_sent_whole(self):
+        assert select_pages(make_policy_pages()[:4]) is None
+        # Pages without a text layer (scans) cannot be scored
+        assert select_pages([""] * 30) is None
+        assert read_page_texts(b"%PDF-1.4 not really a pdf") is None
+
+
+class TestTextLayer:
+    """Tests for reading the text layer of spooled PDFs"""
+
+    def test_large_file_is_not_loaded_into_memory(self, tmp_path):
+        writer = PdfWriter()
+        writer.add_blank_page(595, 842)
+        writer.add_attachment("scan.bin", b"x" * 10_000_000)
+        path = tmp_path / "large.pdf"
+        writer.write(str(path))
+
+        tracemalloc.start()
+        try:
+            page_texts = read_page_texts(str(path))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert page_texts == [""]
+        assert peak < 2_000_000
+
+
+class TestPrunedExtraction:
+    """Tests for sending pruned page text instead of the PDF"""
+
+    def test_long_policy_is_sent_as_page_text(self, mock_client):
+        """Only relevant pages reach the model, labelled with their original page numbers"""
+        response = Mock()
+        response.parsed = BankInfo(
+            bank_name="HDFC",
+            is_valid_home_loan_mitc=True,
+            fees_and_charges=FieldWithEvidence(missing=True),
+            prepayment=FieldWithEvidence(missing=True),
+            ltv_bands=FieldWithEvidence(missing=True),
+            eligibility=FieldWithEvidence(missing=True),
+            tenure=FieldWithEvidence(missing=True),
+            interest_reset=FieldWithEvidence(missing=True),
+            documents_required=FieldWithEvidence(missing=True)
+        )
+        mock_client.models.generate_content.return_value = response
+
+        result = asyncio.run(process_pdf_with_retry(make_text_pdf(make_policy_pages()), "hdfc.pdf"))
+
+        assert result.status == "success"
+        part = mock_client.models.generate_content.call_args.kwargs["contents"][0]
+        assert part.inline_data is None
+        assert "has 30 pages" in part.text
+        assert "=== Page 12 ===\nTenure: up to 30 years" in part.text
+        assert "=== Page 2 ===" not in part.text
+
+    def test_scanned_policy_falls_back_to_full_pdf(self, mock_client):
+        mock_client.models.generate_content.side_effect = ValueError("stop")
+        pdf = make_text_pdf([""] * 30)
+
+        asyncio.run(process_pdf_with_retry(pdf, "scan.pdf"))
+
+        part = mock_client.models.generate_content.call_args.kwargs["contents"][0]
+        assert part.inline_data.data == pdf
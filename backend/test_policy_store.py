@@ -0,0 +1,117 @@
+import asyncio
+from unittest.mock import Mock
+
+import httpx
+
+from main import app
+from models import BankInfo, FieldWithEvidence
+from services.policy_store import PolicyStore
+
+
+def make_bank_info(bank_name: str, tenure: str, effective_date: str = None) -> BankInfo:
+    values = {
+        key: FieldWithEvidence(missing=True)
+        for key in ["fees_and_charges", "prepayment", "ltv_bands", "eligibility", "interest_reset", "documents_required"]
+    }
+    return BankInfo(
+        bank_name=bank_name,
+        is_valid_home_loan_mitc=True,
+        effective_date=effective_date,
+        tenure=FieldWithEvidence(missing=False, content=tenure),
+        **values
+    )
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.request(method, url, **kwargs)
+    return asyncio.run(run())
+
+
+class TestPolicyStore:
+    """Tests for the SQLite policy store"""
+
+    def test_save_is_keyed_on_document_and_searchable(self, tmp_path):
+        store = PolicyStore(str(tmp_path / "policies.sqlite3"))
+        hdfc_id = store.save(make_bank_info("HDFC", "up to 30 years", "2024-01-01"), "sha-hdfc", "hdfc.pdf")
+        store.save(make_bank_info("ICICI", "up to 25 years", "2023-06-01"), "sha-icici", "icici.pdf")
+
+        # Re-extracting the same document keeps its id
+        assert store.save(make_bank_info("HDFC", "up to 35 years", "2024-04-01"), "sha-hdfc", "hdfc.pdf") == hdfc_id
+        assert [p["bank_name"] for p in store.search()] == ["HDFC", "ICICI"]
+        assert [p["policy_id"] for p in store.search(bank_name="hdfc")] == [hdfc_id]
+        assert [p["bank_name"] for p in store.search(date_to="2023-12-31")] == ["ICICI"]
+        assert [p["policy_id"] for p in store.search(document_sha256="sha-hdfc")] == [hdfc_id]
+
+        # Survives a restart, and the slim view is served without the evidence
+        reopened = PolicyStore(str(tmp_path / "policies.sqlite3"))
+        assert reopened.get(hdfc_id)["bank_info"].tenure.content == "up to 35 years"
+        data = reopened.get_comparison_data([hdfc_id, "unknown"])
+        assert data[hdfc_id]["tenure"] == {"missing": False, "content": "up to 35 years"}
+        assert "unknown" not in data
+
+        assert reopened.delete(hdfc_id) is True
+        assert reopened.get(hdfc_id) is None
+
+    def test_parsed_views_follow_other_processes(self, tmp_path):
+        path = str(tmp_path / "policies.sqlite3")
+        worker_a, worker_b = PolicyStore(path), PolicyStore(path)
+        policy_id = worker_a.save(make_bank_info("HDFC", "up to 30 years"), "sha", None)
+        assert worker_a.get_comparison_data([policy_id])[policy_id]["tenure"]["content"] == "up to 30 years"
+
+        worker_b.save(make_bank_info("HDFC", "up to 35 years"), "sha", None)
+        assert worker_a.get_comparison_data([policy_id])[policy_id]["tenure"]["content"] == "up to 35 years"
+        worker_b.delete(policy_id)
+        assert worker_a.get_comparison_data([policy_id]) == {}
+
+    def test_search_uses_indexes(self):
+        store = PolicyStore(":memory:")
+        store.save(make_bank_info("HDFC", "30 years"), "sha", None)
+        conn = store._connection()
+        plan = " ".join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM policies WHERE bank_name_key = ? ORDER BY policy_date DESC", ("hdfc",)
+        ))
+        assert "idx_policies_bank" in plan
+
+
+class TestPolicyRoutes:
+    """Tests for comparing stored policies by id"""
+
+    def test_extracted_policies_can_be_compared_by_id(self, mock_client):
+        responses = []
+        for name in ["HDFC", "ICICI"]:
+            response = Mock()
+            response.parsed = make_bank_info(name, "up to 30 years")
+            responses.append(response)
+        mock_client.models.generate_content.side_effect = responses
+
+        files = [("files", (f"{i}.pdf", f"%PDF-1.4 doc {i}".encode(), "application/pdf")) for i in range(2)]
+        results = request("POST", "/process-pdfs", files=files).json()["results"]
+        # Uploads are processed concurrently, so either file may get either response
+        by_bank = {result["bank_info"]["bank_name"]: result["policy_id"] for result in results}
+        assert all(by_bank.values())
+        policy_ids = [by_bank["HDFC"], by_bank["ICICI"]]
+
+        listed = request("GET", "/policies", params={"bank_name": "ICICI"}).json()
+        assert [p["policy_id"] for p in listed] == [by_bank["ICICI"]]
+        assert request("GET", f"/policies/{by_bank['HDFC']}").json()["bank_info"]["bank_name"] == "HDFC"
+
+        # Identical tenure and all other fields missing: decided without the model
+        comparison = request("POST", "/compare-banks", json={"banks": [{"policy_id": policy_id} for policy_id in policy_ids]})
+        assert comparison.status_code == 200
+        tenure = next(row for row in comparison.json()["comparison_table"] if row["field_name"] == "tenure")
+        assert [cell["bank_id"] for cell in tenure["bank_results"]] == policy_ids
+        assert [cell["status"] for cell in tenure["bank_results"]] == ["SAME", "SAME"]
+        assert mock_client.models.generate_content.call_count == 2
+
+    def test_unknown_policy_id_is_not_found(self):
+        response = request("POST", "/compare-banks", json={"banks": [
+            {"policy_id": "missing"},
+            {"bank_id": "b", "bank_info": make_bank_info("ICICI", "30 years").model_dump()},
+        ]})
+        assert response.status_code == 404
+        assert "missing" in response.json()["detail"]
+
+        assert request("POST", "/compare-banks", json={"banks": [{"bank_id": "a"}, {"policy_id": "x"}]}).status_code == 422
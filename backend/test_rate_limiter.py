@@ -0,0 +1,157 @@
+import asyncio
+import multiprocessing
+import time
+
+from google.genai.errors import ClientError, ServerError
+
+from services.rate_limiter import AdaptiveRateLimiter, SharedTokenBucket, get_rate_limiter, model_max_concurrency
+from services.retry import MalformedResponseError, backoff_delay, is_retryable_error, retry_after_seconds
+
+
+class TestAdaptiveRateLimiter:
+    """Tests for the token bucket / AIMD limiter"""
+
+    def test_concurrency_window_is_enforced(self):
+        """No more than the window's worth of calls run at once"""
+        limiter = AdaptiveRateLimiter("test", requests_per_minute=60000, max_concurrency=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.02)
+
+        async def run():
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(run())
+        assert peak == 2
+        assert limiter.in_flight == 0
+
+    def test_token_bucket_paces_requests(self):
+        """Calls beyond the burst are spaced out at the configured rate"""
+        limiter = AdaptiveRateLimiter("test", requests_per_minute=600, max_concurrency=10, burst=1)
+
+        async def run():
+            for _ in range(3):
+                async with limiter.slot():
+                    pass
+
+        start = time.monotonic()
+        asyncio.run(run())
+        # One token up front, then two more at 10 per second
+        assert time.monotonic() - start >= 0.18
+
+    def test_aimd_adjusts_window(self):
+        """Throttling halves the window and pauses; successes grow it back slowly"""
+        limiter = AdaptiveRateLimiter("test", requests_per_minute=600, max_concurrency=8)
+        asyncio.run(limiter.record_throttle(retry_after=0.5))
+        assert limiter.concurrency_limit == 4
+        assert limiter.paused_until > time.monotonic() + 0.4
+
+        limiter.record_success()
+        assert limiter.concurrency_limit == 4.25
+
+        for _ in range(10):
+            asyncio.run(limiter.record_throttle())
+        assert limiter.concurrency_limit == limiter.min_concurrency
+
+    def test_window_decreases_once_per_overload(self):
+        """Throttles of calls started before the last decrease do not halve the window again"""
+        limiter = AdaptiveRateLimiter("test", requests_per_minute=600, max_concurrency=8)
+        started_at = time.monotonic()
+        for _ in range(3):
+            asyncio.run(limiter.record_throttle(retry_after=0, started_at=started_at))
+        assert limiter.concurrency_limit == 4
+
+        asyncio.run(limiter.record_throttle(retry_after=0, started_at=time.monotonic()))
+        assert limiter.concurrency_limit == 2
+
+    def test_cancelled_waiter_passes_its_wakeup_on(self):
+        """A waiter cancelled after release() woke it hands the slot to the next waiter"""
+        limiter = AdaptiveRateLimiter("test", requests_per_minute=60000, max_concurrency=1)
+
+        async def run():
+            await limiter.acquire()
+            first = asyncio.create_task(limiter.acquire())
+            second = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            limiter.release()
+            first.cancel()
+            await asyncio.wait_for(second, timeout=1)
+            return first.cancelled()
+
+        assert asyncio.run(run())
+        assert limiter.in_flight == 1
+
+
+    def test_max_concurrency_comes_from_env_or_defaults(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_2_5_PRO_MAX_CONCURRENCY", "4")
+        assert model_max_concurrency("gemini-2.5-pro") == 4
+        assert model_max_concurrency("gemini-2.5-flash") == 64
+        assert get_rate_limiter("gemini-2.5-pro").max_concurrency == 4
+
+
+class TestRetryClassification:
+    """Tests for deciding which model errors are worth retrying"""
+
+    def test_retryable_errors(self):
+        assert is_retryable_error(ClientError(429, {"error": {"code": 429}}))
+        assert is_retryable_error(ServerError(503, {"error": {"code": 503}}))
+        assert is_retryable_error(MalformedResponseError("bad json"))
+        assert is_retryable_error(TimeoutError())
+        assert not is_retryable_error(ClientError(400, {"error": {"code": 400}}))
+        assert not is_retryable_error(ClientError(403, {"error": {"code": 403}}))
+        assert not is_retryable_error(ValueError("bug"))
+
+    def test_retry_after_from_retry_info(self):
+        error = ClientError(429, {"error": {"code": 429, "details": [
+            {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "17s"}
+        ]}})
+        assert retry_after_seconds(error) == 17.0
+        assert backoff_delay(0, retry_after_seconds(error)) >= 17.0
+        assert retry_after_seconds(ValueError()) is None
+
+    def test_backoff_is_jittered_and_capped(self):
+        delays = {backoff_delay(3) for _ in range(20)}
+        assert len(delays) > 1
+        assert all(0 <= d <= 8 for d in delays)
+        assert backoff_delay(20) <= 30
+
+
+def take_tokens(path: str, attempts: int, results) -> None:
+    bucket = SharedTokenBucket(path, "gemini-test", requests_per_minute=0.6, capacity=5)
+    results.put(sum(1 for _ in range(attempts) if bucket.take() == 0))
+
+
+class TestSharedTokenBucket:
+    """Tests for the rate-limit budget shared between serving processes"""
+
+    def test_processes_draw_from_one_budget(self, tmp_path):
+        path = str(tmp_path / "rate_limits.sqlite3")
+        results = multiprocessing.get_context("spawn").Queue()
+        processes = [
+            multiprocessing.get_context("spawn").Process(target=take_tokens, args=(path, 5, results))
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+        assert sum(results.get(timeout=5) for _ in processes) == 5
+
+    def test_throttle_pauses_every_limiter_sharing_the_file(self, tmp_path):
+        path = str(tmp_path / "rate_limits.sqlite3")
+        first = AdaptiveRateLimiter("a", 60000, 4, shared_bucket=SharedTokenBucket(path, "m", 60000, 4))
+        second = AdaptiveRateLimiter("b", 60000, 4, shared_bucket=SharedTokenBucket(path, "m", 60000, 4))
+
+        asyncio.run(first.record_throttle(retry_after=0.2))
+
+        async def call():
+            async with second.slot():
+                pass
+
+        start = time.monotonic()
+        asyncio.run(call())
+        assert time.monotonic() - start >= 0.15
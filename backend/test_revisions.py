@@ -0,0 +1,146 @@
+import asyncio
+from typing import Optional
+from unittest.mock import Mock
+
+import httpx
+
+from main import app
+from models import BankInfo, Evidence, FieldWithEvidence, RevisionResult
+from routes import pdf_routes
+from routes.pdf_routes import process_pdf_with_retry
+from services.deadlines import remaining_seconds
+from services.revisions import page_fingerprints, plan_revision
+from test_page_pruning import make_policy_pages, make_text_pdf
+
+MISSING_FIELDS = ["ltv_bands", "eligibility", "interest_reset"]
+
+
+def found(content: str, page: int, snippet: str) -> FieldWithEvidence:
+    return FieldWithEvidence(missing=False, content=content, evidence=[Evidence(page_number=page, line_snippet=snippet)])
+
+
+def make_previous() -> BankInfo:
+    return BankInfo(
+        bank_name="HDFC",
+        is_valid_home_loan_mitc=True,
+        effective_date="2024-01-01",
+        fees_and_charges=found("Processing Fee 0.5% of Loan Amount", 7, "Processing fee: 0.5% of the loan amount"),
+        prepayment=found("Nil for floating rate loans", 12, "Prepayment charges: Nil for floating rate loans"),
+        tenure=found("up to 30 years", 12, "Tenure: up to 30 years"),
+        documents_required=found("KYC documents, income proof", 20, "Documents required: KYC documents, income proof"),
+        **{key: FieldWithEvidence(missing=True) for key in MISSING_FIELDS}
+    )
+
+
+def make_revised_pages():
+    pages = make_policy_pages()
+    # Tenure and prepayment terms revised, and a page inserted near the front
+    pages[11] = "Tenure: up to 35 years. Prepayment: Nil for all individual borrowers.\n" + pages[11].split("\n", 1)[1]
+    pages.insert(1, "Grievance redressal officer: Customer Service Head, Mumbai office. Write to us for any complaint about this document or branch.")
+    return pages
+
+
+def upload_revision(policy_id: str, pdf: bytes, params: Optional[dict] = None) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.post(f"/policies/{policy_id}/revisions", files={"file": ("v2.pdf", pdf, "application/pdf")}, params=params)
+    return asyncio.run(run())
+
+
+class TestRevisionPlan:
+    """Tests for diffing a revision against the previous version's pages"""
+
+    def test_only_fields_on_changed_pages_are_reextracted(self):
+        plan = plan_revision(make_previous(), page_fingerprints(make_policy_pages()), make_revised_pages())
+
+        assert plan.changed_pages == [2, 13]
+        assert plan.reextract == ["prepayment", "tenure"]
+        assert set(plan.carried_forward) == {"fees_and_charges", "documents_required", *MISSING_FIELDS}
+        # Pages after the insertion are matched at their new positions
+        assert plan.page_map[7] == 8 and plan.page_map[20] == 21
+        assert plan.pages_to_send == [1, 2, 13]
+
+    def test_identical_text_needs_no_model_call(self):
+        pages = make_policy_pages()
+        plan = plan_revision(make_previous(), page_fingerprints(pages), [" ".join(page.split()) for page in pages])
+        assert plan.changed_pages == [] and plan.reextract == []
+        assert not plan.needs_model
+
+
+class TestRevisionEndpoint:
+    """Tests for POST /policies/{policy_id}/revisions"""
+
+    def test_revision_reextracts_changed_fields_only(self, mock_client):
+        response = Mock()
+        response.parsed = make_previous()
+        mock_client.models.generate_content.return_value = response
+        first = asyncio.run(process_pdf_with_retry(make_text_pdf(make_policy_pages()), "v1.pdf"))
+        assert pdf_routes.policy_store.get_page_fingerprints(first.policy_id) is not None
+
+        def revise(model, contents, config):
+            schema = config["response_schema"]
+            result = Mock()
+            result.parsed = schema(
+                bank_name="HDFC",
+                is_valid_home_loan_mitc=True,
+                effective_date="2024-07-01",
+                tenure=found("up to 35 years", 13, "Tenure: up to 35 years"),
+                prepayment=found("Nil for floating rate loans", 13, "Prepayment: Nil for all individual borrowers"),
+            )
+            return result
+        mock_client.models.generate_content.reset_mock()
+        mock_client.models.generate_content.side_effect = revise
+
+        result = upload_revision(first.policy_id, make_text_pdf(make_revised_pages())).json()
+
+        assert result["status"] == "success"
+        call = mock_client.models.generate_content.call_args.kwargs
+        assert set(call["config"]["response_schema"].model_fields) >= {"tenure", "prepayment"}
+        assert "fees_and_charges" not in call["config"]["response_schema"].model_fields
+        document = call["contents"][0].text
+        assert "=== Page 13 ===" in document and "=== Page 8 ===" not in document
+
+        statuses = {change["field_name"]: change["status"] for change in result["changelog"]}
+        assert statuses["tenure"] == "changed"
+        assert statuses["prepayment"] == "unchanged"
+        assert statuses["fees_and_charges"] == "carried_forward"
+        assert result["bank_info"]["effective_date"] == "2024-07-01"
+        assert result["bank_info"]["fees_and_charges"]["evidence"][0]["page_number"] == 8
+        assert result["bank_info"]["fees_and_charges"]["evidence"][0]["verification"] == "verified"
+        assert result["changed_pages"] == [2, 13]
+
+        # The revision is stored alongside the previous version
+        assert result["policy_id"] != first.policy_id
+        assert pdf_routes.policy_store.get(result["policy_id"])["bank_info"].tenure.content == "up to 35 years"
+
+    def test_revision_without_stored_pages_is_extracted_in_full(self, mock_client):
+        response = Mock()
+        response.parsed = make_previous()
+        mock_client.models.generate_content.return_value = response
+        policy_id = pdf_routes.policy_store.save(make_previous(), "sha-v1", "v1.pdf")
+
+        result = upload_revision(policy_id, make_text_pdf(make_revised_pages())).json()
+
+        assert result["status"] == "success"
+        assert result["full_extraction"] is True
+        assert mock_client.models.generate_content.call_args.kwargs["config"]["response_schema"] is BankInfo
+        assert {change["status"] for change in result["changelog"]} == {"unchanged"}
+
+    def test_unknown_policy_is_not_found(self):
+        assert upload_revision("missing", make_text_pdf(make_policy_pages())).status_code == 404
+
+    def test_deadline_can_be_overridden(self, monkeypatch):
+        policy_id = pdf_routes.policy_store.save(make_previous(), "sha-v1", "v1.pdf")
+        budgets = []
+
+        async def fake_revision(pdf, filename, previous_policy_id, previous, timings):
+            budgets.append(remaining_seconds())
+            return RevisionResult(filename=filename, status="failed", previous_policy_id=previous_policy_id, error_message="stopped")
+
+        monkeypatch.setattr(pdf_routes, "process_revision", fake_revision)
+        upload_revision(policy_id, make_text_pdf(make_policy_pages()), params={"deadline_seconds": 5})
+        upload_revision(policy_id, make_text_pdf(make_policy_pages()))
+
+        assert 4 < budgets[0] <= 5
+        assert budgets[1] > 5
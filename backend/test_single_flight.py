@@ -0,0 +1,181 @@
+import asyncio
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from models import BankComparisonCell, BankComparisonRequest, BankComparisonResponse, BankInfo, ComparisonRow, FieldWithEvidence
+from routes.pdf_routes import compare_banks, process_pdf_with_retry
+from services.single_flight import SingleFlight
+from services.uploads import SpooledPDF
+from test_comparison import make_bank
+
+
+class TestSingleFlight:
+    """Tests for coalescing concurrent calls with the same key"""
+
+    def test_concurrent_callers_share_one_call(self):
+        flights = SingleFlight("test")
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def run():
+            return await asyncio.gather(*(flights.run("key", call) for _ in range(5)))
+
+        outcomes = asyncio.run(run())
+        assert len(calls) == 1
+        assert [result for result, _ in outcomes] == ["result"] * 5
+        assert [shared for _, shared in outcomes] == [False, True, True, True, True]
+        assert len(flights) == 0
+
+    def test_errors_reach_every_waiter(self):
+        flights = SingleFlight("test")
+
+        async def call():
+            await asyncio.sleep(0.01)
+            raise ValueError("model failed")
+
+        async def run():
+            return await asyncio.gather(*(flights.run("key", call) for _ in range(3)), return_exceptions=True)
+
+        outcomes = asyncio.run(run())
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+
+    def test_cancelled_waiter_does_not_cancel_the_call(self):
+        flights = SingleFlight("test")
+        finished = []
+
+        async def call():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+            return "result"
+
+        async def run():
+            first = asyncio.create_task(flights.run("key", call))
+            second = asyncio.create_task(flights.run("key", call))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(run()) == ("result", True)
+        assert finished == [1]
+
+    def test_call_is_cancelled_once_no_waiter_is_left(self):
+        flights = SingleFlight("test")
+        finished = []
+
+        async def call():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+
+        async def run():
+            waiter = asyncio.create_task(flights.run("key", call))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.sleep(0.1)
+            return len(flights)
+
+        assert asyncio.run(run()) == 0
+        assert finished == []
+
+
+class TestCoalescedRequests:
+    """Tests for duplicate extractions and comparisons in flight at the same time"""
+
+    def test_duplicate_uploads_share_one_extraction(self, mock_client, monkeypatch):
+        monkeypatch.setattr("routes.pdf_routes.EXTRACTION_CACHE_ENABLED", False)
+        response = Mock()
+        response.parsed = BankInfo(
+            bank_name="HDFC",
+            is_valid_home_loan_mitc=True,
+            **{key: FieldWithEvidence(missing=True) for key in ["fees_and_charges", "prepayment", "ltv_bands", "eligibility", "tenure", "interest_reset", "documents_required"]}
+        )
+
+        def slow_generate_content(**kwargs):
+            time.sleep(0.05)
+            return response
+
+        mock_client.models.generate_content.side_effect = slow_generate_content
+
+        async def run():
+            return await asyncio.gather(*(process_pdf_with_retry(b"same_pdf_content", f"copy{i}.pdf") for i in range(3)))
+
+        results = asyncio.run(run())
+        assert mock_client.models.generate_content.call_count == 1
+        assert [result.filename for result in results] == ["copy0.pdf", "copy1.pdf", "copy2.pdf"]
+        assert all(result.status == "success" and result.bank_info.bank_name == "HDFC" for result in results)
+
+    def test_shared_extraction_keeps_the_spool_of_a_cancelled_leader(self, mock_client, monkeypatch, tmp_path):
+        """The leader's request ending does not delete the spool file the shared extraction still reads"""
+        monkeypatch.setattr("routes.pdf_routes.EXTRACTION_CACHE_ENABLED", False)
+        monkeypatch.setattr("routes.pdf_routes.PAGE_PRUNING_ENABLED", True)
+
+        def slow_read_page_texts(pdf):
+            # The leader is cancelled while the text layer is read, before the document is sent
+            time.sleep(0.05)
+            return None
+
+        monkeypatch.setattr("routes.pdf_routes.read_page_texts", slow_read_page_texts)
+        path = tmp_path / "upload.pdf"
+        path.write_bytes(b"%PDF-1.4 shared")
+        leader_pdf = SpooledPDF.from_path(str(path), delete=True)
+        response = Mock()
+        response.parsed = BankInfo(
+            bank_name="HDFC",
+            is_valid_home_loan_mitc=True,
+            **{key: FieldWithEvidence(missing=True) for key in ["fees_and_charges", "prepayment", "ltv_bands", "eligibility", "tenure", "interest_reset", "documents_required"]}
+        )
+        mock_client.models.generate_content.return_value = response
+
+        async def leader():
+            try:
+                return await process_pdf_with_retry(leader_pdf, "leader.pdf")
+            finally:
+                leader_pdf.cleanup()
+
+        async def run():
+            first = asyncio.create_task(leader())
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(process_pdf_with_retry(b"%PDF-1.4 shared", "waiter.pdf"))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        result = asyncio.run(run())
+        assert result.status == "success"
+        assert mock_client.models.generate_content.call_count == 1
+        assert not path.exists()
+
+    def test_duplicate_comparisons_share_one_run(self, mock_client, monkeypatch):
+        monkeypatch.setattr("routes.pdf_routes.COMPARISON_CACHE_ENABLED", False)
+        response = Mock()
+        response.parsed = BankComparisonResponse(
+            comparison_table=[ComparisonRow(field_name="fees_and_charges", bank_results=[
+                BankComparisonCell(bank_id=bank_id, bank_name="?", status="DIFF", explanation="differs")
+                for bank_id in "ab"
+            ])],
+            summary=[]
+        )
+
+        def slow_generate_content(**kwargs):
+            time.sleep(0.05)
+            return response
+
+        mock_client.models.generate_content.side_effect = slow_generate_content
+        request = BankComparisonRequest(banks=[
+            make_bank("a", "HDFC", fees_and_charges="Processing fee 0.5%"),
+            make_bank("b", "ICICI", fees_and_charges="Processing fee 1%"),
+        ])
+
+        async def run():
+            return await asyncio.gather(*(compare_banks(request) for _ in range(3)))
+
+        results = asyncio.run(run())
+        assert mock_client.models.generate_content.call_count == 1
+        assert all(result.comparison_table == results[0].comparison_table for result in results)
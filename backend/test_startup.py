@@ -0,0 +1,46 @@
+import asyncio
+import subprocess
+import sys
+
+import httpx
+
+from main import create_app
+from routes.pdf_routes import process_pdf_with_retry
+from services.fake_model import FakeModelClient
+from services.model_client import model_client
+
+
+def get(app, url: str) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.get(url)
+    return asyncio.run(run())
+
+
+class TestStartup:
+    """Tests for app-factory startup and the lazily created model client"""
+
+    def test_import_needs_no_key_and_defers_the_sdk(self):
+        code = "import sys, main; print('google.genai' in sys.modules, 'pypdf' in sys.modules)"
+        env = {"PATH": "", "PYTHONPATH": "."}
+        output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+        assert output.split() == ["False", "False"]
+
+    def test_readiness_is_separate_from_liveness(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        app = create_app()
+        assert get(app, "/").status_code == 200
+        assert get(app, "/ready").status_code == 503
+
+        # Without a key, requests fail per file instead of the app failing to start
+        result = asyncio.run(process_pdf_with_retry(b"%PDF-1.4 test", "test.pdf"))
+        assert result.status == "failed"
+        assert "GEMINI_API_KEY" in result.error_message
+
+        fake = FakeModelClient()
+        app = create_app(model_client=fake)
+        assert get(app, "/ready").json() == {"status": "ready", "model_client": True}
+        result = asyncio.run(process_pdf_with_retry(b"%PDF-1.4 test", "test.pdf"))
+        assert result.status == "success" and fake.calls == 1
+        assert model_client.get() is fake
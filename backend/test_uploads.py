@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import io
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import UploadFile
+
+from models import BankInfo, FieldWithEvidence
+from routes.pdf_routes import process_pdf_with_retry
+from services.uploads import BatchBudget, SpooledPDF, UploadRejectedError, spool_upload
+
+
+def make_upload(content: bytes, filename: str = "policy.pdf") -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+class TestSpoolUpload:
+    """Tests for spooling uploads to disk"""
+
+    def test_spools_and_hashes_pdf(self, tmp_path):
+        """A valid PDF is copied to disk with its size and hash computed on the fly"""
+        content = b"%PDF-1.7\n" + b"x" * 3_000_000
+        pdf = asyncio.run(spool_upload(make_upload(content), max_bytes=10_000_000, spool_dir=str(tmp_path)))
+
+        assert pdf.size == len(content)
+        assert pdf.sha256 == hashlib.sha256(content).hexdigest()
+        assert pdf.read_bytes() == content
+        pdf.cleanup()
+        assert not os.path.exists(pdf.path)
+
+    def test_rejects_non_pdf_content_regardless_of_extension(self, tmp_path):
+        """Magic bytes decide, not the filename"""
+        with pytest.raises(UploadRejectedError, match="not a PDF"):
+            asyncio.run(spool_upload(make_upload(b"<html>fake</html>", "fake.pdf"), max_bytes=1000, spool_dir=str(tmp_path)))
+        assert os.listdir(tmp_path) == []
+
+        pdf = asyncio.run(spool_upload(make_upload(b"%PDF-1.4 real", "scan.PDF.bin"), max_bytes=1000, spool_dir=str(tmp_path)))
+        assert pdf.size == 13
+
+    def test_enforces_file_and_batch_limits(self, tmp_path):
+        """Oversized files and batches are rejected and leave nothing on disk"""
+        with pytest.raises(UploadRejectedError, match="File exceeds"):
+            asyncio.run(spool_upload(make_upload(b"%PDF-" + b"x" * 2000), max_bytes=1000, spool_dir=str(tmp_path)))
+
+        budget = BatchBudget(max_bytes=1500)
+        asyncio.run(spool_upload(make_upload(b"%PDF-" + b"x" * 900), max_bytes=1000, budget=budget, spool_dir=str(tmp_path)))
+        with pytest.raises(UploadRejectedError, match="Batch exceeds"):
+            asyncio.run(spool_upload(make_upload(b"%PDF-" + b"x" * 900), max_bytes=1000, budget=budget, spool_dir=str(tmp_path)))
+        assert len(os.listdir(tmp_path)) == 1
+
+    def test_rejected_files_do_not_use_the_batch_budget(self, tmp_path):
+        """Only accepted files are charged against the batch limit"""
+        budget = BatchBudget(max_bytes=1500)
+        with pytest.raises(UploadRejectedError, match="File exceeds"):
+            asyncio.run(spool_upload(make_upload(b"%PDF-" + b"x" * 1200), max_bytes=1000, budget=budget, spool_dir=str(tmp_path)))
+        with pytest.raises(UploadRejectedError, match="not a PDF"):
+            asyncio.run(spool_upload(make_upload(b"<html>" + b"x" * 500 + b"</html>"), max_bytes=1000, budget=budget, spool_dir=str(tmp_path)))
+        assert budget.used == 0
+
+        pdf = asyncio.run(spool_upload(make_upload(b"%PDF-" + b"x" * 900), max_bytes=1000, budget=budget, spool_dir=str(tmp_path)))
+        assert budget.used == pdf.size
+
+
+class TestLargePDFHandling:
+    """Tests for sending large spooled PDFs by reference"""
+
+    @patch('routes.pdf_routes.PDF_INLINE_MAX_BYTES', 10)
+    def test_large_pdf_is_uploaded_once_and_referenced(self, mock_client, tmp_path):
+        """PDFs over the inline limit go through the Files API and are deleted afterwards"""
+        path = tmp_path / "large.pdf"
+        path.write_bytes(b"%PDF-1.4 " + b"x" * 100)
+
+        uploaded = Mock(uri="https://files.example/large", mime_type="application/pdf")
+        uploaded.name = "files/large"
+        mock_client.files.upload.return_value = uploaded
+        response = Mock()
+        response.parsed = BankInfo(
+            bank_name="AXIS",
+            is_valid_home_loan_mitc=True,
+            fees_and_charges=FieldWithEvidence(missing=True),
+            prepayment=FieldWithEvidence(missing=True),
+            ltv_bands=FieldWithEvidence(missing=True),
+            eligibility=FieldWithEvidence(missing=True),
+            tenure=FieldWithEvidence(missing=True),
+            interest_reset=FieldWithEvidence(missing=True),
+            documents_required=FieldWithEvidence(missing=True)
+        )
+        mock_client.models.generate_content.return_value = response
+
+        result = asyncio.run(process_pdf_with_retry(SpooledPDF.from_path(str(path)), "large.pdf"))
+
+        assert result.status == "success"
+        mock_client.files.upload.assert_called_once()
+        part = mock_client.models.generate_content.call_args.kwargs["contents"][0]
+        assert part.file_data.file_uri == "https://files.example/large"
+        assert part.inline_data is None
+        mock_client.files.delete.assert_called_once_with(name="files/large")
@@ -0,0 +1,23 @@
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    """Run job workers without the API, sharing the queue configured by JOB_QUEUE_PATH"""
+    from routes.job_routes import JOB_WORKERS, start_job_workers
+
+    await start_job_workers(max(JOB_WORKERS, 1))
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Job worker stopped")
@@ -111,11 +111,23 @@ export default function ComparisonDetailModal({
                 <div key={index} className="bg-amber-50 border border-amber-200 rounded-lg p-3">
                   <div className="flex items-center justify-between mb-2">
                     <span className="text-xs font-medium text-amber-800">#{index + 1}</span>
-                    {evidence.page_number && (
-                      <span className="text-xs text-amber-700 bg-amber-200 px-2 py-1 rounded">
-                        Page {evidence.page_number}
-                      </span>
-                    )}
+                    <div className="flex items-center gap-2">
+                      {evidence.verification === 'unverified' && (
+                        <span className="text-xs text-red-700 bg-red-100 px-2 py-1 rounded">
+                          Not found in document
+                        </span>
+                      )}
+                      {evidence.verification === 'corrected' && (
+                        <span className="text-xs text-blue-700 bg-blue-100 px-2 py-1 rounded">
+                          Page corrected from {evidence.reported_page_number}
+                        </span>
+                      )}
+                      {evidence.page_number && (
+                        <span className="text-xs text-amber-700 bg-amber-200 px-2 py-1 rounded">
+                          Page {evidence.page_number}
+                        </span>
+                      )}
+                    </div>
                   </div>
                   <p className="text-sm text-gray-700 italic">
                     &ldquo;{evidence.line_snippet}&rdquo;
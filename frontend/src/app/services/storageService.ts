@@ -1,6 +1,8 @@
 interface Evidence {
   page_number?: number;
   line_snippet: string;
+  verification?: 'verified' | 'corrected' | 'unverified'; // Checked against the PDF text layer
+  reported_page_number?: number; // Page given by the model when verification corrected it
 }
 
 interface FieldWithEvidence {